@@ -17,6 +17,10 @@
 # PERFORMANCE OPTIONS
 parquet_engine = 'pyarrow'  # ['pyarrow', 'fastparquet' 'auto']
 process_pool_size = 0  # '0' for automatic choice based on actual CPU cores count, '1' for sequential processing
+converter_engine = 'pandas'  # ['pandas', 'arrow']
+read_batch_size = 0  # '0' to read each partition at once, otherwise the maximum number of rows per batch
+process_start_method = 'spawn'  # ['spawn', 'forkserver']
+profile_worker_startup = False  # print the import time of the modules needed by each worker before starting
 
 # Some citations do not have any ID that can help us
 # classifying them (i.e. doi, pmid, isbn, ...). Should
@@ -14,16 +14,27 @@
 # ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
 # SOFTWARE.
 
+# PERFORMANCE OPTIONS
+process_pool_size = 0  # '0' for automatic choice based on actual CPU cores count, '1' for sequential processing
+
 # REQUIRED DIRECTORIES
 meta_csv_output_dir = '<path>/meta_folder/csv_output/'  # INPUT DIR
 citations_csv_dir = '<path>/converter_folder/citations/'  # INPUT DIR
 converter_citations_csv_output_dir = '<path>/citations_folder/csv_output/'  # OUTPUT DIR
 converter_citations_rdf_output_dir = '<path>/citations_folder/rdf_output/'  # OUTPUT DIR
+tmp_to_meta_dir = '<path>/citations_folder/tmp_to_meta/'  # SUPPORT DIR (rebuilt at each execution)
+
+# LOCAL CITATIONS INDEX
+# When set, Citation entities are deduplicated through this sqlite file instead of the triplestore
+# (set it to None to query the triplestore):
+citations_index_path = '<path>/citations_folder/citations_index.db'
 
 # TRIPLESTORE and OC_OCDM
 base_iri = "https://w3id.org/oc/meta/"
-triplestore_url = "http://localhost:9999/blazegraph/sparql"
+triplestore_url = "http://localhost:9999/blazegraph/sparql"  # or "local:<path>/meta_folder/triplestore.nq"
+triplestore_latency = 0.0  # seconds waited before each request to a "local:" triplestore
 query_timeout = 3  # seconds
+citations_lookup_batch_size = 500  # (citing, cited) couples checked by each SPARQL query
 context_path = "https://w3id.org/oc/corpus/context.json"
 info_dir = "<path>/meta_folder/info_dir/"
 dir_split_number = 10000  # This must be multiple of the following one
@@ -0,0 +1,227 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021, Simone Persiani <iosonopersia@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""
+Benchmark of the phases of the meta workflow (see run_process.py): Curator, Creator, provenance generation
+(ProvSet), serialization of the RDF files (Storer) and upload to the triplestore. It must be launched as follows:
+
+    cd <path>/Converter
+    python -m meta.benchmark --rows 1000 10000 --authors 3 --duplicates 0.1 --output benchmark.json
+
+Input rows are synthetic (see 'generate_rows') and each run starts from scratch: an empty in-memory triplestore
+(see meta/lib/triplestore.py, whose latency can be set with '--latency') and empty counters inside a temporary
+folder. For each number of rows, the time of each phase is measured '--repeat' times; then, an additional run
+traces the memory allocations (unless '--no-memory' is given), so that the peak of the memory allocated during
+each phase can be reported without slowing down the timed runs. Results are printed (or stored) as JSON.
+"""
+
+import csv
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from contextlib import contextmanager
+
+from oc_ocdm import Storer
+from oc_ocdm.prov import ProvSet
+
+from meta.lib.conf import base_iri, context_path
+from meta.lib.row import Row
+from meta.lib.triplestore import LocalTriplestore
+from meta.scripts.creator import Creator
+from meta.scripts.curator import Curator
+
+fieldnames = ["id", "title", "author", "pub_date", "venue", "volume", "issue", "page", "type", "publisher", "editor"]
+phases = ["curator", "creator", "provenance", "storer", "upload"]
+
+
+def generate_rows(num_rows, authors_per_row=3, duplicate_ratio=0.1, seed=0):
+    """It returns 'num_rows' synthetic rows shaped as the CSV files processed by meta. Each row has
+    'authors_per_row' authors, drawn from a pool which is half as big as the total number of authors
+    (so that agents are shared amongst rows), and a venue drawn from a pool of 'num_rows / 20' journals.
+    A 'duplicate_ratio' fraction of the rows describes a resource which was already described by a
+    previous row (same DOI, plus a new PMID), so that the Curator has to merge them."""
+    rng = random.Random(seed)
+    authors_pool = max(1, num_rows * authors_per_row // 2)
+    venues_pool = max(1, num_rows // 20)
+    rows = list()
+    for n in range(num_rows):
+        if rows and rng.random() < duplicate_ratio:
+            original = rng.choice(rows)
+            ids = original["id"].split(" ")[0] + " pmid:%d" % n
+            title = original["title"].upper()
+        else:
+            ids = "doi:10.%d/bench.%d" % (1000 + n % 9000, n)
+            title = "Synthetic title number %d" % n
+
+        authors = list()
+        for k in rng.sample(range(authors_pool), min(authors_per_row, authors_pool)):
+            orcid = "0000-%04d-%04d-%04d" % (k // 10 ** 8 % 10 ** 4, k // 10 ** 4 % 10 ** 4, k % 10 ** 4)
+            authors.append("Surname%d, Name%d [orcid:%s]" % (k, k, orcid))
+        venue = rng.randrange(venues_pool)
+        publisher = venue % 50
+        rows.append({
+            "id": ids,
+            "title": title,
+            "author": "; ".join(authors),
+            "pub_date": "%d-%02d-%02d" % (rng.randint(1990, 2021), rng.randint(1, 12), rng.randint(1, 28)),
+            "venue": "Journal %d [issn:%04d-%04d]" % (venue, venue // 10 ** 4 % 10 ** 4, venue % 10 ** 4),
+            "volume": str(rng.randint(1, 20)),
+            "issue": str(rng.randint(1, 4)),
+            "page": "%d-%d" % (n % 1000 + 1, n % 1000 + 10),
+            "type": "journal article",
+            "publisher": "Publisher %d [crossref:%d]" % (publisher, publisher),
+            "editor": ""
+        })
+    return rows
+
+
+def write_rows(rows, path):
+    """It stores the given rows inside a CSV file which can be used as an input of run_process.py."""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+class PhaseRecorder(object):
+    """It measures the elapsed time (and, when 'trace_memory' is True, the peak of the memory
+    allocated by Python during the phase, in bytes) of each phase delimited by the 'phase' context manager.
+    Memory is traced from the start of each phase: what was allocated before isn't counted."""
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.seconds = dict()
+        self.peak_memory = dict()
+
+    @contextmanager
+    def phase(self, name):
+        if self.trace_memory:
+            # Tracing is restarted rather than calling 'tracemalloc.reset_peak', which needs Python 3.9
+            tracemalloc.start()
+        try:
+            start = time.perf_counter()
+            yield
+            self.seconds[name] = time.perf_counter() - start
+            if self.trace_memory:
+                self.peak_memory[name] = tracemalloc.get_traced_memory()[1]
+        finally:
+            if self.trace_memory:
+                tracemalloc.stop()
+
+
+def run_phases(rows, work_dir, recorder, latency=0.0):
+    info_dir = os.path.join(work_dir, "info_dir")
+    curator_info_dir = os.path.join(info_dir, "curator" + os.sep)
+    creator_info_dir = os.path.join(info_dir, "creator" + os.sep)
+    triplestore = LocalTriplestore(latency=latency)
+
+    with recorder.phase("curator"):
+        curator = Curator(rows, triplestore, info_dir=curator_info_dir)
+        curator.curator(filename="benchmark", path_csv=os.path.join(work_dir, "csv"),
+                        path_index=os.path.join(work_dir, "index"))
+
+    with recorder.phase("creator"):
+        creator = Creator(curator.data, base_iri, creator_info_dir, "", curator.index_id_ra, curator.index_id_br,
+                          curator.re_index, curator.ar_index, curator.VolIss).creator()
+
+    with recorder.phase("provenance"):
+        prov = ProvSet(creator, base_iri, creator_info_dir, wanted_label=False)
+        prov.generate_provenance()
+
+    with recorder.phase("storer"):
+        res_storer = Storer(creator, context_map={}, output_format="nt11")
+        res_storer.store_graphs_in_file(os.path.join(work_dir, "rdf", "benchmark.nt"), context_path)
+        prov_storer = Storer(prov, context_map={}, output_format="nquads")
+        prov_storer.store_graphs_in_file(os.path.join(work_dir, "rdf", "prov", "benchmark.nq"), context_path)
+
+    with recorder.phase("upload"):
+        triplestore.upload(res_storer, batch_size=100)
+
+
+def benchmark(num_rows, authors_per_row=3, duplicate_ratio=0.1, seed=0, repeat=1, latency=0.0, memory=True):
+    """It returns the results (a JSON serializable dictionary) of the benchmark of 'num_rows' synthetic rows."""
+    rows = generate_rows(num_rows, authors_per_row, duplicate_ratio, seed)
+
+    runs = list()
+    for _ in range(max(1, repeat)):
+        recorder = PhaseRecorder()
+        with tempfile.TemporaryDirectory() as work_dir:
+            os.makedirs(os.path.join(work_dir, "rdf", "prov"))
+            run_phases([Row(row) for row in rows], work_dir, recorder, latency)
+        runs.append(recorder.seconds)
+
+    result = {"rows": num_rows, "phases": dict()}
+    for name in phases:
+        seconds = [run[name] for run in runs]
+        result["phases"][name] = {"seconds": seconds, "best_seconds": min(seconds)}
+    result["best_total_seconds"] = sum(result["phases"][name]["best_seconds"] for name in phases)
+
+    if memory:
+        recorder = PhaseRecorder(trace_memory=True)
+        with tempfile.TemporaryDirectory() as work_dir:
+            os.makedirs(os.path.join(work_dir, "rdf", "prov"))
+            run_phases([Row(row) for row in rows], work_dir, recorder, latency)
+        for name in phases:
+            result["phases"][name]["peak_memory_bytes"] = recorder.peak_memory[name]
+    return result
+
+
+if __name__ == "__main__":
+    arg_parser = ArgumentParser("benchmark.py", description="This script benchmarks the phases of the meta workflow")
+    arg_parser.add_argument("-r", "--rows", dest="rows", type=int, nargs="+", default=[1000],
+                            help="Number of synthetic rows (many values can be given, e.g. 1000 10000 100000)")
+    arg_parser.add_argument("-a", "--authors", dest="authors", type=int, default=3,
+                            help="Number of authors of each row")
+    arg_parser.add_argument("-d", "--duplicates", dest="duplicates", type=float, default=0.1,
+                            help="Ratio of rows which duplicate a previous one")
+    arg_parser.add_argument("-n", "--repeat", dest="repeat", type=int, default=1,
+                            help="How many times each phase is timed")
+    arg_parser.add_argument("-l", "--latency", dest="latency", type=float, default=0.0,
+                            help="Seconds waited before each request to the triplestore")
+    arg_parser.add_argument("-s", "--seed", dest="seed", type=int, default=0,
+                            help="Seed of the generator of synthetic rows")
+    arg_parser.add_argument("--no-memory", dest="memory", action="store_false",
+                            help="Do not measure the peak memory of each phase")
+    arg_parser.add_argument("-o", "--output", dest="output", required=False,
+                            help="JSON file where results will be stored (they're printed otherwise)")
+    arg_parser.add_argument("-c", "--csv", dest="csv_dir", required=False,
+                            help="Directory where the synthetic rows are also stored as CSV files (e.g. to be "
+                                 "processed by run_process.py), one for each number of rows")
+    args = arg_parser.parse_args()
+
+    if args.csv_dir:
+        os.makedirs(args.csv_dir, exist_ok=True)
+        for num_rows in args.rows:
+            write_rows(generate_rows(num_rows, args.authors, args.duplicates, args.seed),
+                       os.path.join(args.csv_dir, "synthetic_%d.csv" % num_rows))
+
+    report = {
+        "settings": vars(args),
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "results": [benchmark(num_rows, args.authors, args.duplicates, args.seed, args.repeat, args.latency,
+                              args.memory) for num_rows in args.rows]
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
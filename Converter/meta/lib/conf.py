@@ -17,7 +17,7 @@
 # Official configuration
 base_dir = "<path>/meta_folder/rdf_output/"
 base_iri = "https://w3id.org/oc/meta/"
-triplestore_url = "http://localhost:9999/blazegraph/sparql"
+triplestore_url = "http://localhost:9999/blazegraph/sparql"  # or "local:<path>/meta_folder/triplestore.nq"
 context_path = "https://w3id.org/oc/corpus/context.json"
 info_dir = "<path>/meta_folder/info_dir/"
 dir_split_number = 10000  # This must be multiple of the following one
@@ -28,3 +28,5 @@ supplier_prefix = ""
 # New configuration
 resp_agent = "https://w3id.org/oc/meta/prov/pa/1"
 rdf_output_in_chunks = True
+triplestore_latency = 0.0  # seconds waited before each request to a "local:" triplestore
+pipelined_storage = False  # store the RDF files of each CSV file while the following one is processed
@@ -0,0 +1,92 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021, Simone Persiani <iosonopersia@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+import os
+
+
+class CounterAllocator(object):
+    """This class hands out increasing numbers from a counter stored inside a text file
+    (the number is stored at the given line of the file and it is the last number that
+    was handed out).
+
+    Numbers are reserved in blocks: whenever the current block is exhausted, the end of
+    a new block is written to the file and all the numbers of the block are then handed
+    out from memory, without touching the file. Calling 'flush' writes back the last number
+    that was actually handed out, so that the unused part of the block is released.
+
+    Every write is atomic (a temporary file is written and then renamed over the counter
+    file): the file always contains either the previous or the new value. If the process
+    crashes before calling 'flush', the file still contains the end of the reserved block,
+    so that the next allocator starts after it: some numbers get skipped, but none of them
+    can be handed out twice."""
+
+    def __init__(self, file_path, line_number=1, block_size=1000):
+        if block_size < 1:
+            raise ValueError("block_size must be a positive integer")
+        self.file_path = file_path
+        self.line_number = line_number
+        self.block_size = block_size
+
+        # Nothing is read until the first number is requested:
+        self.current = None
+        self.reserved = None
+
+    def _read_lines(self):
+        try:
+            with open(self.file_path) as f:
+                return f.readlines()
+        except IOError:
+            return []
+
+    def _read_number(self, lines):
+        try:
+            return int(lines[self.line_number - 1])
+        except (ValueError, IndexError):
+            return 0
+
+    def _write_number(self, number):
+        lines = self._read_lines()
+        while len(lines) < self.line_number:
+            lines.append("\n")
+        lines[self.line_number - 1] = str(number) + "\n"
+
+        dir_path = os.path.dirname(self.file_path)
+        if dir_path and not os.path.exists(dir_path):
+            os.makedirs(dir_path)
+        tmp_path = self.file_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.file_path)
+
+    def next(self):
+        if self.current is None:
+            self.current = self._read_number(self._read_lines())
+            self.reserved = self.current
+
+        if self.current >= self.reserved:
+            # The end of the block is stored before any of its numbers is handed out:
+            self.reserved = self.current + self.block_size
+            self._write_number(self.reserved)
+
+        self.current += 1
+        return self.current
+
+    def flush(self):
+        if self.current is not None and self.reserved != self.current:
+            self._write_number(self.current)
+            self.reserved = self.current
@@ -14,10 +14,11 @@
 # ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
 # SOFTWARE.
 
-from csv import DictReader
+from csv import DictReader, reader
 from io import StringIO
 from os.path import exists, isdir
-from os import walk, sep
+from os import walk, sep, getpid
+import sqlite3
 
 
 class CSVManager(object):
@@ -96,20 +97,31 @@ class CSVManager(object):
         """It adds the value specified in the set of values associated to 'id_string'.
         If the object was created with the option of storing also the data in a CSV
         ('store_new' = True, default behaviour), then it also add new data in the CSV."""
-        if id_string not in self.data:
-            self.data[id_string] = set()
+        self.add_values([(id_string, value)])
 
-        if value not in self.data[id_string]:
-            self.data[id_string].add(value)
+    def add_values(self, pairs):
+        """It adds each ('id_string', 'value') pair of the given iterable, as 'add_value'
+        does, but all the new values are appended to the CSV at once."""
+        new_lines = []
+        for id_string, value in pairs:
+            if id_string not in self.data:
+                self.data[id_string] = set()
 
-            if self.csv_path is not None and self.store_new:
-                if not exists(self.csv_path):
-                    with open(self.csv_path, "w") as f:
-                        f.write('"id","value"\n')
+            if value not in self.data[id_string]:
+                self.data[id_string].add(value)
+                new_lines.append('"%s","%s"\n' % (id_string.replace('"', '""'), value.replace('"', '""')))
 
-                with open(self.csv_path, "a") as f:
-                    f.write('"%s","%s"\n' % (id_string.replace('"', '""'),
-                                             value.replace('"', '""')))
+        if new_lines and self.csv_path is not None and self.store_new:
+            if not exists(self.csv_path):
+                with open(self.csv_path, "w", encoding="utf-8") as f:
+                    f.write('"id","value"\n')
+
+            with open(self.csv_path, "a", encoding="utf-8") as f:
+                f.writelines(new_lines)
+
+    def flush(self):
+        """New values are written in the CSV as soon as they're added: there's nothing to flush."""
+        pass
 
     def __load_csv(self, csv_string):
         csv_metadata = DictReader(StringIO(csv_string), delimiter=',')
@@ -119,3 +131,109 @@ class CSVManager(object):
                 self.data[cur_id] = set()
 
             self.data[cur_id].add(row["value"])
+
+
+class SQLiteManager(object):
+    """This class offers the same interface of CSVManager ('get_value' and 'add_value'), but the 'id'/'value'
+    pairs are stored in an SQLite database, sorted by 'id' (a table without rowid, i.e. a B-tree of the
+    pairs). Nothing is loaded in memory: opening the database takes no time, regardless of its size, and
+    each lookup only reads a few pages of the database file.
+
+    New values are written inside a transaction, which is committed every 'commit_threshold' new values
+    (they're visible to 'get_value' in the meantime): 'flush' (or 'close') must be called after the last
+    one. The database uses a write-ahead log, so it can be read by other processes while it is written.
+    An existing CSV file can be imported with 'load_csv'.
+
+    The parameters of CSVManager are accepted too, so that 'get_csv_manager' can pass them to either class:
+    'line_threshold' is ignored (nothing is loaded in memory), while with 'store_new' set to False the new
+    values are never committed (they're only visible to 'get_value' until the database is closed)."""
+
+    def __init__(self, db_path, commit_threshold=10000, line_threshold=None, store_new=True):
+        self.db_path = db_path
+        self.commit_threshold = commit_threshold
+        self.store_new = store_new
+        self.pending = 0
+        self.connection = None
+        self.pid = None
+
+    def __connect(self):
+        # A connection can't be used across a fork: forked processes (e.g. workers sharing this
+        # object) open their own connection the first time they use it
+        if self.connection is None or self.pid != getpid():
+            if self.connection is not None:
+                # The connection of the parent process must not even be closed here
+                _inherited_connections.append(self.connection)
+            self.connection = sqlite3.connect(self.db_path)
+            self.pid = getpid()
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS data (id TEXT NOT NULL, value TEXT NOT NULL, "
+                                    "PRIMARY KEY (id, value)) WITHOUT ROWID")
+            self.connection.commit()
+        return self.connection
+
+    def get_value(self, id_string):
+        """It returns the set of values associated to the input 'id_string',
+        or None if 'id_string' is not included in the database."""
+        result = {value for value, in self.__connect().execute("SELECT value FROM data WHERE id = ?", (id_string,))}
+        if result:
+            return result
+
+    def add_value(self, id_string, value):
+        """It adds the value specified in the set of values associated to 'id_string'."""
+        self.add_values([(id_string, value)])
+
+    def add_values(self, pairs):
+        """It adds each ('id_string', 'value') pair of the given iterable."""
+        connection = self.__connect()
+        changes = connection.total_changes
+        connection.executemany("INSERT OR IGNORE INTO data (id, value) VALUES (?, ?)", pairs)
+        self.pending += connection.total_changes - changes
+        if self.pending >= self.commit_threshold:
+            self.flush()
+
+    def load_csv(self, csv_path):
+        """It adds all the 'id'/'value' pairs of the given CSV file (as written by CSVManager)."""
+        with open(csv_path, encoding="utf-8", newline="") as f:
+            rows = reader(f)
+            header = next(rows, [])
+            if header:
+                id_idx, value_idx = header.index("id"), header.index("value")
+                self.add_values((row[id_idx], row[value_idx]) for row in rows)
+        self.flush()
+
+    def flush(self):
+        """It commits the values added since the last commit (unless 'store_new' is False)."""
+        if self.store_new and self.connection is not None and self.pid == getpid():
+            self.connection.commit()
+        self.pending = 0
+
+    def close(self):
+        self.flush()
+        if self.connection is not None and self.pid == getpid():
+            self.connection.close()
+        self.connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+sqlite_suffixes = (".db", ".sqlite")
+# The connections a forked process inherited from its parent (see 'SQLiteManager.__connect'). They're kept
+# here so that they're never garbage collected: closing one of them would act on the database file shared with
+# the parent (e.g. checkpointing and removing its write-ahead log). They're never used: the list grows by one
+# connection per SQLiteManager per forked process at most, and the process exits without closing them (forked
+# workers end with 'os._exit'), so keeping them alive costs nothing but their memory.
+_inherited_connections = []
+
+
+def get_csv_manager(path, **params):
+    """It returns the storage of the 'id'/'value' pairs stored at 'path': an SQLiteManager if 'path' ends
+    with '.db' or '.sqlite', a CSVManager otherwise (the other parameters are passed to the constructor)."""
+    if path is not None and path.endswith(sqlite_suffixes):
+        return SQLiteManager(path, **params)
+    else:
+        return CSVManager(path, **params)
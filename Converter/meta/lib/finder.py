@@ -1,46 +1,187 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from oc_ocdm.graph import GraphEntity
-from pymantic import sparql
+from meta.lib.triplestore import get_triplestore
 
 
-class ResourceFinder:
+class LRUCache(object):
+    """A dictionary-like container which holds up to 'maxsize' items: when it's full,
+    the least recently used item is discarded to make room for the new one."""
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, key):
+        value = self.data[key]
+        self.data.move_to_end(key)
+        return value
 
-    def __init__(self, ts_url):
-        self.ts = sparql.SPARQLServer(ts_url)
+    def __setitem__(self, key, value):
+        self.data[key] = value
+        self.data.move_to_end(key)
+        if len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    def clear(self):
+        self.data.clear()
+
+
+class ResourceFinder:
+    """Every lookup is answered by a SPARQL query whose VALUES clause can hold many keys at once
+    (identifiers or meta ids). The bindings found for each key (if any) are kept inside an LRU cache:
+    the 'prefetch_*' methods resolve whole lists of keys with 'batch_size' keys per query, so that the
+    following 'retrieve_*' calls are served from the cache. The cache must be cleared ('invalidate')
+    whenever new data is uploaded to the triplestore. Up to 'workers' queries are run concurrently."""
+
+    base_iri = "https://w3id.org/oc/meta/"
+    roles = {"author": GraphEntity.iri_author, "editor": GraphEntity.iri_editor,
+             "publisher": GraphEntity.iri_publisher}
+
+    def __init__(self, ts_url, batch_size=100, cache_size=100000, workers=4):
+        # 'ts_url' is either the URL of the triplestore (see 'get_triplestore') or a Triplestore instance
+        self.ts = get_triplestore(ts_url)
+        self.batch_size = batch_size
+        self.cache = LRUCache(cache_size)
+        self.workers = workers
 
     def __query(self, query):
         result = self.ts.query(query)
         return result
 
-    # _______________________________BR_________________________________ #
+    def invalidate(self):
+        self.cache.clear()
 
-    def retrieve_br_from_id(self, value, schema):
-        schema = GraphEntity.DATACITE + schema
-        query = """
-                SELECT DISTINCT ?res (group_concat(DISTINCT  ?title;separator=' ;and; ') as ?title_)
-                    (group_concat(DISTINCT  ?id;separator=' ;and; ') as ?id_)
-                    (group_concat(?schema;separator=' ;and; ') as ?schema_)
-                    (group_concat(DISTINCT  ?value;separator=' ;and; ') as ?value_)
-                WHERE {
-                    ?res a <%s>.
-                    OPTIONAL {?res <%s> ?title.}
-                    ?res <%s> ?id.
-                    ?id <%s> ?schema.
-                    ?id  <%s> ?value.
-                    ?res <%s> ?knownId.
-                    ?knownId <%s> <%s>.
-                    ?knownId <%s> ?knownValue.
-                    filter(?knownValue = "%s")
-                } group by ?res
+    @staticmethod
+    def __literal(value):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n").replace("\r", "\\r")
+        return '"' + value + '"'
+
+    def __values(self, kind, keys):
+        # key variables and VALUES rows of the query which looks up 'keys'
+        if kind in {"br_id", "ra_id", "id"}:
+            rows = ["(<%s> %s)" % (GraphEntity.DATACITE + schema, self.__literal(value)) for schema, value in keys]
+            return "?knownSchema ?knownValue", "VALUES (?knownSchema ?knownValue) {%s}" % " ".join(rows)
+        elif kind == "ra_seq":
+            rows = ["(<%s> <%s>)" % (self.base_iri + "br/" + meta, self.roles[col_name]) for meta, col_name in keys]
+            return "?res ?roleType", "VALUES (?res ?roleType) {%s}" % " ".join(rows)
+        elif kind == "vvi":
+            rows = ["<%s>" % (self.base_iri + "br/" + meta) for meta in keys]
+            return "?container", "VALUES ?container {%s}" % " ".join(rows)
+        else:
+            prefix = self.base_iri + ("ra/" if kind == "ra" else "br/")
+            rows = ["<%s>" % (prefix + meta) for meta in keys]
+            return "?res", "VALUES ?res {%s}" % " ".join(rows)
+
+    def __key(self, kind, binding):
+        # inverse of '__values': the key a result row refers to
+        if kind in {"br_id", "ra_id", "id"}:
+            return binding["knownSchema"]["value"].replace(GraphEntity.DATACITE, ""), binding["knownValue"]["value"]
+        elif kind == "ra_seq":
+            col_name = [x for x in self.roles if str(self.roles[x]) == binding["roleType"]["value"]][0]
+            return binding["res"]["value"].replace(self.base_iri + "br/", ""), col_name
+        elif kind == "vvi":
+            return binding["container"]["value"].replace(self.base_iri + "br/", "")
+        else:
+            return binding["res"]["value"].replace(self.base_iri + ("ra/" if kind == "ra" else "br/"), "")
+
+    def __bindings(self, kind, keys):
+        """
+        It returns a dictionary which associates each key to the list of result rows found for it.
+        Only the keys which aren't cached are looked up in the triplestore, 'batch_size' at a time:
+        queries are run concurrently, while the cache is only updated by the calling thread.
+        """
+        results = dict()
+        pending = dict()
+        for key in keys:
+            if key in results:
+                continue
+            if (kind, key) in self.cache:
+                results[key] = self.cache[(kind, key)]
+            else:
+                results[key] = pending[key] = list()
+        missing = list(pending)
 
-                """ % (GraphEntity.iri_expression, GraphEntity.iri_title, GraphEntity.iri_has_identifier,
-                       GraphEntity.iri_uses_identifier_scheme, GraphEntity.iri_has_literal_value,
-                       GraphEntity.iri_has_identifier, GraphEntity.iri_uses_identifier_scheme, schema,
-                       GraphEntity.iri_has_literal_value, value)
-        results = self.__query(query)
+        queries = list()
+        for i in range(0, len(missing), self.batch_size):
+            key_vars, values = self.__values(kind, missing[i:i + self.batch_size])
+            queries.append(self.__queries[kind] % {"keys": key_vars, "values": values})
+
+        if len(queries) > 1 and self.workers > 1:
+            with ThreadPoolExecutor(min(self.workers, len(queries))) as executor:
+                answers = list(executor.map(self.__query, queries))
+        else:
+            answers = [self.__query(query) for query in queries]
+
+        for answer in answers:
+            for binding in answer["results"]["bindings"]:
+                key = self.__key(kind, binding)
+                if key in pending:
+                    pending[key].append(binding)
+        for key in missing:
+            self.cache[(kind, key)] = results[key]
+        return results
+
+    # _______________________________PREFETCH_________________________________ #
+
+    @staticmethod
+    def __split(identifiers):
+        # identifiers are strings like "doi:10.1108/jd-12-2013-0166" (see Curator.finder_sparql)
+        keys = list()
+        for identifier in identifiers:
+            schema, value = identifier.split(":", 1)
+            keys.append((schema, value))
+        return keys
+
+    def prefetch_br_from_id(self, identifiers):
+        self.__bindings("br_id", self.__split(identifiers))
+
+    def prefetch_ra_from_id(self, identifiers):
+        self.__bindings("ra_id", self.__split(identifiers))
+
+    def prefetch_id(self, identifiers):
+        self.__bindings("id", self.__split(identifiers))
+
+    def prefetch_br_from_meta(self, meta_ids):
+        self.__bindings("br", [str(x) for x in meta_ids])
+
+    def prefetch_ra_from_meta(self, meta_ids):
+        self.__bindings("ra", [str(x) for x in meta_ids])
+
+    def prefetch_re_from_meta(self, meta_ids):
+        self.__bindings("re", [str(x) for x in meta_ids])
+
+    def prefetch_br_info_from_meta(self, meta_ids):
+        self.__bindings("br_info", [str(x) for x in meta_ids])
+        self.__bindings("re", [str(x) for x in meta_ids])
+
+    def prefetch_venue_from_meta(self, meta_ids):
+        results = self.__bindings("vvi", [str(x) for x in meta_ids])
+        # the issues of the volumes too (see 'retrieve_vvi')
+        volumes = [volume for rows in results.values() for volume in self.__volumes(rows)]
+        if volumes:
+            self.__bindings("vvi", volumes)
+
+    def prefetch_ra_sequence_from_meta(self, meta_ids, col_name):
+        if col_name not in {"author", "editor"}:
+            col_name = "publisher"
+        results = self.__bindings("ra_seq", [(str(x), col_name) for x in meta_ids])
+        agents = [str(x["agent"]["value"]).replace(self.base_iri + "ra/", "") for y in results.values() for x in y]
+        self.__bindings("ra", agents)
+
+    # _______________________________BR_________________________________ #
 
-        if len(results["results"]["bindings"]):
+    def retrieve_br_from_id(self, value, schema):
+        results = self.__bindings("br_id", [(schema, value)])[(schema, value)]
+        if len(results):
             result_list = list()
-            for result in results["results"]["bindings"]:
+            for result in results:
                 res = str(result["res"]["value"]).replace("https://w3id.org/oc/meta/br/", "")
                 title = str(result["title_"]["value"])
                 meta_id_list = str(result["id_"]["value"]).replace("https://w3id.org/oc/meta/id/", "").split(" ;and; ")
@@ -59,27 +200,9 @@ class ResourceFinder:
             return None
 
     def retrieve_br_from_meta(self, meta_id):
-        uri = "https://w3id.org/oc/meta/br/" + str(meta_id)
-        query = """
-                SELECT DISTINCT ?res (group_concat(DISTINCT  ?title;separator=' ;and; ') as ?title_)
-                     (group_concat(DISTINCT  ?id;separator=' ;and; ') as ?id_)
-                     (group_concat(?schema;separator=' ;and; ') as ?schema_)
-                     (group_concat(DISTINCT  ?value;separator=' ;and; ') as ?value_)
-
-                WHERE {
-                    ?res a <%s>.
-                    OPTIONAL {?res <%s> ?title.}
-                    OPTIONAL {?res <%s> ?id.
-                        ?id <%s> ?schema.
-                        ?id  <%s> ?value.}
-                    filter(?res = <%s>)
-                } group by ?res
-
-                """ % (GraphEntity.iri_expression, GraphEntity.iri_title, GraphEntity.iri_has_identifier,
-                       GraphEntity.iri_uses_identifier_scheme, GraphEntity.iri_has_literal_value, uri)
-        result = self.__query(query)
-        if result["results"]["bindings"]:
-            result = result["results"]["bindings"][0]
+        results = self.__bindings("br", [str(meta_id)])[str(meta_id)]
+        if results:
+            result = results[0]
             title = str(result["title_"]["value"])
             meta_id_list = str(result["id_"]["value"]).replace("https://w3id.org/oc/meta/id/", "").split(" ;and; ")
             id_schema_list = str(result["schema_"]["value"]).replace(GraphEntity.DATACITE, "").split(" ;and; ")
@@ -99,56 +222,17 @@ class ResourceFinder:
     # _______________________________ID_________________________________ #
 
     def retrieve_id(self, value, schema):
-        schema = GraphEntity.DATACITE + schema
-
-        query = """
-                        SELECT DISTINCT ?res 
-
-
-                        WHERE {
-                            ?res a <%s>.
-                            ?res <%s> <%s>.
-                            ?res <%s> ?knownValue.
-                            filter(?knownValue = "%s")
-                        } group by ?res
-
-                        """ % (GraphEntity.iri_identifier, GraphEntity.iri_uses_identifier_scheme, schema,
-                               GraphEntity.iri_has_literal_value, value)
-
-        result = self.__query(query)
-        if result["results"]["bindings"]:
-            return str(result["res"]["value"]).replace("https://w3id.org/oc/meta/id/", "")
+        results = self.__bindings("id", [(schema, value)])[(schema, value)]
+        if results:
+            return str(results[0]["res"]["value"]).replace("https://w3id.org/oc/meta/id/", "")
         else:
             return None
 
     # _______________________________RA_________________________________ #
     def retrieve_ra_from_meta(self, meta_id, publisher=False):
-        uri = "https://w3id.org/oc/meta/ra/" + str(meta_id)
-        query = """
-                        SELECT DISTINCT ?res (group_concat(DISTINCT  ?title;separator=' ;and; ') as ?title_)
-                             (group_concat(DISTINCT  ?name;separator=' ;and; ') as ?name_)
-                             (group_concat(DISTINCT  ?surname;separator=' ;and; ') as ?surname_)
-                             (group_concat(DISTINCT  ?id;separator=' ;and; ') as ?id_)
-                             (group_concat(?schema;separator=' ;and; ') as ?schema_)
-                             (group_concat(DISTINCT  ?value;separator=' ;and; ') as ?value_)
-
-                        WHERE {
-                            ?res a <%s>.
-                            OPTIONAL {?res <%s> ?name.}
-                            OPTIONAL {?res <%s> ?surname.}
-                            OPTIONAL {?res <%s> ?title.}
-                            OPTIONAL {?res <%s> ?id.
-                                ?id <%s> ?schema.
-                                ?id  <%s> ?value.}
-                            filter(?res = <%s>)
-                        } group by ?res
-
-                        """ % (GraphEntity.iri_agent, GraphEntity.iri_given_name, GraphEntity.iri_family_name,
-                               GraphEntity.iri_name, GraphEntity.iri_has_identifier,
-                               GraphEntity.iri_uses_identifier_scheme, GraphEntity.iri_has_literal_value, uri)
-        result = self.__query(query)
-        if result["results"]["bindings"]:
-            result = result["results"]["bindings"][0]
+        results = self.__bindings("ra", [str(meta_id)])[str(meta_id)]
+        if results:
+            result = results[0]
             if str(result["title_"]["value"]) and publisher:
                 title = str(result["title_"]["value"])
             elif str(result["surname_"]["value"]) and not publisher:
@@ -172,41 +256,10 @@ class ResourceFinder:
             return None
 
     def retrieve_ra_from_id(self, value, schema, publisher):
-        schema = GraphEntity.DATACITE + schema
-
-        query = """
-                SELECT DISTINCT ?res
-                    (group_concat(DISTINCT  ?title;separator=' ;and; ') as ?title_)
-                     (group_concat(DISTINCT  ?name;separator=' ;and; ') as ?name_)
-                     (group_concat(DISTINCT  ?surname;separator=' ;and; ') as ?surname_)
-                     (group_concat(DISTINCT  ?id;separator=' ;and; ') as ?id_)
-                     (group_concat(?schema;separator=' ;and; ') as ?schema_)
-                     (group_concat(DISTINCT  ?value;separator=' ;and; ') as ?value_)
-
-                WHERE {
-                    ?res a <%s>.
-                    OPTIONAL {?res <%s> ?name. }
-                    OPTIONAL {?res <%s> ?surname.}
-                    OPTIONAL {?res <%s> ?title.}
-                    ?res <%s> ?id.
-                    ?id <%s> ?schema.
-                    ?id  <%s> ?value.
-                    ?res <%s> ?knownId.
-                    ?knownId <%s> <%s>.
-                    ?knownId <%s> ?knownValue.
-                    filter(?knownValue = "%s")
-                } group by ?res
-
-                """ % (GraphEntity.iri_agent, GraphEntity.iri_given_name, GraphEntity.iri_family_name,
-                       GraphEntity.iri_name, GraphEntity.iri_has_identifier, GraphEntity.iri_uses_identifier_scheme,
-                       GraphEntity.iri_has_literal_value, GraphEntity.iri_has_identifier,
-                       GraphEntity.iri_uses_identifier_scheme, schema, GraphEntity.iri_has_literal_value, value)
-
-        results = self.__query(query)
-
-        if len(results["results"]["bindings"]):
+        results = self.__bindings("ra_id", [(schema, value)])[(schema, value)]
+        if len(results):
             result_list = list()
-            for result in results["results"]["bindings"]:
+            for result in results:
                 res = str(result["res"]["value"]).replace("https://w3id.org/oc/meta/ra/", "")
                 if str(result["title_"]["value"]) and publisher:
                     title = str(result["title_"]["value"])
@@ -240,29 +293,19 @@ class ResourceFinder:
         return content
 
     def retrieve_vvi(self, meta, content):
-        query = """
-                SELECT DISTINCT ?res 
-                    (group_concat(DISTINCT  ?type;separator=' ;and; ') as ?type_)
-                    (group_concat(DISTINCT  ?title;separator=' ;and; ') as ?title_)
-
-                WHERE {
-                    ?res <%s> <%s>.
-                    ?res a ?type.
-                    ?res <%s> ?title.
-                } group by ?res
-
-                """ % (GraphEntity.iri_part_of, "https://w3id.org/oc/meta/br/" + str(meta),
-                       GraphEntity.iri_has_sequence_identifier)
-        result = self.__query(query)
-        if result["results"]["bindings"]:
-            results = result["results"]["bindings"]
+        # 'content' is None when looking up the issues of a volume
+        issues_only = content is None
+        results = self.__bindings("vvi", [str(meta)])[str(meta)]
+        if results:
+            # all the issues of the volumes are looked up at once:
+            self.prefetch_venue_from_meta(self.__volumes(results))
             for x in results:
                 res = str(x["res"]["value"]).replace("https://w3id.org/oc/meta/br/", "")
                 title = str(x["title_"]["value"])
                 types = str(x["type_"]["value"]).split(" ;and; ")
 
                 for t in types:
-                    if content:
+                    if not issues_only:
                         if str(t) == str(GraphEntity.FABIO.JournalIssue):
                             content["issue"][title] = res
 
@@ -273,38 +316,22 @@ class ResourceFinder:
                             content["volume"][title]["issue"] = self.retrieve_vvi(res, None)
                     else:
                         if str(t) == str(GraphEntity.FABIO.JournalIssue):
-                            content = dict()
+                            if content is None:
+                                content = dict()
                             content[title] = dict()
                             content[title]['id'] = res
         return content
 
-    def retrieve_ra_sequence_from_meta(self, meta_id, col_name):
-        if col_name == "author":
-            role = GraphEntity.iri_author
-        elif col_name == "editor":
-            role = GraphEntity.iri_editor
-        else:
-            role = GraphEntity.iri_publisher
-        uri = "https://w3id.org/oc/meta/br/" + str(meta_id)
-        query = """
-                SELECT DISTINCT ?role ?next ?agent
-
-                WHERE {
-                    ?res a <%s>.
-                    ?res <%s> ?role.
-                    ?role a <%s>.
-                    ?role <%s> <%s>.
-                    OPTIONAL {?role <%s> ?next.}
-                    ?role <%s> ?agent.
-                    filter(?res = <%s>)
-                } 
+    @staticmethod
+    def __volumes(results):
+        return [str(x["res"]["value"]).replace("https://w3id.org/oc/meta/br/", "") for x in results
+                if str(GraphEntity.FABIO.JournalVolume) in str(x["type_"]["value"]).split(" ;and; ")]
 
-                """ % (GraphEntity.iri_expression, GraphEntity.iri_is_document_context_for,
-                       GraphEntity.iri_role_in_time, GraphEntity.iri_with_role, role, GraphEntity.iri_has_next,
-                       GraphEntity.iri_is_held_by, uri)
-        result = self.__query(query)
-        if result["results"]["bindings"]:
-            results = result["results"]["bindings"]
+    def retrieve_ra_sequence_from_meta(self, meta_id, col_name):
+        if col_name not in {"author", "editor"}:
+            col_name = "publisher"
+        results = self.__bindings("ra_seq", [(str(meta_id), col_name)])[(str(meta_id), col_name)]
+        if results:
             dict_ar = dict()
             for x in results:
                 role = str(x["role"]["value"]).replace("https://w3id.org/oc/meta/ar/", "")
@@ -319,6 +346,9 @@ class ResourceFinder:
                 dict_ar[role]["next"] = next_role
                 dict_ar[role]["agent"] = agent
 
+            # all the agents are looked up at once:
+            self.prefetch_ra_from_meta([dict_ar[x]["agent"] for x in dict_ar])
+
             ar_list = list()
 
             last = ""
@@ -343,78 +373,19 @@ class ResourceFinder:
             return None
 
     def re_from_meta(self, meta):
-        uri = "https://w3id.org/oc/meta/br/" + str(meta)
-        query = """
-                        SELECT DISTINCT ?re ?sp ?ep
-                        WHERE {
-                            <%s> a <%s>.
-                            <%s> <%s> ?re.
-                            ?re <%s> ?sp.
-                            ?re <%s> ?ep.
-                        }
-
-                        """ % (uri, GraphEntity.iri_expression, uri, GraphEntity.iri_embodiment,
-                               GraphEntity.iri_starting_page, GraphEntity.iri_ending_page)
-        result = self.__query(query)
-        if result["results"]["bindings"]:
-            meta = result["results"]["bindings"][0]["re"]["value"].replace("https://w3id.org/oc/meta/re/", "")
-            pages = result["results"]["bindings"][0]["sp"]["value"] + "-" +\
-                result["results"]["bindings"][0]["ep"]["value"]
+        results = self.__bindings("re", [str(meta)])[str(meta)]
+        if results:
+            meta = results[0]["re"]["value"].replace("https://w3id.org/oc/meta/re/", "")
+            pages = results[0]["sp"]["value"] + "-" + results[0]["ep"]["value"]
             return meta, pages
         else:
             return None
 
     def retrieve_br_info_from_meta(self, meta_id):
-        uri = "https://w3id.org/oc/meta/br/" + str(meta_id)
-        query = """
-                        SELECT ?res 
-                        (group_concat(DISTINCT  ?type;separator=' ;and; ') as ?type_)
-                        (group_concat(DISTINCT  ?date;separator=' ;and; ') as ?date_)
-                        (group_concat(DISTINCT  ?num;separator=' ;and; ') as ?num_)
-                        (group_concat(DISTINCT  ?part1;separator=' ;and; ') as ?part1_)
-                        (group_concat(DISTINCT  ?title1;separator=' ;and; ') as ?title1_)
-                        (group_concat(DISTINCT  ?num1;separator=' ;and; ') as ?num1_)
-                        (group_concat(DISTINCT  ?type1;separator=' ;and; ') as ?type1_)
-                        (group_concat(DISTINCT  ?part2;separator=' ;and; ') as ?part2_)
-                        (group_concat(DISTINCT  ?title2;separator=' ;and; ') as ?title2_)
-                        (group_concat(DISTINCT  ?num2;separator=' ;and; ') as ?num2_)
-                        (group_concat(DISTINCT  ?type2;separator=' ;and; ') as ?type2_)
-                        (group_concat(DISTINCT  ?part3;separator=' ;and; ') as ?part3_)
-                        (group_concat(DISTINCT  ?title3;separator=' ;and; ') as ?title3_)
-                        (group_concat(DISTINCT  ?num3;separator=' ;and; ') as ?num3_)
-                        (group_concat(DISTINCT  ?type3;separator=' ;and; ') as ?type3_) 
+        results = self.__bindings("br_info", [str(meta_id)])[str(meta_id)]
+        if results:
 
-                        WHERE {
-                                ?res a ?type.
-                                OPTIONAL {?res <%s> ?date.}
-                                OPTIONAL {?res <%s> ?num.}
-                                OPTIONAL {?res <%s> ?part1.
-                                            OPTIONAL {?part1 <%s> ?title1.}
-                                            OPTIONAL {?part1 <%s> ?num1.}
-                                            ?part1 a ?type1.
-                                            OPTIONAL{?part1 <%s> ?part2.
-                                                     OPTIONAL {?part2 <%s> ?title2.}
-                                                        OPTIONAL {?part2 <%s> ?num2.}
-                                                        ?part2 a ?type2.
-                                                     OPTIONAL{?part2 <%s> ?part3.
-                                                              OPTIONAL {?part3 <%s> ?title3.}
-                                                                OPTIONAL {?part3 <%s> ?num3.}
-                                                        ?part3 a ?type3.
-                                                    }
-                                        }
-                                }
-                            filter(?res = <%s>)
-                        } group by ?res
-
-                        """ % (GraphEntity.iri_has_publication_date, GraphEntity.iri_has_sequence_identifier,
-                               GraphEntity.iri_part_of, GraphEntity.iri_title, GraphEntity.iri_has_sequence_identifier,
-                               GraphEntity.iri_part_of, GraphEntity.iri_title, GraphEntity.iri_has_sequence_identifier,
-                               GraphEntity.iri_part_of, GraphEntity.iri_title, GraphEntity.iri_has_sequence_identifier,
-                               uri)
-        result = self.__query(query)
-        if result["results"]["bindings"]:
-
-            result = result["results"]["bindings"][0]
+            result = results[0]
             res_dict = dict()
             res_dict["pub_date"] = ""
             res_dict["type"] = ""
@@ -506,3 +477,195 @@ class ResourceFinder:
             dic["venue"] = result[title_]["value"] + " [meta:" + result[part_]["value"] \
                 .replace("https://w3id.org/oc/meta/", "") + "]"
         return dic
+
+    # _______________________________QUERIES_________________________________ #
+    # Each query selects the key variables ('keys') bound by the VALUES clause ('values') so that
+    # every result row can be associated to the key it was found for (see '__bindings').
+
+    __queries = {
+        "br_id": """
+                SELECT DISTINCT %%(keys)s ?res (group_concat(DISTINCT  ?title;separator=' ;and; ') as ?title_)
+                    (group_concat(DISTINCT  ?id;separator=' ;and; ') as ?id_)
+                    (group_concat(?schema;separator=' ;and; ') as ?schema_)
+                    (group_concat(DISTINCT  ?value;separator=' ;and; ') as ?value_)
+                WHERE {
+                    %%(values)s
+                    ?knownId <%s> ?knownSchema.
+                    ?knownId <%s> ?knownValue.
+                    ?res <%s> ?knownId.
+                    ?res a <%s>.
+                    ?res <%s> ?id.
+                    ?id <%s> ?schema.
+                    ?id  <%s> ?value.
+                    OPTIONAL {?res <%s> ?title.}
+                } group by %%(keys)s ?res
+
+                """ % (GraphEntity.iri_uses_identifier_scheme, GraphEntity.iri_has_literal_value,
+                       GraphEntity.iri_has_identifier, GraphEntity.iri_expression, GraphEntity.iri_has_identifier,
+                       GraphEntity.iri_uses_identifier_scheme, GraphEntity.iri_has_literal_value,
+                       GraphEntity.iri_title),
+        "br": """
+                SELECT DISTINCT ?res (group_concat(DISTINCT  ?title;separator=' ;and; ') as ?title_)
+                     (group_concat(DISTINCT  ?id;separator=' ;and; ') as ?id_)
+                     (group_concat(?schema;separator=' ;and; ') as ?schema_)
+                     (group_concat(DISTINCT  ?value;separator=' ;and; ') as ?value_)
+
+                WHERE {
+                    %%(values)s
+                    ?res a <%s>.
+                    OPTIONAL {?res <%s> ?title.}
+                    OPTIONAL {?res <%s> ?id.
+                        ?id <%s> ?schema.
+                        ?id  <%s> ?value.}
+                } group by ?res
+
+                """ % (GraphEntity.iri_expression, GraphEntity.iri_title, GraphEntity.iri_has_identifier,
+                       GraphEntity.iri_uses_identifier_scheme, GraphEntity.iri_has_literal_value),
+        "id": """
+                        SELECT DISTINCT %%(keys)s ?res
+
+
+                        WHERE {
+                            %%(values)s
+                            ?res a <%s>.
+                            ?res <%s> ?knownSchema.
+                            ?res <%s> ?knownValue.
+                        } group by %%(keys)s ?res
+
+                        """ % (GraphEntity.iri_identifier, GraphEntity.iri_uses_identifier_scheme,
+                               GraphEntity.iri_has_literal_value),
+        "ra": """
+                        SELECT DISTINCT ?res (group_concat(DISTINCT  ?title;separator=' ;and; ') as ?title_)
+                             (group_concat(DISTINCT  ?name;separator=' ;and; ') as ?name_)
+                             (group_concat(DISTINCT  ?surname;separator=' ;and; ') as ?surname_)
+                             (group_concat(DISTINCT  ?id;separator=' ;and; ') as ?id_)
+                             (group_concat(?schema;separator=' ;and; ') as ?schema_)
+                             (group_concat(DISTINCT  ?value;separator=' ;and; ') as ?value_)
+
+                        WHERE {
+                            %%(values)s
+                            ?res a <%s>.
+                            OPTIONAL {?res <%s> ?name.}
+                            OPTIONAL {?res <%s> ?surname.}
+                            OPTIONAL {?res <%s> ?title.}
+                            OPTIONAL {?res <%s> ?id.
+                                ?id <%s> ?schema.
+                                ?id  <%s> ?value.}
+                        } group by ?res
+
+                        """ % (GraphEntity.iri_agent, GraphEntity.iri_given_name, GraphEntity.iri_family_name,
+                               GraphEntity.iri_name, GraphEntity.iri_has_identifier,
+                               GraphEntity.iri_uses_identifier_scheme, GraphEntity.iri_has_literal_value),
+        "ra_id": """
+                SELECT DISTINCT %%(keys)s ?res
+                    (group_concat(DISTINCT  ?title;separator=' ;and; ') as ?title_)
+                     (group_concat(DISTINCT  ?name;separator=' ;and; ') as ?name_)
+                     (group_concat(DISTINCT  ?surname;separator=' ;and; ') as ?surname_)
+                     (group_concat(DISTINCT  ?id;separator=' ;and; ') as ?id_)
+                     (group_concat(?schema;separator=' ;and; ') as ?schema_)
+                     (group_concat(DISTINCT  ?value;separator=' ;and; ') as ?value_)
+
+                WHERE {
+                    %%(values)s
+                    ?knownId <%s> ?knownSchema.
+                    ?knownId <%s> ?knownValue.
+                    ?res <%s> ?knownId.
+                    ?res a <%s>.
+                    ?res <%s> ?id.
+                    ?id <%s> ?schema.
+                    ?id  <%s> ?value.
+                    OPTIONAL {?res <%s> ?name. }
+                    OPTIONAL {?res <%s> ?surname.}
+                    OPTIONAL {?res <%s> ?title.}
+                } group by %%(keys)s ?res
+
+                """ % (GraphEntity.iri_uses_identifier_scheme, GraphEntity.iri_has_literal_value,
+                       GraphEntity.iri_has_identifier, GraphEntity.iri_agent, GraphEntity.iri_has_identifier,
+                       GraphEntity.iri_uses_identifier_scheme, GraphEntity.iri_has_literal_value,
+                       GraphEntity.iri_given_name, GraphEntity.iri_family_name, GraphEntity.iri_name),
+        "vvi": """
+                SELECT DISTINCT ?container ?res
+                    (group_concat(DISTINCT  ?type;separator=' ;and; ') as ?type_)
+                    (group_concat(DISTINCT  ?title;separator=' ;and; ') as ?title_)
+
+                WHERE {
+                    %%(values)s
+                    ?res <%s> ?container.
+                    ?res a ?type.
+                    ?res <%s> ?title.
+                } group by ?container ?res
+
+                """ % (GraphEntity.iri_part_of, GraphEntity.iri_has_sequence_identifier),
+        "ra_seq": """
+                SELECT DISTINCT ?res ?roleType ?role ?next ?agent
+
+                WHERE {
+                    %%(values)s
+                    ?res a <%s>.
+                    ?res <%s> ?role.
+                    ?role a <%s>.
+                    ?role <%s> ?roleType.
+                    ?role <%s> ?agent.
+                    OPTIONAL {?role <%s> ?next.}
+                }
+
+                """ % (GraphEntity.iri_expression, GraphEntity.iri_is_document_context_for,
+                       GraphEntity.iri_role_in_time, GraphEntity.iri_with_role, GraphEntity.iri_is_held_by,
+                       GraphEntity.iri_has_next),
+        "re": """
+                        SELECT DISTINCT ?res ?re ?sp ?ep
+                        WHERE {
+                            %%(values)s
+                            ?res a <%s>.
+                            ?res <%s> ?re.
+                            ?re <%s> ?sp.
+                            ?re <%s> ?ep.
+                        }
+
+                        """ % (GraphEntity.iri_expression, GraphEntity.iri_embodiment,
+                               GraphEntity.iri_starting_page, GraphEntity.iri_ending_page),
+        "br_info": """
+                        SELECT ?res
+                        (group_concat(DISTINCT  ?type;separator=' ;and; ') as ?type_)
+                        (group_concat(DISTINCT  ?date;separator=' ;and; ') as ?date_)
+                        (group_concat(DISTINCT  ?num;separator=' ;and; ') as ?num_)
+                        (group_concat(DISTINCT  ?part1;separator=' ;and; ') as ?part1_)
+                        (group_concat(DISTINCT  ?title1;separator=' ;and; ') as ?title1_)
+                        (group_concat(DISTINCT  ?num1;separator=' ;and; ') as ?num1_)
+                        (group_concat(DISTINCT  ?type1;separator=' ;and; ') as ?type1_)
+                        (group_concat(DISTINCT  ?part2;separator=' ;and; ') as ?part2_)
+                        (group_concat(DISTINCT  ?title2;separator=' ;and; ') as ?title2_)
+                        (group_concat(DISTINCT  ?num2;separator=' ;and; ') as ?num2_)
+                        (group_concat(DISTINCT  ?type2;separator=' ;and; ') as ?type2_)
+                        (group_concat(DISTINCT  ?part3;separator=' ;and; ') as ?part3_)
+                        (group_concat(DISTINCT  ?title3;separator=' ;and; ') as ?title3_)
+                        (group_concat(DISTINCT  ?num3;separator=' ;and; ') as ?num3_)
+                        (group_concat(DISTINCT  ?type3;separator=' ;and; ') as ?type3_)
+
+                        WHERE {
+                                %%(values)s
+                                ?res a ?type.
+                                OPTIONAL {?res <%s> ?date.}
+                                OPTIONAL {?res <%s> ?num.}
+                                OPTIONAL {?res <%s> ?part1.
+                                            ?part1 a ?type1.
+                                            OPTIONAL {?part1 <%s> ?title1.}
+                                            OPTIONAL {?part1 <%s> ?num1.}
+                                            OPTIONAL{?part1 <%s> ?part2.
+                                                     ?part2 a ?type2.
+                                                     OPTIONAL {?part2 <%s> ?title2.}
+                                                        OPTIONAL {?part2 <%s> ?num2.}
+                                                     OPTIONAL{?part2 <%s> ?part3.
+                                                              ?part3 a ?type3.
+                                                              OPTIONAL {?part3 <%s> ?title3.}
+                                                                OPTIONAL {?part3 <%s> ?num3.}
+                                                    }
+                                        }
+                                }
+                        } group by ?res
+
+                        """ % (GraphEntity.iri_has_publication_date, GraphEntity.iri_has_sequence_identifier,
+                               GraphEntity.iri_part_of, GraphEntity.iri_title, GraphEntity.iri_has_sequence_identifier,
+                               GraphEntity.iri_part_of, GraphEntity.iri_title, GraphEntity.iri_has_sequence_identifier,
+                               GraphEntity.iri_part_of, GraphEntity.iri_title, GraphEntity.iri_has_sequence_identifier)
+    }
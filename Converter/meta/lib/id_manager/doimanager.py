@@ -18,20 +18,29 @@
 from meta.lib.id_manager.identifiermanager import IdentifierManager
 from re import sub
 from urllib.parse import unquote, quote
-from requests import get
+from requests import Session, RequestException
+from requests.adapters import HTTPAdapter
 from json import loads
-from meta.lib.csvmanager import CSVManager
-from requests import ReadTimeout
+from meta.lib.csvmanager import CSVManager, get_csv_manager
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from time import monotonic, sleep
 
 
 class DOIManager(IdentifierManager):
-    def __init__(self, valid_doi=None, use_api_service=True):
+    def __init__(self, valid_doi=None, use_api_service=True, api=None):
+        """'valid_doi' is the cache of the DOIs that were already checked: a CSVManager (or an SQLiteManager),
+        or the path of one of them (see 'get_csv_manager') so that the results persist between runs. By default,
+        they're kept in memory only. 'api' checks whether a DOI exists (see HandleAPI): any object with an
+        'exists' method can be given in its place, e.g. a local stub for tests."""
         if valid_doi is None:
             valid_doi = CSVManager(store_new=False)
+        elif isinstance(valid_doi, str):
+            valid_doi = get_csv_manager(valid_doi)
 
-        self.api = "https://doi.org/api/handles/"
         self.valid_doi = valid_doi
         self.use_api_service = use_api_service
+        self.api = api
         self.p = "doi:"
         super(DOIManager, self).__init__()
 
@@ -48,13 +57,45 @@ class DOIManager(IdentifierManager):
             return False
         else:
             if self.valid_doi.get_value(doi) is None:
-                if self.__doi_exists(doi):
-                    self.valid_doi.add_value(doi, "v")
-                else:
-                    self.valid_doi.add_value(doi, "i")
+                exists = self.__doi_exists(doi)
+                if exists is None:
+                    return False  # The API gave no answer: the DOI will be checked again next time
+                self.valid_doi.add_value(doi, "v" if exists else "i")
 
             return "v" in self.valid_doi.get_value(doi)
 
+    def validate_many(self, id_strings, workers=8):
+        """It returns a dictionary telling whether each of the given DOIs is valid, as 'is_valid' does. The DOIs
+        which aren't in the cache yet are checked concurrently by 'workers' threads (the requests share the
+        connections and the rate limit of the API), then the cache is updated and flushed. The DOIs the API
+        gave no answer about are considered invalid, but they aren't cached."""
+        result = dict()
+        to_check = dict()
+        for id_string in id_strings:
+            doi = self.normalise(id_string, include_prefix=True)
+            if doi is None:
+                result[id_string] = False
+            else:
+                values = self.valid_doi.get_value(doi)
+                if values is None:
+                    to_check.setdefault(doi, []).append(id_string)
+                else:
+                    result[id_string] = "v" in values
+
+        if to_check:
+            # The API is shared by the threads, while the cache is only accessed by this one
+            if self.use_api_service:
+                self.__api()
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                checks = list(zip(to_check, executor.map(self.__doi_exists, to_check)))
+            self.valid_doi.add_values((doi, "v" if exists else "i") for doi, exists in checks if exists is not None)
+            for doi, exists in checks:
+                for id_string in to_check[doi]:
+                    result[id_string] = bool(exists)
+        self.valid_doi.flush()
+
+        return result
+
     def normalise(self, id_string, include_prefix=False):
         try:
             doi_string = sub("\0+", "", sub("\s+", "", unquote(id_string[id_string.index("10."):])))
@@ -65,16 +106,58 @@ class DOIManager(IdentifierManager):
     def __doi_exists(self, doi_full):
         doi = self.normalise(doi_full)
         if self.use_api_service:
-            tentative = 3
-            while tentative:
-                tentative -= 1
-                try:
-                    r = get(self.api + quote(doi), headers=self.headers, timeout=30)
-                    if r.status_code == 200:
-                        r.encoding = "utf-8"
-                        json_res = loads(r.text)
-                        return json_res.get("responseCode") == 1
-                except ReadTimeout:
-                    pass  # Do nothing, just try again
+            return self.__api().exists(doi)
 
         return False
+
+    def __api(self):
+        if self.api is None:
+            self.api = HandleAPI(headers=self.headers)
+        return self.api
+
+
+class HandleAPI(object):
+    """The API of doi.org, which tells whether a DOI exists. Requests go through a single session, so that
+    connections are kept alive and reused (up to 'pool_size' at a time, from any thread), and they're spaced
+    out so that at most 'rate_limit' requests per second are sent (0 means no limit).
+
+    'exists' returns None when no definitive answer was given (e.g. timeouts, connection errors or
+    server errors even after retrying), so that the DOI isn't cached as invalid."""
+
+    def __init__(self, url="https://doi.org/api/handles/", rate_limit=10.0, pool_size=8, timeout=30,
+                 headers=None):
+        self.url = url
+        self.timeout = timeout
+        self.session = Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        if headers:
+            self.session.headers.update(headers)
+        self.interval = 1.0 / rate_limit if rate_limit else 0.0
+        self.next_request = 0.0
+        self.lock = Lock()
+
+    def wait(self):
+        if self.interval:
+            with self.lock:
+                now = monotonic()
+                start = max(now, self.next_request)
+                self.next_request = start + self.interval
+            sleep(start - now)
+
+    def exists(self, doi):
+        tentative = 3
+        while tentative:
+            tentative -= 1
+            self.wait()
+            try:
+                r = self.session.get(self.url + quote(doi), timeout=self.timeout)
+                if r.status_code == 200:
+                    r.encoding = "utf-8"
+                    json_res = loads(r.text)
+                    return json_res.get("responseCode") == 1
+                elif r.status_code == 404:
+                    return False  # The DOI doesn't exist: there's no need to try again
+            except (RequestException, ValueError):
+                pass  # Do nothing, just try again
+
+        return None
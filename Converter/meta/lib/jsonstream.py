@@ -0,0 +1,165 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021, Simone Persiani <iosonopersia@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+import gzip
+import io
+import json
+import os
+import re
+import tarfile
+from contextlib import contextmanager
+
+json_suffixes = (".json", ".json.gz")
+tar_suffixes = (".tar", ".tar.gz", ".tgz")
+
+_decoder = json.JSONDecoder()
+_whitespace = re.compile(r"[ \t\n\r]*")
+
+
+class _Scanner(object):
+    """A window over a JSON text file: only the part of the file which wasn't parsed yet is kept in memory."""
+
+    def __init__(self, json_file, chunk_size):
+        self.file = json_file
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def read(self, size):
+        chunk = self.file.read(size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        # It returns the next non-whitespace character (an empty string at the end of the file)
+        while True:
+            self.pos = _whitespace.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.read(self.chunk_size):
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise json.JSONDecodeError("Expecting '%s'" % char, self.buffer, self.pos)
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                end = None
+            # A number at the end of the buffer might continue in the following chunk
+            if end is not None and (end < len(self.buffer) or self.eof):
+                self.pos = end
+                return value
+            # The value is incomplete: as much as what is already buffered is read (so that the value
+            # is decoded again only a logarithmic number of times)
+            self.read(max(self.chunk_size, len(self.buffer) - self.pos))
+
+    def array(self):
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            char = self.peek()
+            self.pos += 1
+            if char == "]":
+                return
+            elif char != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", self.buffer, self.pos - 1)
+
+
+def iter_items(json_file, key="items", chunk_size=1 << 16):
+    """It yields, one at a time, the items of the JSON array stored inside the given (open, text) file, so that
+    the file is never entirely loaded in memory. The array can either be the top-level value of the file or,
+    as in Crossref dumps, the 'key' member of the top-level object (the other members are skipped)."""
+    scanner = _Scanner(json_file, chunk_size)
+    char = scanner.peek()
+    if char == "[":
+        yield from scanner.array()
+    elif char == "{":
+        scanner.pos += 1
+        first = True
+        while scanner.peek() != "}":
+            if not first:
+                scanner.expect(",")
+            first = False
+            name = scanner.value()
+            scanner.expect(":")
+            if name == key and scanner.peek() == "[":
+                yield from scanner.array()
+            else:
+                scanner.value()
+        scanner.pos += 1
+    else:
+        raise json.JSONDecodeError("Expecting an array or an object", scanner.buffer, scanner.pos)
+
+
+def is_json_source(filename):
+    return filename.endswith(json_suffixes) or filename.endswith(tar_suffixes)
+
+
+@contextmanager
+def open_json(path):
+    """It opens a JSON file for reading, decompressing it on the fly if its name ends with '.gz'."""
+    if path.endswith(".gz"):
+        json_file = gzip.open(path, "rt", encoding="utf-8")
+    else:
+        json_file = open(path, "r", encoding="utf-8")
+    with json_file:
+        yield json_file
+
+
+def text_file(name, binary_file):
+    """It wraps the given binary file into a text one, decompressing it on the fly if 'name' ends with '.gz'."""
+    if name.endswith(".gz"):
+        binary_file = gzip.GzipFile(fileobj=binary_file, mode="rb")
+    return io.TextIOWrapper(binary_file, encoding="utf-8")
+
+
+def tar_members(path):
+    """It yields a tuple (name inside the archive, open binary file) for each '.json' and '.json.gz' member
+    of the given tar archive (possibly compressed). Members are read in the order they're stored, straight
+    from the archive: each member must be read before the following one is requested."""
+    with tarfile.open(path, mode="r:*") as archive:
+        for member in archive:
+            if member.isfile() and member.name.endswith(json_suffixes):
+                yield member.name, archive.extractfile(member)
+
+
+def json_sources(path):
+    """It yields a tuple (name, open text file) for each JSON file stored at the given path. A '.json' or
+    '.json.gz' file is yielded as it is (with its file name), while the members of a tar archive are read
+    with no extraction step (with their name inside the archive, see 'tar_members')."""
+    if path.endswith(tar_suffixes):
+        for name, member_file in tar_members(path):
+            with text_file(name, member_file) as json_file:
+                yield name, json_file
+    elif path.endswith(json_suffixes):
+        with open_json(path) as json_file:
+            yield os.path.basename(path), json_file
@@ -0,0 +1,72 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021, Simone Persiani <iosonopersia@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+import csv
+from collections.abc import MutableMapping
+
+
+class Row(MutableMapping):
+    """A row of the CSV files processed by meta. It behaves like the dictionary returned by
+    'csv.DictReader' (so that Curator and Creator can work on both), but its values are stored
+    inside slots, which take less memory than the hash table of a dictionary.
+    The columns are fixed, missing values are empty strings and columns cannot be removed."""
+
+    fieldnames = ("id", "title", "author", "pub_date", "venue", "volume", "issue", "page", "type", "publisher",
+                  "editor")
+    __slots__ = fieldnames
+
+    def __init__(self, *args, **kwargs):
+        for field in self.fieldnames:
+            setattr(self, field, "")
+        self.update(*args, **kwargs)
+
+    def __getitem__(self, key):
+        if key not in _fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in _fields:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __delitem__(self, key):
+        raise TypeError("The columns of a Row cannot be removed")
+
+    def __iter__(self):
+        return iter(self.fieldnames)
+
+    def __len__(self):
+        return len(self.fieldnames)
+
+    def __repr__(self):
+        return "Row(%r)" % dict(self)
+
+
+_fields = frozenset(Row.fieldnames)
+
+
+def read_rows(csv_file, delimiter=","):
+    """It returns the rows of the given (open) CSV file. When its header only contains the columns
+    of a Row, Row objects are returned and values which are repeated amongst rows (e.g. venues,
+    publishers and types) share the same string; plain dictionaries are returned otherwise."""
+    reader = csv.reader(csv_file, delimiter=delimiter)
+    header = next(reader, [])
+    if not set(header) <= _fields:
+        return [dict(zip(header, record)) for record in reader]
+
+    values = dict()
+    return [Row(zip(header, [values.setdefault(value, value) for value in record])) for record in reader]
@@ -0,0 +1,311 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021, Simone Persiani <iosonopersia@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+import collections
+import os
+import time
+from threading import Lock, local
+
+import requests
+from oc_ocdm.prov.prov_entity import ProvEntity
+from rdflib import ConjunctiveGraph, Graph, URIRef, BNode, Literal, Variable
+from rdflib.plugins.sparql import CUSTOM_EVALS
+from rdflib.plugins.sparql.aggregates import Aggregator
+from rdflib.plugins.sparql.algebra import translateQuery
+from rdflib.plugins.sparql.evalutils import _eval
+from rdflib.plugins.sparql.evaluate import evalPart
+from rdflib.plugins.sparql.parser import parseQuery
+from rdflib.plugins.sparql.processor import SPARQLResult
+from rdflib.plugins.sparql.sparql import AlreadyBound, FrozenBindings, NotBoundError, QueryContext
+
+LOCAL_PREFIX = "local:"
+
+
+class Triplestore(object):
+    """The interface through which the scripts of the workflow query and update the triplestore.
+    Results of SELECT queries are returned in the SPARQL 1.1 JSON results format (as a dictionary).
+    See 'get_triplestore' for choosing the implementation through the 'triplestore_url' setting."""
+
+    def query(self, query_string):
+        raise NotImplementedError
+
+    def update(self, update_string):
+        raise NotImplementedError
+
+    def upload(self, storer, base_dir=None, batch_size=10):
+        """It uploads the changes of all the entities of the set of 'storer' (see 'Storer.upload_all')."""
+        raise NotImplementedError
+
+    def upload_and_store(self, storer, base_dir, base_iri, context_path, batch_size=10):
+        """It stores the entities of 'storer' inside 'base_dir' and then it uploads them, but only
+        if all of them were stored (see 'Storer.upload_and_store')."""
+        stored_graph_path = storer.store_all(base_dir, base_iri, context_path)
+        if None in stored_graph_path:
+            for file_path in stored_graph_path:
+                if file_path is not None:
+                    open(f"{file_path}.notuploaded", "wt").close()
+            return False
+        return self.upload(storer, base_dir, batch_size)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class RemoteTriplestore(Triplestore):
+    """A SPARQL endpoint (e.g. Blazegraph) reached over HTTP. Queries are sent with the POST method
+    through a single session, so that connections are kept alive."""
+
+    def __init__(self, url, timeout=None):
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def query(self, query_string):
+        response = self.session.post(self.url, data={'query': query_string},
+                                     headers={'Accept': 'application/sparql-results+json'},
+                                     timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def update(self, update_string):
+        response = self.session.post(self.url, data={'update': update_string}, timeout=self.timeout)
+        response.raise_for_status()
+
+    def upload(self, storer, base_dir=None, batch_size=10):
+        return storer.upload_all(self.url, base_dir, batch_size)
+
+    def close(self):
+        self.session.close()
+
+
+class _SkipUnbound(object):
+    # rdflib fails to evaluate a DISTINCT aggregate (e.g. 'GROUP_CONCAT(DISTINCT ?x)') over an
+    # unbound OPTIONAL variable: such rows must simply be skipped, as COUNT already does
+    def use_row(self, row):
+        try:
+            return super(_SkipUnbound, self).use_row(row)
+        except NotBoundError:
+            return False
+
+
+class _Aggregator(Aggregator):
+    accumulator_classes = {name: type(accumulator.__name__, (_SkipUnbound, accumulator), {})
+                           for name, accumulator in Aggregator.accumulator_classes.items()}
+
+
+def _rank(ctx, triple):
+    # The pattern with the fewest unbound terms is evaluated first, preferring the terms bound
+    # to a value (which are more selective than the constants of the query) and then literal objects
+    values = [ctx[term] for term in triple if isinstance(term, (Variable, BNode))]
+    unbound = values.count(None)
+    return unbound, unbound - len(values), not isinstance(ctx[triple[2]], Literal)
+
+
+def _eval_bgp(ctx, bgp):
+    # rdflib sorts the triple patterns of a BGP once, before knowing the variables bound by VALUES
+    # (or by the patterns evaluated before): e.g. '?res a fabio:Expression' would be matched first
+    # against every resource. Here the remaining patterns are sorted again at each step
+    if not bgp:
+        yield ctx.solution()
+        return
+    if len(bgp) > 1:
+        bgp = sorted(bgp, key=lambda triple: _rank(ctx, triple))
+    s, p, o = bgp[0]
+    _s, _p, _o = ctx[s], ctx[p], ctx[o]
+    for ss, sp, so in ctx.graph.triples((_s, _p, _o)):
+        c = ctx.push() if None in (_s, _p, _o) else ctx
+        try:
+            if _s is None:
+                c[s] = ss
+            if _p is None:
+                c[p] = sp
+            if _o is None:
+                c[o] = so
+        except AlreadyBound:
+            continue
+        yield from _eval_bgp(c, bgp[1:])
+
+
+def _eval_aggregate_join(ctx, agg):
+    # The same as rdflib's 'evalAggregateJoin', with the accumulators of '_Aggregator'
+    groups = collections.defaultdict(lambda: _Aggregator(aggregations=agg.A))
+    if agg.p.expr is None:
+        aggregator = groups[True]
+        for row in evalPart(ctx, agg.p):
+            aggregator.update(row)
+    else:
+        for row in evalPart(ctx, agg.p):
+            groups[tuple(_eval(e, row, False) for e in agg.p.expr)].update(row)
+
+    for aggregator in groups.values():
+        yield FrozenBindings(ctx, aggregator.get_bindings())
+    if len(groups) == 0:
+        yield FrozenBindings(ctx)
+
+
+_local_query = local()
+
+
+def _local_eval(ctx, part):
+    # Registered among rdflib's custom evaluation functions, but only used by the queries of LocalTriplestore:
+    # any other query made through rdflib is evaluated as usual
+    if getattr(_local_query, "active", False):
+        if part.name == "BGP":
+            return _eval_bgp(ctx, list(part.triples))
+        elif part.name == "AggregateJoin":
+            return _eval_aggregate_join(ctx, part)
+    raise NotImplementedError
+
+
+CUSTOM_EVALS["meta.lib.triplestore"] = _local_eval
+
+
+class LocalTriplestore(Triplestore):
+    """An in-process triplestore based on an rdflib ConjunctiveGraph, meant for running (and benchmarking)
+    the whole workflow on a single machine without any service. When 'path' is given, the store is loaded
+    from that N-Quads file and it's saved there again after each upload and by 'close' (so that it can be
+    shared by the scripts of the workflow, which are run one after the other). Each query and update request
+    waits for 'latency' seconds before being executed, so to model the round trips towards a remote triplestore."""
+
+    def __init__(self, path=None, latency=0.0):
+        self.path = path
+        self.latency = latency
+        self.modified = False
+        self.graph = ConjunctiveGraph()
+        # rdflib stores can't be safely queried while they're being updated
+        self.lock = Lock()
+        if path and os.path.exists(path):
+            self.graph.parse(path, format="nquads")
+
+    def __wait(self):
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    @staticmethod
+    def __term(term):
+        if isinstance(term, URIRef):
+            return {"type": "uri", "value": str(term)}
+        elif isinstance(term, BNode):
+            return {"type": "bnode", "value": str(term)}
+        result = {"type": "literal", "value": str(term)}
+        if isinstance(term, Literal):
+            if term.language:
+                result["xml:lang"] = term.language
+            elif term.datatype:
+                result["datatype"] = str(term.datatype)
+        return result
+
+    def __dataset_context(self, ctx, dataset_clause):
+        # The graphs named by FROM clauses are looked up inside the store, never downloaded from the web
+        # (a graph that isn't there is just empty): their union is the default graph of the query.
+        # FROM NAMED graphs are already in the dataset
+        default_graph = None
+        for d in dataset_clause:
+            if d.default:
+                if default_graph is None:
+                    default_graph = Graph()
+                default_graph += self.graph.get_context(d.default)
+        return ctx.pushGraph(default_graph) if default_graph is not None else ctx
+
+    def query(self, query_string):
+        self.__wait()
+        query = translateQuery(parseQuery(query_string), initNs=dict(self.graph.namespaces()))
+        with self.lock:
+            # The same as 'self.graph.query', but evaluated through '_local_eval'
+            ctx = QueryContext(self.graph, initBindings={})
+            ctx.prologue = query.prologue
+            if query.algebra.datasetClause:
+                ctx = self.__dataset_context(ctx, query.algebra.datasetClause)
+            _local_query.active = True
+            try:
+                result = SPARQLResult(evalPart(ctx, query.algebra))
+                if result.type == "ASK":
+                    return {"head": {}, "boolean": result.askAnswer}
+                variables = [str(var) for var in result.vars]
+                bindings = list()
+                for row in result:
+                    bindings.append({var: self.__term(value) for var, value in zip(variables, row)
+                                     if value is not None})
+            finally:
+                _local_query.active = False
+        return {"head": {"vars": variables}, "results": {"bindings": bindings}}
+
+    def update(self, update_string):
+        self.__wait()
+        with self.lock:
+            self.graph.update(update_string)
+            self.modified = True
+
+    def upload(self, storer, base_dir=None, batch_size=10):
+        # The same changes sent by 'Storer.upload_all' (see 'get_update_query'), with up to 'batch_size' entities
+        # per request. They're applied straight to the graph, since parsing them as SPARQL updates is way slower
+        if batch_size <= 0:
+            batch_size = 10
+        entities = list(storer.a_set.res_to_entity.values())
+        for start in range(0, len(entities), batch_size):
+            self.__wait()
+            with self.lock:
+                for entity in entities[start:start + batch_size]:
+                    if isinstance(entity, ProvEntity):
+                        to_be_deleted, preexisting_graph = False, Graph()
+                    else:
+                        to_be_deleted, preexisting_graph = entity.to_be_deleted, entity.preexisting_graph
+                    context = self.graph.get_context(entity.g.identifier)
+                    if to_be_deleted:
+                        for triple in preexisting_graph:
+                            context.remove(triple)
+                    else:
+                        # OCDM entities are never described through blank nodes: a plain difference is enough
+                        preexisting_triples, current_triples = set(preexisting_graph), set(entity.g)
+                        for triple in preexisting_triples - current_triples:
+                            context.remove(triple)
+                        for triple in current_triples - preexisting_triples:
+                            context.add(triple)
+                self.modified = True
+        self.save()
+        return True
+
+    def save(self):
+        if self.path and self.modified:
+            dir_path = os.path.dirname(self.path)
+            if dir_path and not os.path.exists(dir_path):
+                os.makedirs(dir_path)
+            tmp_path = self.path + ".tmp"
+            with self.lock:
+                self.graph.serialize(destination=tmp_path, format="nquads")
+                self.modified = False
+            os.replace(tmp_path, self.path)
+
+    def close(self):
+        self.save()
+
+
+def get_triplestore(triplestore_url, timeout=None, latency=0.0):
+    """It returns the triplestore identified by 'triplestore_url': either a SPARQL endpoint URL or
+    'local:<path>' for a LocalTriplestore stored in the N-Quads file at <path> ('local:' alone keeps
+    it in memory only). An instance of Triplestore is returned as it is."""
+    if isinstance(triplestore_url, Triplestore):
+        return triplestore_url
+    elif triplestore_url.startswith(LOCAL_PREFIX):
+        return LocalTriplestore(triplestore_url[len(LOCAL_PREFIX):] or None, latency)
+    else:
+        return RemoteTriplestore(triplestore_url, timeout)
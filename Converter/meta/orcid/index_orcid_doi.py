@@ -1,47 +1,179 @@
 import os
-from bs4 import BeautifulSoup
-from meta.lib.csvmanager import CSVManager
+import csv
+import shutil
+import tarfile
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from io import BytesIO
+from itertools import islice
+from lxml import etree
+from meta.lib.csvmanager import get_csv_manager
 from meta.lib.id_manager.doimanager import DOIManager
 from argparse import ArgumentParser
 
+personal_details = "{http://www.orcid.org/ns/personal-details}"
+common = "{http://www.orcid.org/ns/common}"
+summary_tags = (personal_details + "given-names", personal_details + "family-name", common + "external-id")
+
 
 class index_orcid_doi:
+    """It indexes the DOIs of the works of each ORCID summary (the ones whose relationship is 'self'): key the
+    DOI, value the name of the author followed by their ORCID. The summaries are parsed by 'workers' processes:
+    each one writes the pairs it finds in a shard of its own, and the shards are merged into the index at the end.
+
+    If a 'state_path' is given, the summaries that were indexed are recorded there (with their size and
+    modification time): the following runs only parse new or changed summaries. DOIs that were removed from
+    a changed summary are not removed from the index."""
 
-    def __init__(self, csv_path):
+    def __init__(self, csv_path, state_path=None, workers=1, batch_size=1000):
         if not os.path.exists(os.path.dirname(csv_path)):
             os.makedirs(os.path.dirname(csv_path))
-        self.doimanager = DOIManager(use_api_service=False)
-        self.csvstorage = CSVManager(csv_path)
+        self.csv_path = csv_path
+        self.csvstorage = get_csv_manager(csv_path)
+        self.state = get_csv_manager(state_path) if state_path is not None else None
+        self.workers = workers
+        self.batch_size = batch_size
 
     def finder(self, summaries_path):
-        for fold, dirs, files in os.walk(summaries_path):
-            for file in files:
-                if file.endswith('.xml'):
-                    xml_file = open(os.path.join(fold, file), 'r')
-                    xml_soup = BeautifulSoup(xml_file, 'xml')
-                    g_name = xml_soup.find('personal-details:given-names')
-                    f_name = xml_soup.find('personal-details:family-name')
-                    if f_name:
-                        f_name = f_name.get_text()
-                        if g_name:
-                            g_name = g_name.get_text()
-                            name = f_name + ", " + g_name
-                        else:
-                            name = f_name
-
-                        ids = xml_soup.findAll('common:external-id')
-                        if ids:
-                            for el in ids:
-                                id_type = el.find('common:external-id-type')
-                                rel = el.find('common:external-id-relationship')
-                                if id_type and rel:
-                                    if id_type.get_text().lower() == "doi" and rel.get_text().lower() == "self":
-                                        doi = el.find('common:external-id-value').get_text()
-                                        doi = self.doimanager.normalise(doi)
-                                        if doi:
-                                            orcid = file.replace(".xml", "")
-                                            auto = name + " [" + orcid + "]"
-                                            self.csvstorage.add_value(doi, auto)
+        """It indexes the summaries stored inside the given folder (subfolders are considered too)
+        or inside the given tar archive (possibly compressed), which is read with no extraction step."""
+        shard_dir = self.csv_path + ".shards"
+        if os.path.exists(shard_dir):
+            shutil.rmtree(shard_dir)
+        os.makedirs(shard_dir)
+
+        batches = self.batches(summaries_path)
+        if self.workers > 1:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_open_shard,
+                                     initargs=(shard_dir,)) as executor:
+                pending = set()
+                for batch in batches:
+                    if len(pending) >= 2 * self.workers:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            future.result()
+                    pending.add(executor.submit(_index_batch, batch))
+                for future in pending:
+                    future.result()
+        else:
+            _open_shard(shard_dir)
+            try:
+                for batch in batches:
+                    _index_batch(batch)
+            finally:
+                _close_shard()
+
+        self.merge(shard_dir)
+        shutil.rmtree(shard_dir)
+
+    def batches(self, summaries_path):
+        # Batches of tuples (ORCID, signature, summary): a summary is either the path of an XML file or its content
+        batch = []
+        for orcid, signature, summary in self.summaries(summaries_path):
+            if self.state is None or signature not in (self.state.get_value(orcid) or ()):
+                batch.append((orcid, signature, summary))
+                if len(batch) >= self.batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+    @staticmethod
+    def summaries(summaries_path):
+        if os.path.isdir(summaries_path):
+            for fold, dirs, files in os.walk(summaries_path):
+                for file in files:
+                    if file.endswith('.xml'):
+                        path = os.path.join(fold, file)
+                        stat = os.stat(path)
+                        yield file[:-len('.xml')], "%d-%d" % (stat.st_size, stat.st_mtime_ns), path
+        else:
+            with tarfile.open(summaries_path, mode="r|*") as archive:
+                for member in archive:
+                    name = os.path.basename(member.name)
+                    if member.isfile() and name.endswith('.xml'):
+                        summary = archive.extractfile(member).read()
+                        yield name[:-len('.xml')], "%d-%d" % (member.size, member.mtime), summary
+                    # Millions of members: their headers mustn't be kept in memory
+                    archive.members = []
+
+    def merge(self, shard_dir):
+        # The pairs are merged before the state, so that a summary is recorded as indexed only once its DOIs are
+        shards = sorted(os.listdir(shard_dir))
+        state_shards = [shard for shard in shards if shard.endswith(".state.csv")]
+        index_shards = [shard for shard in shards if shard not in state_shards]
+        for target, target_shards in ((self.csvstorage, index_shards), (self.state, state_shards)):
+            if target is not None:
+                for shard in target_shards:
+                    with open(os.path.join(shard_dir, shard), "r", encoding="utf-8", newline="") as f:
+                        rows = csv.reader(f)
+                        chunk = list(islice(rows, 10000))
+                        while chunk:
+                            target.add_values(chunk)
+                            chunk = list(islice(rows, 10000))
+                target.flush()
+
+
+def summary_dois(xml_file):
+    """It returns the name of the author of the given ORCID summary ('family, given', None if the summary
+    has no family name) and the DOIs of the works whose relationship is 'self' (not normalised)."""
+    given = family = None
+    dois = []
+    for _, element in etree.iterparse(xml_file, events=("end",), tag=summary_tags):
+        if element.tag == common + "external-id":
+            id_type = element.findtext(common + "external-id-type")
+            rel = element.findtext(common + "external-id-relationship")
+            value = element.findtext(common + "external-id-value")
+            if id_type is not None and rel is not None and value is not None:
+                if id_type.lower() == "doi" and rel.lower() == "self":
+                    dois.append(value)
+        elif element.tag == personal_details + "family-name":
+            if family is None:
+                family = element.text or ""
+        elif given is None:
+            given = element.text or ""
+        element.clear()
+
+    if family is None:
+        return None, dois
+    elif given is None:
+        return family, dois
+    else:
+        return family + ", " + given, dois
+
+
+_shard = None
+
+
+def _open_shard(shard_dir):
+    global _shard
+    path = os.path.join(shard_dir, str(os.getpid()))
+    _shard = (open(path + ".csv", "a", encoding="utf-8", newline=""),
+              open(path + ".state.csv", "a", encoding="utf-8", newline=""))
+
+
+def _close_shard():
+    global _shard
+    for f in _shard:
+        f.close()
+    _shard = None
+
+
+def _index_batch(batch):
+    doimanager = DOIManager(use_api_service=False)
+    pairs, state = [], []
+    for orcid, signature, summary in batch:
+        name, dois = summary_dois(BytesIO(summary) if isinstance(summary, bytes) else summary)
+        if name is not None:
+            for doi in dois:
+                doi = doimanager.normalise(doi)
+                if doi:
+                    pairs.append((doi, name + " [" + orcid + "]"))
+        state.append((orcid, signature))
+
+    # A batch is written only once it's entirely parsed, and the shards are flushed right away
+    for f, rows in zip(_shard, (pairs, state)):
+        csv.writer(f).writerows(rows)
+        f.flush()
 
 
 if __name__ == "__main__":
@@ -50,13 +182,20 @@ if __name__ == "__main__":
                                                                   " ORCID data.")
 
     arg_parser.add_argument("-c", "--csv", dest="csv_path", required=True,
-                            help="The output CSV file path.")
+                            help="The output CSV file path (an SQLite database is created instead, "
+                                 "if it ends with '.db' or '.sqlite').")
     arg_parser.add_argument("-s", "--summaries", dest="summaries_path", required=True,
-                            help="The folder path containing orcid summaries, subfolder will be considered too.")
+                            help="The folder path containing orcid summaries, subfolder will be considered too. "
+                                 "A tar archive of the summaries (e.g. the ORCID summaries dump) can be given too.")
+    arg_parser.add_argument("-n", "--workers", dest="workers", type=int, default=1,
+                            help="Number of processes parsing the summaries in parallel (default: 1)")
+    arg_parser.add_argument("-t", "--state", dest="state_path", required=False,
+                            help="A file (CSV, or SQLite as for the output) recording the summaries already indexed: "
+                                 "only new or changed summaries are indexed again, not mandatory")
 
     args = arg_parser.parse_args()
 
-    iOd = index_orcid_doi(args.csv_path)
+    iOd = index_orcid_doi(args.csv_path, state_path=args.state_path, workers=args.workers)
 
     iOd.finder(args.summaries_path)
 
@@ -1,23 +1,104 @@
 from meta.crossref.crossrefProcessing import *
+from meta.lib.jsonstream import is_json_source, json_sources, iter_items, json_suffixes, tar_suffixes, \
+    tar_members, text_file, open_json
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import multiprocessing
+import io
 import os
+import re
 import csv
 from argparse import ArgumentParser
 
 
-def preprocess(crossref_json_dir, orcid_doi_filepath, csv_dir, wanted_doi_filepath=None):
-    for filename in os.listdir(crossref_json_dir):
-        if filename.endswith(".json"):
-            json_file = os.path.join(crossref_json_dir, filename)
-            crossref_csv = crossrefProcessing(orcid_doi_filepath, wanted_doi_filepath)
-            new_filename = filename.replace(".json", ".csv")
-            filepath = os.path.join(csv_dir, new_filename)
-            pathoo(filepath)
-            data = crossref_csv.csv_creator(json_file)
-            with open(filepath, 'w', newline='', encoding="utf-8") as output_file:
-                dict_writer = csv.DictWriter(output_file, data[0].keys(), delimiter=',', quotechar='"',
+def preprocess(crossref_json_dir, orcid_doi_filepath, csv_dir, wanted_doi_filepath=None, workers=1):
+    # The ORCID-DOI index and the wanted DOIs are loaded only once and they're shared by all the files
+    if workers > 1:
+        preprocess_in_parallel(crossref_json_dir, orcid_doi_filepath, csv_dir, wanted_doi_filepath, workers)
+        return
+
+    crossref_csv = crossrefProcessing(orcid_doi_filepath, wanted_doi_filepath)
+    for filename in sorted(os.listdir(crossref_json_dir)):
+        if is_json_source(filename):
+            # Tar archives are read member by member: a CSV file is written for each JSON file they contain
+            for json_name, json_file in json_sources(os.path.join(crossref_json_dir, filename)):
+                write_csv(csv_path(csv_dir, json_name), crossref_csv.rows(iter_items(json_file)))
+
+
+def preprocess_in_parallel(crossref_json_dir, orcid_doi_filepath, csv_dir, wanted_doi_filepath, workers):
+    """The JSON files (and the members of tar archives) are converted by a pool of worker processes. Where
+    possible, the workers are forked once the indexes are loaded, so that they share them (copy-on-write)
+    instead of loading their own copy. Tar archives are read by this process, which hands the content of
+    each member over to the workers: only a few members at a time are waiting to be converted."""
+    global _crossref_csv
+    os.makedirs(csv_dir, exist_ok=True)
+    if "fork" in multiprocessing.get_all_start_methods():
+        _crossref_csv = crossrefProcessing(orcid_doi_filepath, wanted_doi_filepath)
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork"))
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                       initargs=(orcid_doi_filepath, wanted_doi_filepath))
+    try:
+        with executor:
+            pending = set()
+            for json_name, source in _sources(crossref_json_dir):
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                pending.add(executor.submit(_convert, json_name, source, csv_dir))
+            for future in pending:
+                future.result()
+    finally:
+        _crossref_csv = None
+
+
+_crossref_csv = None
+
+
+def _init_worker(orcid_doi_filepath, wanted_doi_filepath):
+    global _crossref_csv
+    _crossref_csv = crossrefProcessing(orcid_doi_filepath, wanted_doi_filepath)
+
+
+def _sources(crossref_json_dir):
+    # It yields the path of each JSON file and the content of each JSON member of the tar archives
+    for filename in sorted(os.listdir(crossref_json_dir)):
+        path = os.path.join(crossref_json_dir, filename)
+        if filename.endswith(tar_suffixes):
+            for json_name, member_file in tar_members(path):
+                yield json_name, member_file.read()
+        elif filename.endswith(json_suffixes):
+            yield filename, path
+
+
+def _convert(json_name, source, csv_dir):
+    if isinstance(source, bytes):
+        opened_file = text_file(json_name, io.BytesIO(source))
+    else:
+        opened_file = open_json(source)
+    with opened_file as json_file:
+        write_csv(csv_path(csv_dir, json_name), _crossref_csv.rows(iter_items(json_file)))
+
+
+def csv_path(csv_dir, json_name):
+    return os.path.join(csv_dir, re.sub(r"\.json(\.gz)?$", ".csv", json_name.replace("/", "_")))
+
+
+def write_csv(filepath, rows):
+    # Rows are written as soon as they're created: the output file is created along with its first row
+    output_file = None
+    try:
+        for row in rows:
+            if output_file is None:
+                pathoo(filepath)
+                output_file = open(filepath, 'w', newline='', encoding="utf-8")
+                dict_writer = csv.DictWriter(output_file, row.keys(), delimiter=',', quotechar='"',
                                              quoting=csv.QUOTE_NONNUMERIC)
                 dict_writer.writeheader()
-                dict_writer.writerows(data)
+            dict_writer.writerow(row)
+    finally:
+        if output_file is not None:
+            output_file.close()
 
 
 def pathoo(path):
@@ -30,14 +111,18 @@ if __name__ == "__main__":
                                                                  " enriching them thanks to an doi-orcid index")
 
     arg_parser.add_argument("-c", "--crossref", dest="crossref_json_dir", required=True,
-                            help="Crossref json files directory")
+                            help="Crossref json files directory (.json and .json.gz files, or tar archives of them)")
     arg_parser.add_argument("-o", "--orcid", dest="orcid_doi_filepath", required=True,
-                            help="Orcid-doi index filepath, to enrich data")
+                            help="Orcid-doi index filepath, to enrich data (a CSV file, or an SQLite database "
+                                 "if it ends with '.db' or '.sqlite')")
     arg_parser.add_argument("-v", "--csv", dest="csv_dir", required=True,
                             help="Directory where CSV will be stored")
     arg_parser.add_argument("-w", "--wanted", dest="wanted_doi_filepath", required=False,
                             help="A CSV filepath containing what DOI to process, not mandatory")
+    arg_parser.add_argument("-n", "--workers", dest="workers", type=int, default=1,
+                            help="Number of processes converting the JSON files in parallel (default: 1)")
 
     args = arg_parser.parse_args()
 
-    preprocess(args.crossref_json_dir, args.orcid_doi_filepath, args.csv_dir, args.wanted_doi_filepath)
+    preprocess(args.crossref_json_dir, args.orcid_doi_filepath, args.csv_dir, args.wanted_doi_filepath,
+               workers=args.workers)
@@ -3,77 +3,169 @@ from oc_ocdm.prov import ProvSet
 
 from meta.scripts.creator import *
 from meta.scripts.curator import *
-from meta.lib.conf import base_iri, context_path, info_dir, triplestore_url, \
-    base_dir, dir_split_number, items_per_file, default_dir, rdf_output_in_chunks, supplier_prefix
+from meta.lib.finder import ResourceFinder
+from meta.lib.row import read_rows
+from meta.lib.triplestore import get_triplestore
+from meta.lib.conf import base_iri, context_path, info_dir, triplestore_url, triplestore_latency, \
+    base_dir, dir_split_number, items_per_file, default_dir, rdf_output_in_chunks, supplier_prefix, pipelined_storage
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from argparse import ArgumentParser
+import multiprocessing
 import os
-import csv
 
 
-def process(crossref_csv_dir, csv_dir, index_dir, auxiliary_path, source=None):
+def process(crossref_csv_dir, csv_dir, index_dir, auxiliary_path, source=None, triplestore=None,
+            pipeline=pipelined_storage):
     if not os.path.exists(auxiliary_path):
         with open(auxiliary_path, 'wt', encoding='utf-8'):
             pass
 
-    for filename in os.listdir(crossref_csv_dir):
-        pathoo(auxiliary_path)
-        with open(auxiliary_path, "r") as aux_file:
-            completed = [line.rstrip('\n') for line in aux_file]
-        if filename.endswith(".csv") and filename not in completed:
-            filepath = os.path.join(crossref_csv_dir, filename)
-            data = unpack(filepath)
-            curator_info_dir = os.path.join(info_dir, 'curator' + os.sep)
-            curator_obj = Curator(data, triplestore_url, info_dir=curator_info_dir, prefix=supplier_prefix)
-            name = datetime.now().strftime("%Y-%m-%dT%H_%M_%S")
-            pathoo(csv_dir)
-            pathoo(index_dir)
-            curator_obj.curator(filename=name, path_csv=csv_dir, path_index=index_dir)
-
-            creator_info_dir = os.path.join(info_dir, 'creator' + os.sep)
-            creator_obj = Creator(curator_obj.data, base_iri, creator_info_dir, supplier_prefix,
-                                  curator_obj.index_id_ra, curator_obj.index_id_br, curator_obj.re_index,
-                                  curator_obj.ar_index, curator_obj.VolIss)
-            creator = creator_obj.creator(source=source)
-
-            prov = ProvSet(creator, base_iri, creator_info_dir, wanted_label=False)
-
-            prov.generate_provenance()
-
-            res_storer = Storer(creator,
-                                context_map={},
-                                dir_split=dir_split_number,
-                                n_file_item=items_per_file,
-                                default_dir=default_dir,
-                                output_format='nt11')
-
-            prov_storer = Storer(prov,
-                                 context_map={},
-                                 dir_split=dir_split_number,
-                                 n_file_item=items_per_file,
-                                 output_format='nquads')
-
-            if rdf_output_in_chunks:
-                filename_without_csv = filename[:-4]
-                f = os.path.join(base_dir, filename_without_csv + ".nt")
-                pathoo(f)
-                res_storer.store_graphs_in_file(f, context_path)
-                res_storer.upload_all(triplestore_url, base_dir, batch_size=100)
-
-                # Provenance
-                prov_dir = os.path.join(base_dir, 'prov' + os.sep)
-                f_prov = os.path.join(prov_dir, filename_without_csv + '.nq')
-                pathoo(f_prov)
-                prov_storer.store_graphs_in_file(f_prov, context_path)
+    # The triplestore configured by 'triplestore_url' is used (and then closed), unless another one is given
+    if triplestore is not None:
+        process_files(crossref_csv_dir, csv_dir, index_dir, auxiliary_path, triplestore, source, pipeline)
+    else:
+        with get_triplestore(triplestore_url, latency=triplestore_latency) as triplestore:
+            process_files(crossref_csv_dir, csv_dir, index_dir, auxiliary_path, triplestore, source, pipeline)
+
+
+def process_files(crossref_csv_dir, csv_dir, index_dir, auxiliary_path, triplestore, source=None, pipeline=False):
+    pathoo(auxiliary_path)
+    with open(auxiliary_path, "r", encoding='utf-8') as aux_file:
+        completed = {line.rstrip('\n') for line in aux_file}
+
+    # The cache of the finder is kept across files until new data is uploaded to the triplestore
+    finder = ResourceFinder(triplestore)
+    storage = BackgroundStorage(auxiliary_path) if pipeline else None
+    try:
+        # Files are always processed in the same order, so that the same identifiers are assigned to their entities
+        for filename in sorted(os.listdir(crossref_csv_dir)):
+            if filename.endswith(".csv") and filename not in completed:
+                filepath = os.path.join(crossref_csv_dir, filename)
+                data = unpack(filepath)
+                curator_info_dir = os.path.join(info_dir, 'curator' + os.sep)
+                curator_obj = Curator(data, finder, info_dir=curator_info_dir, prefix=supplier_prefix)
+                name = datetime.now().strftime("%Y-%m-%dT%H_%M_%S")
+                pathoo(csv_dir)
+                pathoo(index_dir)
+                curator_obj.curator(filename=name, path_csv=csv_dir, path_index=index_dir)
+
+                creator_info_dir = os.path.join(info_dir, 'creator' + os.sep)
+                creator_obj = Creator(curator_obj.data, base_iri, creator_info_dir, supplier_prefix,
+                                      curator_obj.index_id_ra, curator_obj.index_id_br, curator_obj.re_index,
+                                      curator_obj.ar_index, curator_obj.VolIss)
+                creator = creator_obj.creator(source=source)
+
+                if storage is not None:
+                    # The following file will be curated by looking up the triplestore: the data is stored
+                    # and uploaded right now (as in a sequential run), while the provenance is generated and
+                    # stored in the background. The previous file must be completed first, so that the
+                    # triplestore is never ahead of a file that failed
+                    storage.wait()
+                    store_data(filename, creator, triplestore)
+                    storage.submit(filename, creator)
+                else:
+                    store_rdf(filename, creator, triplestore)
+                    complete(auxiliary_path, filename)
+                finder.invalidate()
+    finally:
+        if storage is not None:
+            storage.wait()
+
+
+class BackgroundStorage(object):
+    """The provenance of the entities created from a file is generated and stored (see 'store_provenance') by
+    a child process while the following file is processed. The child process is forked, so that the GraphSet
+    doesn't need to be copied (where forking isn't supported, a thread is used instead).
+
+    Only one file at a time is handed over: the provenance counters are then updated in the same order as
+    in a sequential run, and each file is recorded as completed inside the auxiliary file (in the same order
+    as they were processed) only once its provenance was entirely stored."""
+
+    def __init__(self, auxiliary_path):
+        self.auxiliary_path = auxiliary_path
+        self.pending = None
+        if "fork" in multiprocessing.get_all_start_methods():
+            self.context = multiprocessing.get_context("fork")
+        else:
+            self.context = None
+
+    def submit(self, filename, creator):
+        self.wait()
+        if self.context is not None:
+            worker = self.context.Process(target=store_provenance, args=(filename, creator))
+            worker.start()
+        else:
+            worker = ThreadPoolExecutor(max_workers=1)
+            worker.future = worker.submit(store_provenance, filename, creator)
+        self.pending = (filename, worker)
+
+    def wait(self):
+        if self.pending is not None:
+            filename, worker = self.pending
+            self.pending = None
+            if self.context is not None:
+                worker.join()
+                if worker.exitcode != 0:
+                    raise RuntimeError(f"The provenance of '{filename}' could not be stored "
+                                       f"(exit code {worker.exitcode})")
             else:
-                res_storer.upload_and_store(
-                    base_dir, triplestore_url, base_iri, context_path, batch_size=100)
+                worker.shutdown()
+                worker.future.result()
+            complete(self.auxiliary_path, filename)
 
-                prov_storer.store_all(
-                    base_dir, base_iri, context_path)
 
-            with open(auxiliary_path, "a", encoding='utf-8') as aux_file:
-                aux_file.write(filename + "\n")
+def data_storer(creator):
+    return Storer(creator,
+                  context_map={},
+                  dir_split=dir_split_number,
+                  n_file_item=items_per_file,
+                  default_dir=default_dir,
+                  output_format='nt11')
+
+
+def store_rdf(filename, creator, triplestore):
+    store_data(filename, creator, triplestore)
+    store_provenance(filename, creator)
+
+
+def store_data(filename, creator, triplestore):
+    # The data is uploaded to the triplestore only once it's stored
+    res_storer = data_storer(creator)
+    if rdf_output_in_chunks:
+        f = os.path.join(base_dir, filename[:-4] + ".nt")
+        pathoo(f)
+        res_storer.store_graphs_in_file(f, context_path)
+        triplestore.upload(res_storer, base_dir, batch_size=100)
+    else:
+        triplestore.upload_and_store(res_storer, base_dir, base_iri, context_path, batch_size=100)
+
+
+def store_provenance(filename, creator):
+    creator_info_dir = os.path.join(info_dir, 'creator' + os.sep)
+    prov = ProvSet(creator, base_iri, creator_info_dir, wanted_label=False)
+
+    prov.generate_provenance()
+
+    prov_storer = Storer(prov,
+                         context_map={},
+                         dir_split=dir_split_number,
+                         n_file_item=items_per_file,
+                         output_format='nquads')
+
+    if rdf_output_in_chunks:
+        prov_dir = os.path.join(base_dir, 'prov' + os.sep)
+        f_prov = os.path.join(prov_dir, filename[:-4] + '.nq')
+        pathoo(f_prov)
+        prov_storer.store_graphs_in_file(f_prov, context_path)
+    else:
+        prov_storer.store_all(
+            base_dir, base_iri, context_path)
+
+
+def complete(auxiliary_path, filename):
+    with open(auxiliary_path, "a", encoding='utf-8') as aux_file:
+        aux_file.write(filename + "\n")
 
 
 def pathoo(path):
@@ -83,8 +175,7 @@ def pathoo(path):
 
 def unpack(path):
     with open(path, 'r', encoding="utf-8") as csvfile:
-        reader = csv.DictReader(csvfile, delimiter=",")
-        data = [dict(x) for x in reader]
+        data = read_rows(csvfile, delimiter=",")
     return data
 
 
@@ -106,6 +197,10 @@ if __name__ == "__main__":
     arg_parser.add_argument("-s", "--src", dest="source", required=False,
                             help="Data source, not mandatory")
 
+    arg_parser.add_argument("-p", "--pipeline", dest="pipeline", action="store_true", default=pipelined_storage,
+                            help="Store the RDF files of each CSV file while the following one is processed")
+
     args = arg_parser.parse_args()
 
-    process(args.crossref_csv_dir, args.csv_dir, args.index_dir, args.auxiliary_path, source=args.source)
+    process(args.crossref_csv_dir, args.csv_dir, args.index_dir, args.auxiliary_path, source=args.source,
+            pipeline=args.pipeline)
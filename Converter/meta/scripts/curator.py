@@ -3,16 +3,47 @@ import re
 import os
 import json
 from meta.lib.finder import *
+from meta.lib.counter import CounterAllocator
 from dateutil.parser import parse
 from datetime import datetime
 
 
+class Entity(object):
+    """An entry of brdict/radict (and of conflict_br/conflict_ra, brmeta/rameta): the identifiers of the entity,
+    the temporary names ("wannabe") of the entities merged into it and its title. Values are stored inside slots,
+    but they're accessed as in a dictionary (e.g. entity["ids"])."""
+    __slots__ = ("ids", "others", "title")
+
+    def __init__(self, title=""):
+        self.ids = list()
+        self.others = list()
+        self.title = title
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        setattr(self, key, value)
+
+
+class Log(dict):
+    """The log of the Curator: key row counter; value a dictionary for each column of the row. The entry of
+    a row is created the first time it's accessed, i.e. only for the rows which something is logged about."""
+    fields = ("id", "author", "venue", "editor", "publisher", "page", "volume", "issue", "pub_date", "type")
+
+    def __missing__(self, rowcnt):
+        entry = self[rowcnt] = {field: dict() for field in self.fields}
+        return entry
+
+
 class Curator:
 
-    def __init__(self, data, ts, info_dir, prefix="060", separator=None):
+    def __init__(self, data, ts, info_dir, prefix="060", separator=None, prefetch=True):
 
-        self.finder = ResourceFinder(ts)
+        # 'ts' is either the URL of the triplestore or a ResourceFinder shared between many Curator instances
+        self.finder = ts if isinstance(ts, ResourceFinder) else ResourceFinder(ts)
         self.separator = separator
+        self.prefetch_enabled = prefetch
         self.data = data
         self.prefix = prefix
 
@@ -22,6 +53,8 @@ class Curator:
         self.ra_info_path = info_dir + "ra.txt"
         self.ar_info_path = info_dir + "ar.txt"
         self.re_info_path = info_dir + "re.txt"
+        # key counter path; value CounterAllocator (see _add_number and flush_counters)
+        self.counters = dict()
 
         self.brdict = {}
         self.radict = {}
@@ -31,35 +64,38 @@ class Curator:
         self.idbr = {}  # key id; value metaid of id related to br
         self.conflict_br = {}
         self.conflict_ra = {}
+        # Reverse indexes: key id; value list of brdict/radict keys whose "ids" contain it.
+        # They may contain stale keys (merged or deleted entities), so every match must be verified.
+        self.id_index_br = {}
+        self.id_index_ra = {}
+        # key brdict/radict key; value the sequence number it was given when it was added (see 'add_entity'),
+        # so that the matches found through the reverse indexes can be sorted as the keys of the dictionaries
+        self.key_order_br = {}
+        self.key_order_ra = {}
+        self.key_cnt = 0
 
         self.rameta = dict()
         self.brmeta = dict()
         self.armeta = dict()
         self.remeta = dict()
+        # key wannabe; value meta of the entity which absorbed it (filled by meta_maker)
+        self.wannabe_br = dict()
+        self.wannabe_ra = dict()
 
         # wannabe counter
         self.wnb_cnt = 0
 
         self.rowcnt = 0
 
-        self.log = dict()
+        self.log = Log()
         self.new_sequence_list = list()
         self.data = data
 
     def curator(self, filename=None, path_csv=None, path_index=None):
+        if self.prefetch_enabled:
+            self.prefetch()
+
         for row in self.data:
-            self.log[self.rowcnt] = {
-                "id": {},
-                "author": {},
-                "venue": {},
-                "editor": {},
-                "publisher": {},
-                "page": {},
-                "volume": {},
-                "issue": {},
-                "pub_date": {},
-                "type": {}
-            }
             self.clean_id(row)
             self.rowcnt += 1
 
@@ -95,6 +131,82 @@ class Curator:
 
         self.filename = filename
         self.indexer(path_index, path_csv)
+        self.flush_counters()
+
+    # PREFETCH
+    def split_ids(self, ids):
+        if self.separator:
+            return re.sub(r'\s*:\s*', ':', ids).split(self.separator)
+        else:
+            return re.split(r'\s+', re.sub(r'\s*:\s*', ':', ids))
+
+    def prefetch(self):
+        # The identifiers of every row are looked up in the triplestore before cleaning the rows, by means of
+        # a few batched queries: the lookups performed while cleaning are then served by the cache of the finder
+        br_ids = list()
+        br_metas = list()
+        venue_metas = list()
+        ra_ids = list()
+        ra_metas = list()
+        for row in self.data:
+            if row["id"]:
+                idslist, metaval = self.clean_id_list(self.split_ids(row["id"]))
+                br_ids.extend(idslist)
+                if metaval:
+                    br_metas.append(metaval)
+            if row["venue"]:
+                venue_id = re.search(r'\[\s*(.*?)\s*]', row["venue"])
+                if venue_id:
+                    idslist, metaval = self.clean_id_list(self.split_ids(venue_id.group(1)))
+                    br_ids.extend(idslist)
+                    if metaval:
+                        venue_metas.append(metaval)
+            for col_name in ("author", "editor", "publisher"):
+                if row[col_name]:
+                    for ra in re.split(r'\s*;\s*(?=[^]]*(?:\[|$))', row[col_name]):
+                        ra_id = re.search(r'\[\s*(.*?)\s*]', ra)
+                        if ra_id:
+                            idslist, metaval = self.clean_id_list(self.split_ids(ra_id.group(1)), br=False)
+                            ra_ids.extend(idslist)
+                            if metaval:
+                                ra_metas.append(metaval)
+
+        self.finder.prefetch_br_from_id(br_ids)
+        self.finder.prefetch_ra_from_id(ra_ids)
+        self.finder.prefetch_br_from_meta(br_metas + venue_metas)
+        self.finder.prefetch_ra_from_meta(ra_metas)
+
+        # Entities which are already in the triplestore: their identifiers are looked up again
+        # (see 'id_worker'), their data is compared with the rows (see 'equalizer') and their
+        # venues and agents are reused (see 'clean_vvi' and 'clean_ra')
+        found_br_ids = list()
+        for identifier in set(br_ids):
+            schema, value = identifier.split(":", 1)
+            for meta, title, ids in self.finder.retrieve_br_from_id(value, schema) or []:
+                br_metas.append(meta)
+                found_br_ids.extend(x[1] for x in ids)
+        found_ra_ids = list()
+        for identifier in set(ra_ids):
+            schema, value = identifier.split(":", 1)
+            for meta, title, ids in self.finder.retrieve_ra_from_id(value, schema, False) or []:
+                ra_metas.append(meta)
+                found_ra_ids.extend(x[1] for x in ids)
+
+        self.finder.prefetch_br_from_id(found_br_ids)
+        self.finder.prefetch_ra_from_id(found_ra_ids)
+        # The identifiers of conflicting entities are looked up one by one (see 'conflict')
+        self.finder.prefetch_id(br_ids + ra_ids + found_br_ids + found_ra_ids)
+        self.finder.prefetch_br_from_meta(br_metas)
+        self.finder.prefetch_ra_from_meta(ra_metas)
+        self.finder.prefetch_br_info_from_meta(br_metas)
+        # The venues of the entities which are already in the triplestore, as well
+        for meta in br_metas:
+            br_info = self.finder.retrieve_br_info_from_meta(meta)
+            if br_info and br_info["venue"]:
+                venue_metas.append(re.search(r'\[meta:br/(.*?)]', br_info["venue"]).group(1))
+        self.finder.prefetch_venue_from_meta(br_metas + venue_metas)
+        for col_name in ("author", "editor", "publisher"):
+            self.finder.prefetch_ra_sequence_from_meta(br_metas, col_name)
 
     # ID
     def clean_id(self, row):
@@ -255,7 +367,8 @@ class Curator:
         if row[col_name]:
             # split authors by ";" outside "[]" (any spaces before and after ";")
             ra_list = re.split(r'\s*;\s*(?=[^]]*(?:\[|$))', row[col_name])
-            if row["id"] in self.brdict:
+            # conflict entities are added to brdict only once all the rows were cleaned
+            if row["id"] in self.brdict or row["id"] in self.conflict_br:
                 br_metaval = row["id"]
             else:
                 for x in self.brdict:
@@ -280,16 +393,13 @@ class Curator:
                             for k in x:
                                 sequence.append(tuple((k, x[k][2])))
                                 if x[k][2] not in self.radict:
-                                    self.radict[x[k][2]] = dict()
-                                    self.radict[x[k][2]]["ids"] = list()
-                                    self.radict[x[k][2]]["others"] = list()
-                                    self.radict[x[k][2]]["title"] = x[k][0]
+                                    self.add_entity(self.radict, x[k][2], Entity(x[k][0]))
                                 for i in x[k][1]:
                                     # other ids after meta
                                     if i[0] not in self.idra:
                                         self.idra[i[1]] = i[0]
                                     if i[1] not in self.radict[x[k][2]]["ids"]:
-                                        self.radict[x[k][2]]["ids"].append(i[1])
+                                        self.add_id(self.radict, x[k][2], i[1])
 
                         if br_metaval not in self.ardict:
                             self.ardict[br_metaval] = dict()
@@ -392,16 +502,19 @@ class Curator:
             self.ardict[br_metaval][col_name] = sequence
 
     def find_update_other_ID(self, list2match, metaval, dict2match, temporary_name):
-        found_others = self.local_match(list2match, dict2match)
+        id_index = self.get_id_index(dict2match)
+        found_others = self.local_match(list2match, dict2match, id_index, self.get_key_order(dict2match))
         if found_others["wannabe"]:
             for obj in found_others["wannabe"]:
-                self.update(dict2match, metaval, obj, temporary_name)
+                self.update(dict2match, metaval, obj, temporary_name, id_index)
 
     @staticmethod
-    def update(dict2match, metaval, old_meta, temporary_name):
+    def update(dict2match, metaval, old_meta, temporary_name, id_index=None):
         for x in dict2match[old_meta]["ids"]:
             if x not in dict2match[metaval]["ids"]:
                 dict2match[metaval]["ids"].append(x)
+                if id_index is not None:
+                    Curator.index_id(id_index, x, metaval)
 
         for x in dict2match[old_meta]["others"]:
             if x not in dict2match[metaval]["others"]:
@@ -463,8 +576,8 @@ class Curator:
         for identifier in idslist:
             entity_dict[metaval]["ids"].append(identifier)
             if identifier not in id_dict:
-                ids = identifier.split(":")
-                found_m = self.finder.retrieve_id(ids[0], ids[1])
+                schema, value = identifier.split(":", 1)
+                found_m = self.finder.retrieve_id(value, schema)
                 if found_m:
                     id_dict[identifier] = found_m
                 else:
@@ -478,9 +591,7 @@ class Curator:
         res = None
         for elem in list2find:
             if len(match_elem) < 2:
-                identifier = elem.split(":")
-                value = identifier[1]
-                schema = identifier[0]
+                schema, value = elem.split(":", 1)
                 if br:
                     res = self.finder.retrieve_br_from_id(value, schema)
                 elif ra:
@@ -503,29 +614,70 @@ class Curator:
                 ras_list.append(ra)
             row[col_name] = "; ".join(ras_list)
 
+    def get_id_index(self, entity_dict):
+        if entity_dict is self.brdict:
+            return self.id_index_br
+        elif entity_dict is self.radict:
+            return self.id_index_ra
+        return None
+
+    def get_key_order(self, entity_dict):
+        if entity_dict is self.brdict:
+            return self.key_order_br
+        elif entity_dict is self.radict:
+            return self.key_order_ra
+        return None
+
+    def add_entity(self, entity_dict, metaval, entity):
+        # every key added to brdict or radict must pass from here, so that 'local_match' keeps their order
+        if metaval not in entity_dict:
+            key_order = self.get_key_order(entity_dict)
+            if key_order is not None:
+                key_order[metaval] = self.key_cnt
+                self.key_cnt += 1
+        entity_dict[metaval] = entity
+
     @staticmethod
-    def local_match(list2match, dict2match):
+    def index_id(id_index, identifier, metaval):
+        keys = id_index.setdefault(identifier, list())
+        if metaval not in keys:
+            keys.append(metaval)
+
+    def add_id(self, entity_dict, metaval, identifier):
+        # every id added to brdict or radict must pass from here (or from 'update'), so that
+        # the reverse indexes used by 'local_match' never miss an entity
+        entity_dict[metaval]["ids"].append(identifier)
+        id_index = self.get_id_index(entity_dict)
+        if id_index is not None:
+            self.index_id(id_index, identifier, metaval)
+
+    @staticmethod
+    def local_match(list2match, dict2match, id_index=None, key_order=None):
         match_elem = dict()
         match_elem["existing"] = list()
         match_elem["wannabe"] = list()
         for elem in list2match:
-            for k, va in dict2match.items():
-                if elem in va["ids"]:
-                    if "wannabe" in k:
-                        if k not in match_elem["wannabe"]:
-                            match_elem["wannabe"].append(k)
-                    else:
-                        if k not in match_elem["existing"]:
-                            match_elem["existing"].append(k)
+            if id_index is None:
+                found = [k for k, va in dict2match.items() if elem in va["ids"]]
+            else:
+                found = [k for k in id_index.get(elem, ()) if k in dict2match and elem in dict2match[k]["ids"]]
+                if len(found) > 1:
+                    # same order as a scan of dict2match
+                    found.sort(key=key_order.__getitem__)
+            for k in found:
+                if "wannabe" in k:
+                    if k not in match_elem["wannabe"]:
+                        match_elem["wannabe"].append(k)
+                else:
+                    if k not in match_elem["existing"]:
+                        match_elem["existing"].append(k)
         return match_elem
 
     def meta_ar(self, newkey, oldkey, role):
         for x, k in self.ardict[oldkey][role]:
             if "wannabe" in k:
-                for m in self.rameta:
-                    if k in self.rameta[m]['others']:
-                        new_v = m
-                        break
+                if k in self.wannabe_ra:
+                    new_v = self.wannabe_ra[k]
             else:
                 new_v = k
             self.armeta[newkey][role].append(tuple((x, new_v)))
@@ -542,6 +694,7 @@ class Curator:
             else:
                 self.brmeta[x] = self.brdict[x]
                 self.brmeta[x]["ids"].append("meta:br/" + x)
+        self.wannabe_br = self.map_others(self.brmeta)
 
         for x in self.radict:
             if "wannabe" in x:
@@ -555,13 +708,12 @@ class Curator:
             else:
                 self.rameta[x] = self.radict[x]
                 self.rameta[x]["ids"].append("meta:ra/" + x)
+        self.wannabe_ra = self.map_others(self.rameta)
 
         for x in self.ardict:
             if "wannabe" in x:
-                for w in self.brmeta:
-                    if x in self.brmeta[w]["others"]:
-                        br_key = w
-                        break
+                if x in self.wannabe_br:
+                    br_key = self.wannabe_br[x]
             else:
                 br_key = x
 
@@ -574,12 +726,20 @@ class Curator:
             self.meta_ar(br_key, x, "editor")
             self.meta_ar(br_key, x, "publisher")
 
+    @staticmethod
+    def map_others(meta_dict):
+        # every wannabe is listed in the "others" of one entity at most
+        wannabe_map = dict()
+        for m in meta_dict:
+            for other in meta_dict[m]["others"]:
+                wannabe_map[other] = m
+        return wannabe_map
+
     def enrich(self):
         for row in self.data:
             if "wannabe" in row["id"]:
-                for i in self.brmeta:
-                    if row["id"] in self.brmeta[i]["others"]:
-                        k = i
+                if row["id"] in self.wannabe_br:
+                    k = self.wannabe_br[row["id"]]
             else:
                 k = row["id"]
 
@@ -605,9 +765,8 @@ class Curator:
             if row["venue"]:
                 venue = row["venue"]
                 if "wannabe" in venue:
-                    for i in self.brmeta:
-                        if venue in self.brmeta[i]["others"]:
-                            ve = i
+                    if venue in self.wannabe_br:
+                        ve = self.wannabe_br[venue]
                 else:
                     ve = venue
                 row["venue"] = self.brmeta[ve]["title"] + " [" + " ".join(self.brmeta[ve]["ids"]) + "]"
@@ -662,36 +821,14 @@ class Curator:
         newtitle = " ".join(words)
         return newtitle
 
-    @staticmethod
-    def _read_number(file_path, line_number=1):
-        cur_number = 0
-        try:
-            with open(file_path) as f:
-                cur_number = int(f.readlines()[line_number - 1])
-        except (ValueError, IOError, IndexError):
-            pass  # Do nothing
-        return cur_number
+    def _add_number(self, file_path, line_number=1):
+        if file_path not in self.counters:
+            self.counters[file_path] = CounterAllocator(file_path, line_number)
+        return self.counters[file_path].next()
 
-    @staticmethod
-    def _add_number(file_path, line_number=1):
-        cur_number = Curator._read_number(file_path, line_number) + 1
-        if not os.path.exists(os.path.dirname(file_path)):
-            os.makedirs(os.path.dirname(file_path))
-        if os.path.exists(file_path):
-            with open(file_path) as f:
-                all_lines = f.readlines()
-        else:
-            all_lines = []
-        line_len = len(all_lines)
-        zero_line_number = line_number - 1
-        for i in range(line_number):
-            if i >= line_len:
-                all_lines += ["\n"]
-            if i == zero_line_number:
-                all_lines[i] = str(cur_number) + "\n"
-        with open(file_path, "w") as f:
-            f.writelines(all_lines)
-        return cur_number
+    def flush_counters(self):
+        for counter in self.counters.values():
+            counter.flush()
 
     @staticmethod
     def write_csv(path, datalist):
@@ -771,26 +908,20 @@ class Curator:
             for x in self.vvi:
                 if self.vvi[x]["issue"]:
                     for iss in self.vvi[x]["issue"]:
-                        if "wannabe" in self.vvi[x]["issue"][iss]["id"]:
-                            for i in self.brmeta:
-                                if self.vvi[x]["issue"][iss]["id"] in self.brmeta[i]["others"]:
-                                    self.vvi[x]["issue"][iss]["id"] = str(i)
+                        if self.vvi[x]["issue"][iss]["id"] in self.wannabe_br:
+                            self.vvi[x]["issue"][iss]["id"] = str(self.wannabe_br[self.vvi[x]["issue"][iss]["id"]])
                 if self.vvi[x]["volume"]:
                     for vol in self.vvi[x]["volume"]:
-                        if "wannabe" in self.vvi[x]["volume"][vol]["id"]:
-                            for i in self.brmeta:
-                                if self.vvi[x]["volume"][vol]["id"] in self.brmeta[i]["others"]:
-                                    self.vvi[x]["volume"][vol]["id"] = str(i)
+                        if self.vvi[x]["volume"][vol]["id"] in self.wannabe_br:
+                            self.vvi[x]["volume"][vol]["id"] = str(self.wannabe_br[self.vvi[x]["volume"][vol]["id"]])
                         if self.vvi[x]["volume"][vol]["issue"]:
                             for iss in self.vvi[x]["volume"][vol]["issue"]:
-                                if "wannabe" in self.vvi[x]["volume"][vol]["issue"][iss]["id"]:
-                                    for i in self.brmeta:
-                                        if self.vvi[x]["volume"][vol]["issue"][iss]["id"] in self.brmeta[i]["others"]:
-                                            self.vvi[x]["volume"][vol]["issue"][iss]["id"] = str(i)
+                                issue_id = self.vvi[x]["volume"][vol]["issue"][iss]["id"]
+                                if issue_id in self.wannabe_br:
+                                    self.vvi[x]["volume"][vol]["issue"][iss]["id"] = str(self.wannabe_br[issue_id])
                 if "wannabe" in x:
-                    for i in self.brmeta:
-                        if x in self.brmeta[i]["others"]:
-                            self.VolIss[i] = self.vvi[x]
+                    if x in self.wannabe_br:
+                        self.VolIss[self.wannabe_br[x]] = self.vvi[x]
                 else:
                     self.VolIss[x] = self.vvi[x]
 
@@ -842,7 +973,7 @@ class Curator:
 
                 for identifier in idslist:
                     if identifier not in entity_dict[metaval]["ids"]:
-                        entity_dict[metaval]["ids"].append(identifier)
+                        self.add_id(entity_dict, metaval, identifier)
                     if identifier not in id_dict:
                         count = self._add_number(self.id_info_path)
                         id_dict[identifier] = self.prefix + str(count)
@@ -859,19 +990,17 @@ class Curator:
 
                 # meta in triplestore
                 if found_meta_ts:
-                    entity_dict[metaval] = dict()
-                    entity_dict[metaval]["ids"] = list()
+                    self.add_entity(entity_dict, metaval, Entity())
                     if col_name == "author" or col_name == "editor":
                         entity_dict[metaval]["title"] = self.name_check(found_meta_ts[0], name)
                     else:
                         entity_dict[metaval]["title"] = found_meta_ts[0]
-                    entity_dict[metaval]["others"] = list()
 
                     self.find_update_other_ID(idslist, metaval, entity_dict, name)
 
                     for identifier in idslist:
                         if identifier not in entity_dict[metaval]["ids"]:
-                            entity_dict[metaval]["ids"].append(identifier)
+                            self.add_id(entity_dict, metaval, identifier)
                         if identifier not in id_dict:
                             count = self._add_number(self.id_info_path)
                             id_dict[identifier] = self.prefix + str(count)
@@ -882,7 +1011,7 @@ class Curator:
                         if identifier[1] not in id_dict:
                             id_dict[identifier[1]] = identifier[0]
                         if identifier[1] not in entity_dict[metaval]["ids"]:
-                            entity_dict[metaval]["ids"].append(identifier[1])
+                            self.add_id(entity_dict, metaval, identifier[1])
 
                     if not entity_dict[metaval]["title"] and name:
                         entity_dict[metaval]["title"] = name
@@ -893,7 +1022,8 @@ class Curator:
 
         # there's no meta or there was one but it didn't exist
         if idslist and not metaval:
-            local_match = self.local_match(idslist, entity_dict)
+            local_match = self.local_match(idslist, entity_dict, self.get_id_index(entity_dict),
+                                           self.get_key_order(entity_dict))
             # check in entity_dict
             if local_match["existing"]:
                 # ids refer to multiple existing entities
@@ -921,7 +1051,7 @@ class Curator:
                 for obj in local_match["wannabe"]:
                     for x in entity_dict[obj]["ids"]:
                         if x not in entity_dict[metaval]["ids"]:
-                            entity_dict[metaval]["ids"].append(x)
+                            self.add_id(entity_dict, metaval, x)
 
                     for x in entity_dict[obj]["others"]:
                         if x not in entity_dict[metaval]["others"]:
@@ -955,13 +1085,10 @@ class Curator:
                             else:
                                 old_metaval = metaval
                                 metaval = sparql_match[0][0]
-                                entity_dict[metaval] = dict()
-                                entity_dict[metaval]["ids"] = list()
-                                entity_dict[metaval]["others"] = list()
-                                entity_dict[metaval]["title"] = ""
+                                self.add_entity(entity_dict, metaval, Entity())
                                 for x in entity_dict[old_metaval]["ids"]:
                                     if x not in entity_dict[metaval]["ids"]:
-                                        entity_dict[metaval]["ids"].append(x)
+                                        self.add_id(entity_dict, metaval, x)
 
                                 for x in entity_dict[old_metaval]["others"]:
                                     if x not in entity_dict[metaval]["others"]:
@@ -980,7 +1107,7 @@ class Curator:
                                     if identifier[1] not in id_dict:
                                         id_dict[identifier[1]] = identifier[0]
                                     if identifier[1] not in entity_dict[metaval]["ids"]:
-                                        entity_dict[metaval]["ids"].append(identifier[1])
+                                        self.add_id(entity_dict, metaval, identifier[1])
 
             else:
                 sparql_match = self.finder_sparql(idslist, br=br_ent, ra=ra_ent, vvi=vvi_ent, publ=publ_entity)
@@ -995,9 +1122,7 @@ class Curator:
                         return self.conflict(idslist, name, id_dict, col_name)
                     elif len(new_sparql_match) == 1:
                         metaval = sparql_match[0][0]
-                        entity_dict[metaval] = dict()
-                        entity_dict[metaval]["ids"] = list()
-                        entity_dict[metaval]["others"] = list()
+                        self.add_entity(entity_dict, metaval, Entity())
                         if col_name == "author" or col_name == "editor":
                             entity_dict[metaval]["title"] = self.name_check(sparql_match[0][1], name)
                         else:
@@ -1010,7 +1135,7 @@ class Curator:
                             if identifier[1] not in id_dict:
                                 id_dict[identifier[1]] = identifier[0]
                             if identifier[1] not in entity_dict[metaval]["ids"]:
-                                entity_dict[metaval]["ids"].append(identifier[1])
+                                self.add_id(entity_dict, metaval, identifier[1])
 
                 else:
                     metaval = self.new_entity(entity_dict, name)
@@ -1021,7 +1146,7 @@ class Curator:
                     id_dict[identifier] = self.prefix + str(count)
 
                 if identifier not in entity_dict[metaval]["ids"]:
-                    entity_dict[metaval]["ids"].append(identifier)
+                    self.add_id(entity_dict, metaval, identifier)
 
             if not entity_dict[metaval]["title"] and name:
                 entity_dict[metaval]["title"] = name
@@ -1034,10 +1159,7 @@ class Curator:
     def new_entity(self, entity_dict, name):
         metaval = "wannabe_" + str(self.wnb_cnt)
         self.wnb_cnt += 1
-        entity_dict[metaval] = dict()
-        entity_dict[metaval]["ids"] = list()
-        entity_dict[metaval]["others"] = list()
-        entity_dict[metaval]["title"] = name
+        self.add_entity(entity_dict, metaval, Entity(name))
 
         return metaval
 
@@ -1046,7 +1168,7 @@ class Curator:
             if value in path:
                 if "wannabe" in path[value]["id"]:
                     old_meta = path[value]["id"]
-                    self.update(self.brdict, meta, old_meta, row["title"])
+                    self.update(self.brdict, meta, old_meta, row["title"], self.id_index_br)
                     path[value]["id"] = meta
             else:
                 path[value] = dict()
@@ -1058,23 +1180,20 @@ class Curator:
                 if "wannabe" in path[value]["id"]:
                     old_meta = path[value]["id"]
                     if meta != old_meta:
-                        self.update(self.brdict, meta, old_meta, row["title"])
+                        self.update(self.brdict, meta, old_meta, row["title"], self.id_index_br)
                         path[value]["id"] = meta
                 else:
                     old_meta = path[value]["id"]
                     if "wannabe" not in old_meta and old_meta not in self.brdict:
                         br4dict = self.finder.retrieve_br_from_meta(old_meta)
-                        self.brdict[old_meta] = dict()
-                        self.brdict[old_meta]['ids'] = list()
-                        self.brdict[old_meta]['others'] = list()
-                        self.brdict[old_meta]['title'] = br4dict[0]
+                        self.add_entity(self.brdict, old_meta, Entity(br4dict[0]))
                         for x in br4dict[1]:
                             identifier = x[1]
-                            self.brdict[old_meta]['ids'].append(identifier)
+                            self.add_id(self.brdict, old_meta, identifier)
                             if identifier not in self.idbr:
                                 self.idbr[identifier] = x[0]
 
-                    self.update(self.brdict, old_meta, meta, row["title"])
+                    self.update(self.brdict, old_meta, meta, row["title"], self.id_index_br)
             else:
                 path[value] = dict()
                 path[value]["id"] = meta
@@ -1083,29 +1202,26 @@ class Curator:
 
     def log_update(self):
         new_log = dict()
-        for x in self.log:
+        for x in sorted(self.log):
             if any(self.log[x][y].values() for y in self.log[x]):
                 for y in self.log[x]:
                     if "Conflict Entity" in self.log[x][y]:
                         v = self.log[x][y]["Conflict Entity"]
                         if "wannabe" in v:
                             if y == "id" or y == "venue":
-                                for brm in self.brmeta:
-                                    if v in self.brmeta[brm]["others"]:
-                                        m = "br/" + str(brm)
+                                if v in self.wannabe_br:
+                                    m = "br/" + str(self.wannabe_br[v])
                             elif y == "author" or y == "editor" or y == "publisher":
-                                for ram in self.rameta:
-                                    if v in self.rameta[ram]["others"]:
-                                        m = "ra/" + str(ram)
+                                if v in self.wannabe_ra:
+                                    m = "ra/" + str(self.wannabe_ra[v])
                         else:
                             m = v
                         self.log[x][y]["Conflict Entity"] = m
                 new_log[x] = self.log[x]
 
                 if "wannabe" in self.data[x]["id"]:
-                    for brm in self.brmeta:
-                        if self.data[x]["id"] in self.brmeta[brm]["others"]:
-                            met = "br/" + str(brm)
+                    if self.data[x]["id"] in self.wannabe_br:
+                        met = "br/" + str(self.wannabe_br[self.data[x]["id"]])
                 else:
                     met = "br/" + str(self.data[x]["id"])
                 new_log[x]["id"]["meta"] = met
@@ -1139,43 +1255,44 @@ class Curator:
         return clean_date
 
     def check_equality(self):
-        partialcnt = 0
-        for row in self.data:
+        # wannabe merged into an existing entity --> meta of the (first) existing entity
+        merged_into = dict()
+        for i in self.brdict:
+            if "wannabe" not in i:
+                for other in self.brdict[i]["others"]:
+                    merged_into.setdefault(other, i)
+
+        # rows sharing the same wannabe id, in order of appearance
+        same_id_rows = dict()
+        stop = len(self.data)
+        for rowcnt, row in enumerate(self.data):
             if "wannabe" in row["id"]:
-                for i in self.brdict:
-                    if row["id"] in self.brdict[i]["others"] and "wannabe" not in i:
-                        row["id"] = i
-                        self.equalizer(row, i)
-                        return
-                other_rowcnt = 0
-                for other_row in self.data:
-                    if other_row["id"] == row["id"] and partialcnt != other_rowcnt:
-                        if row["pub_date"] and row["pub_date"] != other_row["pub_date"]:
-                            if other_row["pub_date"]:
-                                self.log[other_rowcnt]["pub_date"]["status"] = "NEW VALUE PROPOSED"
-                            other_row["pub_date"] = row["pub_date"]
-                        if row["page"] and row["page"] != other_row["page"]:
-                            if other_row["page"]:
-                                self.log[other_rowcnt]["page"]["status"] = "NEW VALUE PROPOSED"
-                            other_row["page"] = row["page"]
-                        if row["type"] and row["type"] != other_row["type"]:
-                            if other_row["type"]:
-                                self.log[other_rowcnt]["type"]["status"] = "NEW VALUE PROPOSED"
-                            other_row["type"] = row["type"]
-                        if row["venue"] and row["venue"] != other_row["venue"]:
-                            if other_row["venue"]:
-                                self.log[other_rowcnt]["venue"]["status"] = "NEW VALUE PROPOSED"
-                            other_row["venue"] = row["venue"]
-                        if row["volume"] and row["volume"] != other_row["volume"]:
-                            if other_row["volume"]:
-                                self.log[other_rowcnt]["volume"]["status"] = "NEW VALUE PROPOSED"
-                            other_row["volume"] = row["volume"]
-                        if row["issue"] and row["issue"] != other_row["issue"]:
-                            if other_row["issue"]:
-                                self.log[other_rowcnt]["issue"]["status"] = "NEW VALUE PROPOSED"
-                            other_row["issue"] = row["issue"]
-                    other_rowcnt += 1
-            partialcnt += 1
+                if row["id"] in merged_into and stop == len(self.data):
+                    # the first row referring to an existing entity ends the propagation
+                    stop = rowcnt
+                same_id_rows.setdefault(row["id"], list()).append(rowcnt)
+
+        for rows in same_id_rows.values():
+            if len(rows) < 2:
+                continue
+            for field in ("pub_date", "page", "type", "venue", "volume", "issue"):
+                # the first row having a value proposes it to all the other ones: from then on,
+                # they share the same value and no following row can change it anymore
+                source = next((x for x in rows if x < stop and self.data[x][field]), None)
+                if source is None:
+                    continue
+                value = self.data[source][field]
+                for other_rowcnt in rows:
+                    other_row = self.data[other_rowcnt]
+                    if other_rowcnt != source and other_row[field] != value:
+                        if other_row[field]:
+                            self.log[other_rowcnt][field]["status"] = "NEW VALUE PROPOSED"
+                        other_row[field] = value
+
+        if stop < len(self.data):
+            row = self.data[stop]
+            row["id"] = merged_into[row["id"]]
+            self.equalizer(row, row["id"])
 
     def equalizer(self, row, metaval):
         self.log[self.rowcnt]["id"]["status"] = "ENTITY ALREADY EXISTS"
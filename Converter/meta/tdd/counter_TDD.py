@@ -0,0 +1,63 @@
+import unittest
+import os
+import tempfile
+from meta.lib.counter import CounterAllocator
+
+
+def read_lines(path):
+    with open(path) as f:
+        return f.readlines()
+
+
+class CounterAllocatorTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "info", "br.txt")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_sequence_and_flush(self):
+        counter = CounterAllocator(self.path, block_size=10)
+        self.assertEqual([counter.next() for _ in range(3)], [1, 2, 3])
+        # The whole block is reserved on disk:
+        self.assertEqual(read_lines(self.path), ["10\n"])
+        counter.flush()
+        self.assertEqual(read_lines(self.path), ["3\n"])
+        self.assertFalse(os.path.exists(self.path + ".tmp"))
+
+        # A new allocator continues from the flushed value:
+        counter = CounterAllocator(self.path, block_size=10)
+        self.assertEqual([counter.next() for _ in range(12)], list(range(4, 16)))
+        self.assertEqual(read_lines(self.path), ["23\n"])
+        counter.flush()
+        self.assertEqual(read_lines(self.path), ["15\n"])
+
+    def test_crash_recovery(self):
+        counter = CounterAllocator(self.path, block_size=5)
+        used = [counter.next() for _ in range(7)]
+        # No flush: the process is supposed to crash here
+        counter = CounterAllocator(self.path, block_size=5)
+        self.assertTrue(counter.next() > max(used))
+
+    def test_other_lines_are_preserved(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "w") as f:
+            f.write("7\n42\n")
+        counter = CounterAllocator(self.path, line_number=2, block_size=3)
+        self.assertEqual(counter.next(), 43)
+        counter.flush()
+        self.assertEqual(read_lines(self.path), ["7\n", "43\n"])
+
+    def test_invalid_content(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "w") as f:
+            f.write("not a number")
+        counter = CounterAllocator(self.path)
+        self.assertEqual(counter.next(), 1)
+        with self.assertRaises(ValueError):
+            CounterAllocator(self.path, block_size=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
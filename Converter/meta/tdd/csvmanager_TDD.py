@@ -0,0 +1,74 @@
+import unittest
+import multiprocessing
+import os
+import tempfile
+from meta.lib.csvmanager import CSVManager, SQLiteManager, get_csv_manager
+
+
+def read_value(manager, id_string, queue):
+    queue.put(manager.get_value(id_string))
+
+
+class SQLiteManagerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "index.db")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_get_add_value(self):
+        with SQLiteManager(self.db_path, commit_threshold=2) as manager:
+            self.assertIsNone(manager.get_value("10.1/a"))
+            for value in ("Doe, J [0000-0001]", "Doe, J [0000-0001]", "Roe, R [0000-0002]"):
+                manager.add_value("10.1/a", value)
+            manager.add_value("10.1/b", 'A "quoted", value')
+            self.assertEqual(manager.get_value("10.1/a"), {"Doe, J [0000-0001]", "Roe, R [0000-0002]"})
+
+        # Values are persisted
+        with SQLiteManager(self.db_path) as manager:
+            self.assertEqual(manager.get_value("10.1/a"), {"Doe, J [0000-0001]", "Roe, R [0000-0002]"})
+            self.assertEqual(manager.get_value("10.1/b"), {'A "quoted", value'})
+
+    def test_load_csv(self):
+        csv_path = os.path.join(self.tmp_dir.name, "index.csv")
+        csv_manager = CSVManager(csv_path)
+        for n in range(50):
+            csv_manager.add_value("10.1/%d" % (n % 7), 'Name, "%d" [0000-%d]' % (n, n))
+
+        with SQLiteManager(self.db_path) as manager:
+            manager.load_csv(csv_path)
+            for n in range(8):
+                self.assertEqual(manager.get_value("10.1/%d" % n), CSVManager(csv_path).get_value("10.1/%d" % n))
+
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "fork is not available")
+    def test_forked_reader(self):
+        manager = SQLiteManager(self.db_path)
+        manager.add_value("10.1/a", "v")
+        manager.flush()
+        queue = multiprocessing.get_context("fork").Queue()
+        process = multiprocessing.get_context("fork").Process(target=read_value, args=(manager, "10.1/a", queue))
+        process.start()
+        self.assertEqual(queue.get(timeout=30), {"v"})
+        process.join()
+        # The connection of this process still works
+        self.assertEqual(manager.get_value("10.1/a"), {"v"})
+        manager.close()
+
+    def test_get_csv_manager(self):
+        self.assertIsInstance(get_csv_manager(self.db_path), SQLiteManager)
+        self.assertIsInstance(get_csv_manager(os.path.join(self.tmp_dir.name, "index.csv")), CSVManager)
+        self.assertIsInstance(get_csv_manager(None, store_new=False), CSVManager)
+
+        # The parameters of CSVManager are accepted by SQLiteManager too
+        with get_csv_manager(self.db_path, store_new=False, line_threshold=5) as manager:
+            self.assertIsInstance(manager, SQLiteManager)
+            manager.add_value("10.1/a", "v")
+            manager.flush()
+            self.assertEqual(manager.get_value("10.1/a"), {"v"})
+        with get_csv_manager(self.db_path) as manager:
+            self.assertIsNone(manager.get_value("10.1/a"))
+
+
+if __name__ == '__main__':
+    unittest.main()
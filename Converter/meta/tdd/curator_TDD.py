@@ -2,6 +2,7 @@ import unittest
 from meta.scripts.curator import *
 import csv
 from SPARQLWrapper import SPARQLWrapper
+from pymantic import sparql
 import os
 
 
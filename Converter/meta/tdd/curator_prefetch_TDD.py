@@ -0,0 +1,107 @@
+import unittest
+import os
+import tempfile
+from rdflib import URIRef
+from meta.lib.triplestore import LocalTriplestore
+from meta.scripts.curator import Curator, Entity
+
+base_iri = "https://w3id.org/oc/meta/"
+ts_data = os.path.join("meta", "tdd", "testcases", "ts", "testcase_ts-13.ttl")
+columns = ("id", "title", "author", "pub_date", "venue", "volume", "issue", "page", "type", "publisher", "editor")
+
+
+def row(**values):
+    return {column: values.get(column, "") for column in columns}
+
+
+data = [
+    row(id="doi:1", title="Title1", author="Surname1, Name1 [viaf:1]; Surname3, Name3 [viaf:3]",
+        venue="Venue1 [doi:301]", volume="1", issue="5-6", page="266-278", type="journal article"),
+    row(id="doi:10.1/a:b doi:3", title="Title3", author="Surname2, Name2 [viaf:2]", type="journal article"),
+    row(id="meta:br/060102", title="Title2", editor="Surname1, Name1 [viaf:1 orcid:0000-0001]"),
+    row(id="doi:10.1/a:b", title="Title3", publisher="Publisher [crossref:10]")
+]
+
+
+class CountingTriplestore(LocalTriplestore):
+    # It keeps track of the queries it receives
+    def __init__(self):
+        super(CountingTriplestore, self).__init__()
+        self.graph.get_context(URIRef(base_iri + "br/")).parse(ts_data, format="turtle")
+        self.queries = list()
+
+    def query(self, query_string):
+        self.queries.append(query_string)
+        return super(CountingTriplestore, self).query(query_string)
+
+
+class CuratorPrefetchTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def curate(self, name, prefetch):
+        info_dir = os.path.join(self.tmp_dir.name, name) + os.sep
+        os.makedirs(info_dir)
+        ts = CountingTriplestore()
+        curator = Curator([dict(r) for r in data], ts, info_dir=info_dir, prefix="060", prefetch=prefetch)
+        return curator, ts
+
+    def test_no_queries_after_prefetch(self):
+        curator, ts = self.curate("prefetch", True)
+        curator.prefetch()
+        self.assertGreater(len(ts.queries), 0)
+        queries = len(ts.queries)
+        # The lookups performed while cleaning the rows are all served by the cache of the finder
+        curator.prefetch_enabled = False
+        curator.rowcnt = 0
+        for r in curator.data:
+            curator.clean_id(r)
+            curator.rowcnt += 1
+        curator.rowcnt = 0
+        for r in curator.data:
+            curator.clean_vvi(r)
+            curator.rowcnt += 1
+        curator.rowcnt = 0
+        for r in curator.data:
+            for col_name in ("author", "publisher", "editor"):
+                curator.clean_ra(r, col_name)
+            curator.rowcnt += 1
+        self.assertEqual(ts.queries[queries:], [])
+
+    def test_same_output(self):
+        results = list()
+        for prefetch in (True, False):
+            curator, ts = self.curate(str(prefetch), prefetch)
+            curator.curator()
+            brmeta, rameta = (dict((k, (e.ids, e.others, e.title)) for k, e in entities.items())
+                              for entities in (curator.brmeta, curator.rameta))
+            results.append((curator.data, curator.log, brmeta, rameta, curator.armeta, curator.remeta,
+                            curator.vvi, curator.idbr, curator.idra))
+        self.assertEqual(results[0], results[1])
+        # The identifier containing a colon is looked up as a whole
+        self.assertIn("doi:10.1/a:b", results[0][7])
+
+    def test_local_match_order(self):
+        # The matches found through the reverse index are sorted as a scan of brdict would find them,
+        # even when keys are deleted and added again
+        curator, ts = self.curate("local_match", False)
+        for name in ("A", "B", "C"):
+            curator.new_entity(curator.brdict, name)
+        for key in ("wannabe_2", "wannabe_0", "wannabe_1"):
+            curator.add_id(curator.brdict, key, "doi:10.1/x")
+        curator.update(curator.brdict, "wannabe_2", "wannabe_0", "", curator.id_index_br)
+        curator.add_entity(curator.brdict, "wannabe_0", Entity("A"))
+        curator.add_id(curator.brdict, "wannabe_0", "doi:10.1/x")
+        curator.add_entity(curator.brdict, "0601", Entity("D"))
+        curator.add_id(curator.brdict, "0601", "doi:10.1/x")
+        scan = curator.local_match(["doi:10.1/x"], curator.brdict)
+        self.assertEqual(scan["wannabe"], ["wannabe_1", "wannabe_2", "wannabe_0"])
+        self.assertEqual(curator.local_match(["doi:10.1/x"], curator.brdict, curator.id_index_br,
+                                             curator.key_order_br), scan)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import unittest
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+from meta.lib.id_manager.doimanager import DOIManager, HandleAPI
+
+existing = {"10.1/abc", "10.1/d(e)f"}
+
+
+class StubAPI(object):
+    def __init__(self):
+        self.checked = []
+        self.lock = threading.Lock()
+
+    def exists(self, doi):
+        with self.lock:
+            self.checked.append(doi)
+        time.sleep(0.05)
+        if doi.startswith("10.1/unknown"):
+            return None  # No definitive answer
+        return doi in existing
+
+
+class HandleRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        doi = unquote(self.path[len("/api/handles/"):])
+        if doi.startswith("10.1/unknown"):
+            self.send_error(503)
+            return
+        found = doi in existing
+        body = json.dumps({"responseCode": 1 if found else 100, "handle": doi}).encode("utf-8")
+        self.send_response(200 if found else 404)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class DOIManagerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmp_dir.name, "valid_doi.db")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_validate_many(self):
+        api = StubAPI()
+        doi_manager = DOIManager(self.cache_path, api=api)
+        start = time.time()
+        result = doi_manager.validate_many(["doi:10.1/ABC", "https://doi.org/10.1/abc", "10.1/d(e)f", "10.1/missing",
+                                            "not a doi"] + ["10.1/other.%d" % n for n in range(16)], workers=8)
+        # The unknown DOIs are checked concurrently and only once
+        self.assertLess(time.time() - start, 0.05 * 17 / 2)
+        self.assertEqual(sorted(api.checked), sorted(["10.1/abc", "10.1/d(e)f", "10.1/missing"] +
+                                                     ["10.1/other.%d" % n for n in range(16)]))
+        self.assertEqual({k: v for k, v in result.items() if v}, {"doi:10.1/ABC": True,
+                                                                  "https://doi.org/10.1/abc": True,
+                                                                  "10.1/d(e)f": True})
+        self.assertFalse(result["not a doi"])
+        self.assertEqual(len(result), 21)
+
+        # Results are persisted
+        api = StubAPI()
+        doi_manager = DOIManager(self.cache_path, api=api)
+        self.assertEqual(doi_manager.validate_many(["10.1/abc", "10.1/missing"]), {"10.1/abc": True,
+                                                                                 "10.1/missing": False})
+        self.assertTrue(doi_manager.is_valid("doi:10.1/d(e)f"))
+        self.assertEqual(api.checked, [])
+
+    def test_inconclusive(self):
+        # DOIs the API gave no answer about are invalid, but they're checked again next time
+        api = StubAPI()
+        doi_manager = DOIManager(self.cache_path, api=api)
+        self.assertEqual(doi_manager.validate_many(["10.1/abc", "10.1/unknown.1"]), {"10.1/abc": True,
+                                                                                    "10.1/unknown.1": False})
+        self.assertFalse(doi_manager.is_valid("10.1/unknown.2"))
+        api = StubAPI()
+        doi_manager = DOIManager(self.cache_path, api=api)
+        self.assertEqual(doi_manager.validate_many(["10.1/abc", "10.1/unknown.1", "10.1/unknown.2"]),
+                         {"10.1/abc": True, "10.1/unknown.1": False, "10.1/unknown.2": False})
+        self.assertEqual(sorted(api.checked), ["10.1/unknown.1", "10.1/unknown.2"])
+
+    def test_handle_api(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), HandleRequestHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            api = HandleAPI(url="http://127.0.0.1:%d/api/handles/" % server.server_port, rate_limit=20)
+            doi_manager = DOIManager(api=api)
+            start = time.time()
+            result = doi_manager.validate_many(["10.1/abc", "10.1/d(e)f", "10.1/missing", "10.1/other"], workers=4)
+            # At most 20 requests per second
+            self.assertGreaterEqual(time.time() - start, 3 / 20)
+            self.assertEqual(result, {"10.1/abc": True, "10.1/d(e)f": True, "10.1/missing": False,
+                                      "10.1/other": False})
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_handle_api_errors(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), HandleRequestHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            api = HandleAPI(url="http://127.0.0.1:%d/api/handles/" % server.server_port, rate_limit=0)
+            self.assertTrue(api.exists("10.1/abc"))
+            self.assertFalse(api.exists("10.1/missing"))
+            self.assertIsNone(api.exists("10.1/unknown"))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        # Nothing listens on this port: connection errors don't stop the other checks
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        api = HandleAPI(url="http://127.0.0.1:%d/api/handles/" % port, rate_limit=0)
+        doi_manager = DOIManager(self.cache_path, api=api)
+        self.assertEqual(doi_manager.validate_many(["10.1/abc", "10.1/def"]), {"10.1/abc": False, "10.1/def": False})
+        self.assertIsNone(doi_manager.valid_doi.get_value("doi:10.1/abc"))
+
+
+if __name__ == '__main__':
+    unittest.main()
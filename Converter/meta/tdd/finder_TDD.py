@@ -0,0 +1,70 @@
+import unittest
+from meta.lib.finder import LRUCache, ResourceFinder
+
+
+class RecordingServer(object):
+    # It answers every query with the given bindings, keeping track of the queries it receives
+    def __init__(self, bindings):
+        self.bindings = bindings
+        self.queries = list()
+
+    def query(self, query):
+        self.queries.append(query)
+        return {"results": {"bindings": self.bindings}}
+
+
+def re_binding(meta, re, sp, ep):
+    return {"res": {"value": "https://w3id.org/oc/meta/br/" + meta},
+            "re": {"value": "https://w3id.org/oc/meta/re/" + re},
+            "sp": {"value": sp}, "ep": {"value": ep}}
+
+
+class LRUCacheTest(unittest.TestCase):
+    def test_eviction(self):
+        cache = LRUCache(2)
+        cache["a"] = 1
+        cache["b"] = 2
+        self.assertEqual(cache["a"], 1)  # "b" is now the least recently used item
+        cache["c"] = 3
+        self.assertTrue("a" in cache and "c" in cache)
+        self.assertFalse("b" in cache)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+
+class ResourceFinderTest(unittest.TestCase):
+    def setUp(self):
+        self.finder = ResourceFinder("http://127.0.0.1:9999/blazegraph/sparql", batch_size=2)
+        self.server = RecordingServer([re_binding("0601", "0602", "1", "10"), re_binding("0603", "0604", "5", "6")])
+        self.finder.ts = self.server
+
+    def test_prefetch_in_batches(self):
+        self.finder.prefetch_re_from_meta(["0601", "0603", "0605", "0601"])
+        # 3 distinct meta ids, 2 per query:
+        self.assertEqual(len(self.server.queries), 2)
+        self.assertIn("VALUES ?res {<https://w3id.org/oc/meta/br/0601> <https://w3id.org/oc/meta/br/0603>}",
+                      self.server.queries[0])
+
+        self.assertEqual(self.finder.re_from_meta("0601"), ("0602", "1-10"))
+        self.assertEqual(self.finder.re_from_meta("0603"), ("0604", "5-6"))
+        # Missing results are cached too:
+        self.assertIsNone(self.finder.re_from_meta("0605"))
+        self.assertEqual(len(self.server.queries), 2)
+
+    def test_invalidate(self):
+        self.assertEqual(self.finder.re_from_meta("0601"), ("0602", "1-10"))
+        self.assertEqual(self.finder.re_from_meta("0601"), ("0602", "1-10"))
+        self.assertEqual(len(self.server.queries), 1)
+        self.finder.invalidate()
+        self.server.bindings = list()
+        self.assertIsNone(self.finder.re_from_meta("0601"))
+        self.assertEqual(len(self.server.queries), 2)
+
+    def test_literals_are_escaped(self):
+        self.server.bindings = list()
+        self.assertIsNone(self.finder.retrieve_id('a"b\\c', "doi"))
+        self.assertIn('"a\\"b\\\\c"', self.server.queries[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
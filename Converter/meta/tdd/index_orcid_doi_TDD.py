@@ -0,0 +1,91 @@
+import unittest
+import csv
+import os
+import tarfile
+import tempfile
+from meta.orcid.index_orcid_doi import index_orcid_doi
+
+summary = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<record:record xmlns:common="http://www.orcid.org/ns/common" xmlns:record="http://www.orcid.org/ns/record"
+    xmlns:person="http://www.orcid.org/ns/person" xmlns:personal-details="http://www.orcid.org/ns/personal-details"
+    xmlns:activities="http://www.orcid.org/ns/activities">
+    <person:person>
+        <person:name>%s</person:name>
+    </person:person>
+    <activities:activities-summary>%s</activities:activities-summary>
+</record:record>
+'''
+work = '''<common:external-ids><common:external-id>
+    <common:external-id-type>%s</common:external-id-type>
+    <common:external-id-value>%s</common:external-id-value>
+    <common:external-id-relationship>%s</common:external-id-relationship>
+</common:external-id></common:external-ids>'''
+given = "<personal-details:given-names>%s</personal-details:given-names>"
+family = "<personal-details:family-name>%s</personal-details:family-name>"
+
+summaries = {
+    "0000-0001-0000-0001": summary % (given % "John" + family % "Doe",
+                                      work % ("doi", "https://doi.org/10.1/ABC", "self") +
+                                      work % ("DOI", "10.1/def", "SELF") +
+                                      work % ("doi", "10.1/part", "part-of") +
+                                      work % ("isbn", "9780521560245", "self")),
+    "0000-0001-0000-0002": summary % (family % "Roe", work % ("doi", "10.1/abc", "self")),
+    "0000-0001-0000-0003": summary % (given % "No family name", work % ("doi", "10.1/ghi", "self")),
+}
+expected = {("10.1/abc", "Doe, John [0000-0001-0000-0001]"), ("10.1/def", "Doe, John [0000-0001-0000-0001]"),
+            ("10.1/abc", "Roe [0000-0001-0000-0002]")}
+
+
+def read_index(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        rows = csv.reader(f)
+        next(rows)
+        return {tuple(row) for row in rows}
+
+
+class IndexOrcidDoiTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.summaries_dir = os.path.join(self.tmp_dir.name, "summaries")
+        for orcid, content in summaries.items():
+            path = os.path.join(self.summaries_dir, orcid[-3:], orcid + ".xml")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_folder_and_tar(self):
+        tar_path = os.path.join(self.tmp_dir.name, "summaries.tar.gz")
+        with tarfile.open(tar_path, "w:gz") as archive:
+            archive.add(self.summaries_dir, arcname="summaries")
+
+        for n, (summaries_path, workers) in enumerate(((self.summaries_dir, 1), (self.summaries_dir, 2),
+                                                       (tar_path, 1), (tar_path, 2))):
+            csv_path = os.path.join(self.tmp_dir.name, "index_%d" % n, "orcid.csv")
+            index_orcid_doi(csv_path, workers=workers, batch_size=1).finder(summaries_path)
+            self.assertEqual(read_index(csv_path), expected)
+            self.assertFalse(os.path.exists(csv_path + ".shards"))
+
+    def test_incremental(self):
+        csv_path = os.path.join(self.tmp_dir.name, "index", "orcid.csv")
+        state_path = os.path.join(self.tmp_dir.name, "index", "state.db")
+        indexer = index_orcid_doi(csv_path, state_path=state_path)
+        indexer.finder(self.summaries_dir)
+        self.assertEqual(read_index(csv_path), expected)
+        self.assertEqual(len(list(index_orcid_doi(csv_path, state_path=state_path).batches(self.summaries_dir))), 0)
+
+        path = os.path.join(self.summaries_dir, "002", "0000-0001-0000-0002.xml")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(summary % (family % "Roe", work % ("doi", "10.1/jkl", "self")))
+        os.utime(path, (os.stat(path).st_atime, os.stat(path).st_mtime + 1))
+        indexer = index_orcid_doi(csv_path, state_path=state_path)
+        self.assertEqual([[item[0] for item in batch] for batch in indexer.batches(self.summaries_dir)],
+                         [["0000-0001-0000-0002"]])
+        indexer.finder(self.summaries_dir)
+        self.assertEqual(read_index(csv_path), expected | {("10.1/jkl", "Roe [0000-0001-0000-0002]")})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import gzip
+import io
+import json
+import os
+import tarfile
+import tempfile
+from meta.lib.jsonstream import iter_items, json_sources
+
+
+items = [{"DOI": "10.1/%d" % n, "title": ["Title è %d" % n], "page": "1-%d" % n, "score": n * 1.5,
+          "author": [{"family": "Doe", "given": "J"}] * n} for n in range(20)] + [12345, "text", None, [1, [2]]]
+
+
+class IterItemsTest(unittest.TestCase):
+    def test_array(self):
+        content = json.dumps(items, indent=1)
+        for chunk_size in (1, 7, 64, 1 << 16):
+            self.assertEqual(list(iter_items(io.StringIO(content), chunk_size=chunk_size)), items)
+
+    def test_object(self):
+        content = json.dumps({"status": "ok", "skipped": {"items": [1]}, "items": items, "next": [0]})
+        for chunk_size in (1, 7, 1 << 16):
+            self.assertEqual(list(iter_items(io.StringIO(content), chunk_size=chunk_size)), items)
+
+    def test_empty(self):
+        self.assertEqual(list(iter_items(io.StringIO(" [ ] "))), [])
+        self.assertEqual(list(iter_items(io.StringIO('{"items": []}'))), [])
+
+    def test_malformed(self):
+        for content in ("", "[1, 2", "[1 2]", '[{"a": }]', "12"):
+            with self.assertRaises(json.JSONDecodeError):
+                list(iter_items(io.StringIO(content), chunk_size=2))
+
+
+class JSONSourcesTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.content = json.dumps({"items": items}).encode("utf-8")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def read_sources(self, path):
+        return [(name, list(iter_items(json_file, chunk_size=100))) for name, json_file in json_sources(path)]
+
+    def test_json_gz(self):
+        path = os.path.join(self.tmp_dir.name, "0.json.gz")
+        with gzip.open(path, "wb") as f:
+            f.write(self.content)
+        self.assertEqual(self.read_sources(path), [("0.json.gz", items)])
+
+    def test_tar(self):
+        path = os.path.join(self.tmp_dir.name, "dump.tar.gz")
+        with tarfile.open(path, "w:gz") as archive:
+            for name, data in (("dump/0.json", self.content), ("dump/1.json.gz", gzip.compress(self.content)),
+                               ("dump/README.txt", b"Not JSON")):
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+        self.assertEqual(self.read_sources(path), [("dump/0.json", items), ("dump/1.json.gz", items)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import csv
+import io
+from meta.lib.row import Row, read_rows
+from meta.scripts.curator import Log
+
+
+class RowTest(unittest.TestCase):
+    def test_mapping(self):
+        row = Row(id="doi:10.1/a", title="A title")
+        self.assertEqual(row, {"id": "doi:10.1/a", "title": "A title", "author": "", "pub_date": "", "venue": "",
+                               "volume": "", "issue": "", "page": "", "type": "", "publisher": "", "editor": ""})
+        row["venue"] = "A venue"
+        self.assertEqual(row["venue"], "A venue")
+        self.assertEqual(list(row), list(Row.fieldnames))
+        self.assertRaises(KeyError, row.__getitem__, "citations")
+        self.assertRaises(KeyError, row.__setitem__, "citations", "")
+        self.assertRaises(TypeError, row.__delitem__, "id")
+
+    def test_read_rows(self):
+        content = 'id,title,venue\ndoi:10.1/a,A,"V, 1"\ndoi:10.1/b,B,"V, 1"\n'
+        rows = read_rows(io.StringIO(content))
+        self.assertTrue(all(isinstance(row, Row) for row in rows))
+        self.assertEqual([row["title"] for row in rows], ["A", "B"])
+        self.assertIs(rows[0]["venue"], rows[1]["venue"])
+
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=Row.fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+        self.assertEqual(read_rows(io.StringIO(output.getvalue())), rows)
+
+    def test_read_rows_unknown_columns(self):
+        rows = read_rows(io.StringIO("id,citations\ndoi:10.1/a,3\n"))
+        self.assertEqual(rows, [{"id": "doi:10.1/a", "citations": "3"}])
+        self.assertIs(type(rows[0]), dict)
+
+
+class LogTest(unittest.TestCase):
+    def test_lazy_entries(self):
+        log = Log()
+        self.assertFalse(log)
+        log[3]["id"]["status"] = "ENTITY ALREADY EXISTS"
+        self.assertEqual(list(log), [3])
+        self.assertEqual(set(log[3]), set(Log.fields))
+        self.assertEqual(log[3]["venue"], {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import gzip
+import io
+import json
+import multiprocessing
+import os
+import tarfile
+import tempfile
+from unittest import mock
+from meta.lib.csvmanager import CSVManager
+from meta.run_preprocess import preprocess
+
+
+def item(n):
+    return {"DOI": "10.1/%d" % n, "type": "journal-article", "title": ["Title <i>%d</i>" % n],
+            "author": [{"given": "John", "family": "Doe"}, {"given": "Jane", "family": "Roe"}],
+            "container-title": ["Journal"], "volume": str(n), "issue": "1", "page": "1-%d" % n,
+            "issued": {"date-parts": [[2000 + n, 1, 2]]}, "publisher": "Publisher", "member": "1"}
+
+
+def content(numbers):
+    return json.dumps({"items": [item(n) for n in numbers]}).encode("utf-8")
+
+
+def read_csv_dir(csv_dir):
+    result = dict()
+    for filename in os.listdir(csv_dir):
+        with open(os.path.join(csv_dir, filename), encoding="utf-8") as f:
+            result[filename] = f.read()
+    return result
+
+
+class PreprocessTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.json_dir = os.path.join(self.tmp_dir.name, "json")
+        os.makedirs(self.json_dir)
+        with open(os.path.join(self.json_dir, "0.json"), "wb") as f:
+            f.write(content(range(0, 5)))
+        with gzip.open(os.path.join(self.json_dir, "1.json.gz"), "wb") as f:
+            f.write(content(range(5, 10)))
+        with open(os.path.join(self.json_dir, "2.json"), "wb") as f:
+            f.write(content(range(10, 12)))
+        with tarfile.open(os.path.join(self.json_dir, "dump.tar.gz"), "w:gz") as archive:
+            for name, data in (("dump/3.json", content(range(12, 20))),
+                               ("dump/4.json.gz", gzip.compress(content(range(20, 23)))),
+                               ("dump/README.txt", b"Not JSON")):
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+
+        self.orcid_path = os.path.join(self.tmp_dir.name, "orcid.csv")
+        orcid_index = CSVManager(self.orcid_path)
+        for n in range(0, 23, 2):
+            orcid_index.add_value("10.1/%d" % n, "Doe, John [0000-0001-0000-0001]")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_workers(self):
+        sequential_dir = os.path.join(self.tmp_dir.name, "sequential")
+        preprocess(self.json_dir, self.orcid_path, sequential_dir)
+        expected = read_csv_dir(sequential_dir)
+        self.assertEqual(sorted(expected), ["0.csv", "1.csv", "2.csv", "dump_3.csv", "dump_4.csv"])
+        self.assertIn("doi:10.1/2", expected["0.csv"])
+        self.assertIn("Doe, John [orcid:0000-0001-0000-0001]", expected["0.csv"])
+
+        if "fork" in multiprocessing.get_all_start_methods():
+            # The workers share the indexes loaded by this process
+            forked_dir = os.path.join(self.tmp_dir.name, "forked")
+            preprocess(self.json_dir, self.orcid_path, forked_dir, workers=3)
+            self.assertEqual(read_csv_dir(forked_dir), expected)
+
+        # Each worker loads its own copy of the indexes
+        with mock.patch("meta.run_preprocess.multiprocessing.get_all_start_methods", return_value=["spawn"]):
+            initialized_dir = os.path.join(self.tmp_dir.name, "initialized")
+            preprocess(self.json_dir, self.orcid_path, initialized_dir, workers=3)
+        self.assertEqual(read_csv_dir(initialized_dir), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
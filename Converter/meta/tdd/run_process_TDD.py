@@ -0,0 +1,82 @@
+import unittest
+import os
+import tempfile
+from unittest import mock
+from rdflib import Graph
+import meta.run_process as run_process
+from meta.benchmark import generate_rows, write_rows
+from meta.lib.triplestore import LocalTriplestore
+
+
+def read_lines(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return sorted(f.read().splitlines())
+
+
+class RunProcessTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.input_dir = os.path.join(self.tmp_dir.name, "input")
+        os.makedirs(self.input_dir)
+        # Files share some DOIs, so that the following files are reconciled with the triplestore
+        for n in range(3):
+            write_rows(generate_rows(20, seed=n), os.path.join(self.input_dir, "file_%d.csv" % n))
+        self.base_dir, self.info_dir = run_process.base_dir, run_process.info_dir
+
+    def tearDown(self):
+        run_process.base_dir, run_process.info_dir = self.base_dir, self.info_dir
+        self.tmp_dir.cleanup()
+
+    def run_process(self, name, pipeline, triplestore=None):
+        root = os.path.join(self.tmp_dir.name, name)
+        os.makedirs(root)
+        run_process.base_dir = os.path.join(root, "rdf" + os.sep)
+        run_process.info_dir = os.path.join(root, "info_dir" + os.sep)
+        triplestore = LocalTriplestore() if triplestore is None else triplestore
+        run_process.process(self.input_dir, os.path.join(root, "csv" + os.sep), os.path.join(root, "index" + os.sep),
+                            os.path.join(root, "auxiliary.txt"), triplestore=triplestore, pipeline=pipeline)
+        return root, triplestore
+
+    def test_pipelined_storage(self):
+        seq_root, seq_ts = self.run_process("sequential", False)
+        pipe_root, pipe_ts = self.run_process("pipelined", True)
+
+        # Files are recorded as completed in the same order
+        with open(os.path.join(pipe_root, "auxiliary.txt"), "r", encoding="utf-8") as f:
+            self.assertEqual(f.read().splitlines(), ["file_0.csv", "file_1.csv", "file_2.csv"])
+        self.assertEqual(set(seq_ts.graph.quads()), set(pipe_ts.graph.quads()))
+        for n in range(3):
+            filename = os.path.join("rdf", "file_%d.nt" % n)
+            self.assertEqual(read_lines(os.path.join(seq_root, filename)),
+                             read_lines(os.path.join(pipe_root, filename)))
+            self.assertTrue(os.path.exists(os.path.join(pipe_root, "rdf", "prov", "file_%d.nq" % n)))
+        for folder in ("curator", "creator"):
+            for dirpath, _, filenames in os.walk(os.path.join(seq_root, "info_dir", folder)):
+                for filename in filenames:
+                    path = os.path.join(dirpath, filename)
+                    self.assertEqual(read_lines(path), read_lines(path.replace(seq_root, pipe_root)))
+
+    def test_pipelined_failure(self):
+        # When the data of a file can't be stored, it isn't uploaded either: the triplestore holds the data
+        # of the completed files only, as in a sequential run
+        store_graphs_in_file = run_process.Storer.store_graphs_in_file
+
+        def failing_store(storer, file_path, context_path):
+            if file_path.endswith("file_1.nt"):
+                raise OSError("No space left on device")
+            store_graphs_in_file(storer, file_path, context_path)
+
+        triplestore = LocalTriplestore()
+        with mock.patch.object(run_process.Storer, "store_graphs_in_file", failing_store):
+            with self.assertRaises(OSError):
+                self.run_process("pipelined", True, triplestore)
+        root = os.path.join(self.tmp_dir.name, "pipelined")
+        with open(os.path.join(root, "auxiliary.txt"), "r", encoding="utf-8") as f:
+            self.assertEqual(f.read().splitlines(), ["file_0.csv"])
+        self.assertTrue(os.path.exists(os.path.join(root, "rdf", "prov", "file_0.nq")))
+        stored = Graph().parse(os.path.join(root, "rdf", "file_0.nt"), format="nt")
+        self.assertEqual(set(triplestore.graph.triples((None, None, None))), set(stored))
+
+
+if __name__ == '__main__':
+    unittest.main()
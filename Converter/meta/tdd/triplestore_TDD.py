@@ -0,0 +1,147 @@
+import unittest
+import os
+import tempfile
+import time
+from oc_ocdm import Storer
+from oc_ocdm.graph import GraphSet
+from rdflib import URIRef
+import rdflib.plugins.sparql
+from rdflib.plugins.sparql import aggregates, evaluate
+from meta.lib.finder import ResourceFinder
+from meta.lib.triplestore import LocalTriplestore, RemoteTriplestore, get_triplestore
+from meta.scripts.curator import Curator
+
+base_iri = "https://w3id.org/oc/meta/"
+ts_data = os.path.join("meta", "tdd", "testcases", "ts", "testcase_ts-13.ttl")
+
+# The same kind of query performed by ResourceFinder: an OPTIONAL variable is aggregated with GROUP_CONCAT(DISTINCT)
+br_query = """
+    PREFIX datacite: <http://purl.org/spar/datacite/>
+    PREFIX literal: <http://www.essepuntato.it/2010/06/literalreification/>
+    PREFIX dcterm: <http://purl.org/dc/terms/>
+    SELECT ?res (GROUP_CONCAT(DISTINCT ?title; separator=' ;and; ') AS ?title_)
+    (GROUP_CONCAT(?value; separator=' ;and; ') AS ?value_)
+    WHERE {
+        VALUES ?res {<https://w3id.org/oc/meta/br/060300> <https://w3id.org/oc/meta/br/060301>}
+        ?res datacite:hasIdentifier/literal:hasLiteralValue ?value .
+        OPTIONAL {?res dcterm:title ?title .}
+    } GROUP BY ?res ORDER BY ?res
+"""
+
+ci_query = """
+    PREFIX cito: <http://purl.org/spar/cito/>
+    SELECT ?ci ?citing FROM <https://w3id.org/oc/meta/ci/> WHERE {?ci cito:hasCitingEntity ?citing .}
+"""
+
+
+def citation_storer():
+    temp_gs = GraphSet(base_iri)
+    citing = temp_gs.add_br("agent", res=URIRef(base_iri + "br/0601"), preexisting_graph=None)
+    cited = temp_gs.add_br("agent", res=URIRef(base_iri + "br/0602"), preexisting_graph=None)
+    ci_gs = GraphSet(base_iri, wanted_label=False)
+    ci = ci_gs.add_ci("agent")
+    ci.has_citing_entity(citing)
+    ci.has_cited_entity(cited)
+    return Storer(ci_gs)
+
+
+class LocalTriplestoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "ts", "triplestore.nq")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_query(self):
+        ts = LocalTriplestore()
+        ts.graph.get_context(URIRef(base_iri + "br/")).parse(ts_data, format="turtle")
+        result = ts.query(br_query)
+        self.assertEqual(result["head"]["vars"], ["res", "title_", "value_"])
+        bindings = result["results"]["bindings"]
+        self.assertEqual([b["res"] for b in bindings], [{"type": "uri", "value": base_iri + "br/060300"},
+                                                        {"type": "uri", "value": base_iri + "br/060301"}])
+        # 'br/060300' has no title:
+        self.assertEqual(bindings[0]["title_"]["value"], "")
+        self.assertEqual(bindings[1]["title_"]["value"], "Venue1")
+        self.assertEqual(bindings[1]["value_"], {"type": "literal", "value": "301"})
+        self.assertTrue(ts.query("ASK {<%sbr/060301> ?p ?o}" % base_iri)["boolean"])
+
+    def test_rdflib_untouched(self):
+        # The way LocalTriplestore evaluates queries doesn't change the way rdflib evaluates any other query
+        ts = LocalTriplestore()
+        ts.query(ci_query)
+        self.assertTrue(rdflib.plugins.sparql.SPARQL_LOAD_GRAPHS)
+        self.assertEqual(evaluate.evalBGP.__module__, evaluate.__name__)
+        self.assertEqual(aggregates.Accumulator.use_row.__qualname__, "Accumulator.use_row")
+
+    def test_values_lookup(self):
+        # The identifiers bound by VALUES are looked up first, whatever the order of the triple patterns
+        ts = LocalTriplestore()
+        ts.graph.get_context(URIRef(base_iri + "br/")).parse(ts_data, format="turtle")
+        finder = ResourceFinder(ts)
+        finder.prefetch_br_from_id(["doi:1", "doi:3", "doi:301", "doi:999"])
+        self.assertEqual(finder.retrieve_br_from_id("1", "doi"), [("060101", "", [("060101", "doi:1"),
+                                                                                  ("060102", "doi:2")])])
+        self.assertEqual(sorted(finder.retrieve_br_from_id("3", "doi")), [("060102", "", [("060103", "doi:3")]),
+                                                                          ("060103", "Title3", [("060103", "doi:3")])])
+        self.assertEqual(finder.retrieve_br_from_id("301", "doi"), [("060301", "Venue1", [("060301", "doi:301")])])
+        self.assertIsNone(finder.retrieve_br_from_id("999", "doi"))
+        self.assertEqual(finder.retrieve_id("310", "doi"), "060310")
+
+    def test_conflict_identifiers(self):
+        # The identifiers of a conflict entity which are already in the triplestore keep their meta id
+        ts = LocalTriplestore()
+        ts.graph.get_context(URIRef(base_iri + "br/")).parse(ts_data, format="turtle")
+        curator = Curator([], ts, info_dir=os.path.join(self.tmp_dir.name, "curator") + os.sep, prefix="060")
+        metaval = curator.conflict(["doi:310", "doi:10.1/a:b"], "Title", curator.idbr, "id")
+        self.assertEqual(curator.conflict_br[metaval]["ids"], ["doi:310", "doi:10.1/a:b"])
+        self.assertEqual(curator.idbr["doi:310"], "060310")
+        self.assertEqual(curator.idbr["doi:10.1/a:b"], "0601")
+
+    def test_upload_and_reload(self):
+        with get_triplestore("local:" + self.path) as ts:
+            self.assertIsInstance(ts, LocalTriplestore)
+            self.assertEqual(ts.query(ci_query)["results"]["bindings"], [])
+            ts.upload(citation_storer(), batch_size=1)
+            # Uploaded data is saved straight away:
+            self.assertTrue(os.path.exists(self.path))
+            self.assertEqual(len(ts.query(ci_query)["results"]["bindings"]), 1)
+
+        ts = get_triplestore("local:" + self.path)
+        bindings = ts.query(ci_query)["results"]["bindings"]
+        self.assertEqual(bindings, [{"ci": {"type": "uri", "value": base_iri + "ci/1"},
+                                     "citing": {"type": "uri", "value": base_iri + "br/0601"}}])
+        ts.update("CLEAR ALL")
+        self.assertEqual(ts.query(ci_query)["results"]["bindings"], [])
+
+    def test_from_clause(self):
+        # The graphs named by FROM clauses are the default graph of the query: triples of other graphs are ignored
+        ts = LocalTriplestore()
+        ts.upload(citation_storer())
+        cito = URIRef("http://purl.org/spar/cito/hasCitingEntity")
+        ts.graph.get_context(URIRef(base_iri + "br/")).add((URIRef(base_iri + "ci/2"), cito,
+                                                             URIRef(base_iri + "br/0603")))
+        bindings = ts.query(ci_query)["results"]["bindings"]
+        self.assertEqual([b["ci"]["value"] for b in bindings], [base_iri + "ci/1"])
+        self.assertEqual(len(ts.query(ci_query.replace("FROM", "FROM NAMED"))["results"]["bindings"]), 2)
+        self.assertEqual(ts.query(ci_query.replace("ci/>", "missing/>"))["results"]["bindings"], [])
+
+    def test_latency(self):
+        ts = LocalTriplestore(latency=0.05)
+        start = time.time()
+        ts.query(ci_query)
+        ts.update("CLEAR ALL")
+        self.assertGreaterEqual(time.time() - start, 0.1)
+
+    def test_get_triplestore(self):
+        self.assertIsNone(get_triplestore("local:").path)
+        ts = get_triplestore("http://127.0.0.1:9999/blazegraph/sparql", timeout=3)
+        self.assertIsInstance(ts, RemoteTriplestore)
+        self.assertEqual(ts.timeout, 3)
+        self.assertIs(get_triplestore(ts), ts)
+        ts.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
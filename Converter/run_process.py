@@ -17,26 +17,30 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from typing import Tuple, List
-    import pandas as pd
 
 import glob
 import os
 import multiprocessing
 import time
 
+import pandas as pd
+
 from scripts.classifier import classify_and_filter
-from scripts.reader import read_partition
-from conf.conf import input_parquet_file, process_pool_size, extracted_csv_dir
+from scripts.reader import iter_partition
+from conf.conf import input_parquet_file, process_pool_size, extracted_csv_dir, converter_engine, read_batch_size, \
+    process_start_method, profile_worker_startup
 
 # Utils
-from utils.authors_utils import parse_authors
-from utils.id_list_utils import parse_id_list
+from utils.authors_utils import parse_authors_batch
+from utils.id_list_utils import parse_id_list_batch, allowed_id_schemes
 from utils.utils import explode_id_list, remove_forbidden_chars
+from utils.worker_startup import get_process_context, profile_imports
 
 # Converters and Storers
 from scripts.process_bibliographic import convert_bibliographic, store_bibliographic
 from scripts.process_wiki import convert_wiki, store_wiki
 from scripts.process_citations import build_citations_dataframe, store_citations
+from scripts.arrow_pipeline import process_arrow
 
 
 def split_by_wikipedia_columns(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
@@ -52,6 +56,50 @@ def split_by_wikipedia_columns(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataF
     return wiki_df, bibliographic_df
 
 
+def process_pandas(name_width: int, proc_index: int, input_file: str) -> None:
+    """
+    This function converts a single parquet partition file by means of Pandas DataFrames
+    (see 'process'). Its Arrow counterpart is 'process_arrow' (see scripts/arrow_pipeline.py).
+
+    When 'read_batch_size' (see conf/conf.py) is greater than 0, the partition is converted one batch
+    of rows at a time and the output CSV files are written incrementally: in this way, memory usage
+    doesn't depend on the size of the partition. 'tmp' identifiers keep being numbered
+    progressively across batches, so that they're unique within the whole partition.
+
+    :param name_width: The required length of the output filenames
+    :param proc_index: An incremental integer index which differentiates every spawned process
+    :param input_file: The path of the input parquet partition file
+    """
+    row_offset: int = 0
+    for batch_index, df in enumerate(iter_partition(input_file, read_batch_size)):
+        df = remove_forbidden_chars(df)
+
+        # First of all, we need to parse structured data for a more convenient
+        # access to the information contained in it.
+        df['Authors'] = pd.Series(parse_authors_batch(df['Authors'].astype(str)), index=df.index, dtype=object)
+        df['ID_list'] = pd.Series(parse_id_list_batch(df['ID_list'].astype(str)), index=df.index, dtype=object)
+        # This creates a lot of additional columns, removing 'ID_list':
+        df = explode_id_list(df, 'ID_list', allowed_id_schemes)
+
+        df = classify_and_filter(df)
+
+        # The initial DataFrame is split in two parts:
+        wiki_df, bibliographic_df = split_by_wikipedia_columns(df)
+
+        # Produce all the needed dataframes
+        bibliographic_df = convert_bibliographic(bibliographic_df, proc_index, row_offset)
+        wiki_df = convert_wiki(wiki_df, proc_index, row_offset)
+        citations_df = build_citations_dataframe(wiki_df, bibliographic_df)
+
+        # Store all the dataframes (the first batch creates the files, the other ones are appended)
+        append: bool = batch_index > 0
+        store_bibliographic(proc_index, name_width, bibliographic_df, append)
+        store_wiki(proc_index, name_width, wiki_df, append)
+        store_citations(proc_index, name_width, citations_df, append)
+
+        row_offset += len(df)
+
+
 def process(arg: Tuple[int, int, str]) -> None:
     """
     This function takes care of the entire processing of a single parquet
@@ -84,29 +132,10 @@ def process(arg: Tuple[int, int, str]) -> None:
     # 'arg' is a tuple and it must be exploded as follows:
     name_width, proc_index, input_file = arg
 
-    df = read_partition(input_file)
-    df = remove_forbidden_chars(df)
-
-    # First of all, we need to parse structured data for a more convenient
-    # access to the information contained in it.
-    df['Authors'] = df['Authors'].astype(str).map(parse_authors)
-    df['ID_list'] = df['ID_list'].astype(str).map(parse_id_list)
-    df = explode_id_list(df, 'ID_list')  # this creates a lot of additional columns, removing 'ID_list'
-
-    df = classify_and_filter(df)
-
-    # The initial DataFrame is split in two parts:
-    wiki_df, bibliographic_df = split_by_wikipedia_columns(df)
-
-    # Produce all the needed dataframes
-    bibliographic_df = convert_bibliographic(bibliographic_df, proc_index)
-    wiki_df = convert_wiki(wiki_df, proc_index)
-    citations_df = build_citations_dataframe(wiki_df, bibliographic_df)
-
-    # Store all the dataframes
-    store_bibliographic(proc_index, name_width, bibliographic_df)
-    store_wiki(proc_index, name_width, wiki_df)
-    store_citations(proc_index, name_width, citations_df)
+    if converter_engine == 'arrow':
+        process_arrow(name_width, proc_index, input_file)
+    else:
+        process_pandas(name_width, proc_index, input_file)
 
     p_end: float = time.time()
     print(f"Process {proc_index} took ~{round(p_end - p_start, 2)}s")
@@ -149,9 +178,14 @@ if __name__ == '__main__':
         # For each process that has to be spawned, append its arguments
         proc_arguments.append((filename_width, i, part_list[i]))
 
+    if profile_worker_startup:
+        # Each spawned worker imports this very module before starting its task:
+        print(profile_imports('run_process', os.path.dirname(os.path.abspath(__file__))).report())
+
     # Pool must be called with maxtasksperchild=1 so that each process can
     # be cleared out once it has completed its task. This avoids huge memory leaks.
-    ctx = multiprocessing.get_context('spawn')
+    # With the 'forkserver' start method, workers are forked from a process that already imported this module.
+    ctx = get_process_context(process_start_method)
     with ctx.Pool(process_pool_size, maxtasksperchild=1) as pool:
         pool.map(process, proc_arguments)
     end = time.time()
@@ -18,28 +18,41 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from typing import Dict
+    from typing import Dict, List, Optional, Tuple, ContextManager
+    import numpy as np
     from oc_ocdm.graph.entities.bibliographic import BibliographicResource, Citation
     from oc_ocdm.graph.entities import Identifier
 
 import os
+import multiprocessing
 import time
+from contextlib import nullcontext
 import pandas as pd
-from SPARQLWrapper import SPARQLWrapper, JSON
 
 from conf.conf_citations import *
 
+# Fix config value (at module level, so that it's also applied inside spawned processes)
+if base_iri[-1] != '/':
+    base_iri += '/'
+
 # Utils
-from utils.id_list_utils import parse_id_list_repeated_schemes
+from utils.tmp_to_meta import TmpToMetaMapping
+from utils.citation_index import CitationIndex
+from meta.lib.triplestore import Triplestore, get_triplestore
 
 # oc_ocdm
 from oc_ocdm.graph import GraphSet
 from oc_ocdm.prov import ProvSet
 from oc_ocdm import Storer
+from oc_ocdm.counter_handler.filesystem_counter_handler import FilesystemCounterHandler
 from rdflib import URIRef
 
+# Per-process state of the pool workers (see 'init_worker'):
+worker_conversion_mapping: Optional[TmpToMetaMapping] = None
+worker_counter_lock: Optional[ContextManager] = None
+
 
-def update_tmp_to_meta(cur_csv_file: str, tmp_to_meta: Dict[str, str]) -> Dict[str, str]:
+def update_tmp_to_meta(cur_csv_file: str, tmp_to_meta: TmpToMetaMapping) -> TmpToMetaMapping:
     """
     This function is able to parse a CSV file which was produced by 'meta' and to extract from it
     the mappings between 'tmp' identifiers (which were uniquely assigned to each resource by the
@@ -52,47 +65,147 @@ def update_tmp_to_meta(cur_csv_file: str, tmp_to_meta: Dict[str, str]) -> Dict[s
     * 2nd --> meta
     * 3rd --> run_process_citations.py
 
+    The CSV file is read in chunks and the mappings are stored in a compact form (see TmpToMetaMapping),
+    so that memory usage stays bounded even for the full enwiki dataset.
+
     :param cur_csv_file: The filename (without the path) of the CSV file from which to extract mappings
-    :param tmp_to_meta: The mapping dictionary to be updated
-    :return: The dictionary given as input, enriched with new mapping extracted from the given CSV file
+    :param tmp_to_meta: The mapping to be updated
+    :return: The mapping given as input, enriched with new mappings extracted from the given CSV file
     """
     filepath = os.path.join(meta_csv_output_dir, cur_csv_file)
-    df = pd.read_csv(filepath, usecols=['id'], low_memory=False)
-    df['id'] = df['id'].astype(str).map(parse_id_list_repeated_schemes)
-    id_col = df['id'].to_numpy(copy=False)
-
-    update_dict = {}
-    for row in id_col:
-        if 'tmp' in row and 'meta':
-            meta_id = row['meta'][0]
-            for cur_tmp in row['tmp']:
-                update_dict[cur_tmp] = meta_id
-
-    tmp_to_meta.update(update_dict)
+    tmp_to_meta.add_meta_csv(filepath)
     return tmp_to_meta
 
 
-def tmp_to_meta_mapping(series: pd.Series, conversion_dict: Dict[str, str]) -> None:
+def tmp_to_meta_mapping(series: pd.Series, conversion_mapping: TmpToMetaMapping) -> pd.Series:
     """
     This function applies the 'tmp-to-meta' mapping to a Pandas Series of 'tmp' identifiers.
     Whether a 'meta' identifier could not be found for a particular 'tmp' value, that same
     'tmp' string is replaced by a None value and the corresponding citation won't be produced
     in the output RDF file.
 
+    The whole column is resolved with a few vectorized operations (see TmpToMetaMapping.map_series)
+    and a new Pandas Series is returned: the given one is left untouched.
+
     :param series: A Pandas Series containing 'tmp' identifiers to be mapped onto their respective 'meta' identifiers
-    :param conversion_dict: The dictionary that maps 'tmp' identifiers onto their respective 'meta' identifiers
+    :param conversion_mapping: The mapping of 'tmp' identifiers onto their respective 'meta' identifiers
+    :return: A Pandas Series containing the 'meta' identifiers (or None values)
     """
-    # Here the Pandas Series is converted into a Numpy array
-    # so that we can iterate way faster over its elements:
-    series_col = series.to_numpy(copy=False)
-    for i, row in enumerate(series_col):
-        if row is not None and row in conversion_dict and conversion_dict[row] is not None:
-            series_col[i] = conversion_dict[row]
-        else:
-            series_col[i] = None
+    return conversion_mapping.map_series(series)
+
+
+def query_existing_citations(triplestore: Triplestore,
+                             pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Tuple[str, Optional[str]]]:
+    """
+    This function performs a single SPARQL query against the triplestore in order to discover
+    which of the given (citing, cited) couples of 'meta' identifiers are already described by a
+    Citation entity. All the couples are listed inside a 'VALUES' block, so that a whole batch of
+    citations can be checked with just one HTTP round trip.
+
+    :param triplestore: The triplestore to be queried (see 'meta.lib.triplestore')
+    :param pairs: A list of (citing, cited) couples of 'meta' identifiers (e.g. ('br/0601', 'br/0602'))
+    :return: A dictionary that maps each couple already stored in the triplestore onto a tuple containing
+             the 'meta' identifier of the corresponding Citation entity and its OCI (or None, when missing)
+    """
+    values_block: str = '\n'.join(f'(<{base_iri}{citing}> <{base_iri}{cited}>)' for citing, cited in pairs)
+    query_string: str = f'''
+    PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+    PREFIX cito: <http://purl.org/spar/cito/>
+    PREFIX datacite: <http://purl.org/spar/datacite/>
+    PREFIX literal: <http://www.essepuntato.it/2010/06/literalreification/>
+
+    SELECT ?citing ?cited ?ci_res ?oci
+    FROM <https://w3id.org/oc/meta/ci/>
+    WHERE {{
+        VALUES (?citing ?cited) {{
+            {values_block}
+        }}
+        ?ci_res rdf:type cito:Citation ;
+                cito:hasCitingEntity ?citing ;
+                cito:hasCitedEntity ?cited .
+        OPTIONAL {{
+            ?ci_res datacite:hasIdentifier ?id .
+            ?id	datacite:usesIdentifierScheme datacite:oci ;
+                literal:hasLiteralValue ?oci .
+        }}
+    }}
+    '''
+    # Remote triplestores receive the query with the POST method since a big 'VALUES'
+    # block could easily exceed the maximum URL length accepted by the server:
+    bindings = triplestore.query(query_string)["results"]["bindings"]
+
+    existing_citations: Dict[Tuple[str, str], Tuple[str, Optional[str]]] = {}
+    for row in bindings:
+        key: Tuple[str, str] = (row["citing"]["value"][len(base_iri):], row["cited"]["value"][len(base_iri):])
+        # Only one Citation entity is kept for each couple (as it was with 'LIMIT 1')
+        if key not in existing_citations:
+            ci_meta_id: str = row["ci_res"]["value"][len(base_iri):]
+            oci_value: Optional[str] = row["oci"]["value"] if "oci" in row else None
+            existing_citations[key] = (ci_meta_id, oci_value)
+    return existing_citations
+
+
+def find_existing_citations(citing_col: np.ndarray, cited_col: np.ndarray,
+                            triplestore: Triplestore) -> Dict[Tuple[str, str], Tuple[str, Optional[str]]]:
+    """
+    This function discovers which citations (among those described by the given columns) have already
+    been processed and stored inside the triplestore. Duplicated (citing, cited) couples are checked only
+    once and the remaining ones are split in batches of 'citations_lookup_batch_size' elements, each of which
+    is resolved with a single SPARQL query (see 'query_existing_citations').
+
+    :param citing_col: A Numpy array containing the 'meta' identifiers of the citing entities
+    :param cited_col: A Numpy array containing the 'meta' identifiers of the cited entities
+    :param triplestore: The triplestore to be queried (see 'meta.lib.triplestore')
+    :return: A dictionary that maps each couple already stored in the triplestore onto a tuple containing
+             the 'meta' identifier of the corresponding Citation entity and its OCI (or None, when missing)
+    """
+    # 'dict.fromkeys' removes duplicated couples while preserving their order:
+    pairs: List[Tuple[str, str]] = list(dict.fromkeys(zip(citing_col, cited_col)))
+    batch_size: int = max(1, citations_lookup_batch_size)
+
+    existing_citations: Dict[Tuple[str, str], Tuple[str, Optional[str]]] = {}
+    for start in range(0, len(pairs), batch_size):
+        existing_citations.update(query_existing_citations(triplestore, pairs[start:start + batch_size]))
+    return existing_citations
+
+
+def reserve_counters(count: int) -> Tuple[int, int]:
+    """
+    This function reserves a block of 'count' consecutive numbers for both the Citation ('ci') and
+    the Identifier ('id') entities, by moving forward the counters stored by oc_ocdm inside 'info_dir'.
+    It must be called while holding the counter lock (when more than one process is running).
+
+    :param count: How many numbers should be reserved
+    :return: The values of the 'ci' and 'id' counters just before the reservation: the reserved
+             numbers go from the returned value + 1 to the returned value + count (both included)
+    """
+    counter_handler: FilesystemCounterHandler = FilesystemCounterHandler(info_dir)
+    ci_start: int = counter_handler.read_counter('ci')
+    id_start: int = counter_handler.read_counter('id')
+    if count > 0:
+        counter_handler.set_counter(ci_start + count, 'ci')
+        counter_handler.set_counter(id_start + count, 'id')
+    return ci_start, id_start
+
+
+def init_worker(counter_lock: ContextManager) -> None:
+    """
+    This function initializes each process of the pool. The 'tmp-to-meta' mapping stored inside
+    'tmp_to_meta_dir' is memory-mapped, so that all the processes share the same copy of it.
+
+    :param counter_lock: The lock that serializes the reservation of counters amongst processes
+    """
+    global worker_conversion_mapping, worker_counter_lock
+    worker_conversion_mapping = TmpToMetaMapping.load(tmp_to_meta_dir)
+    worker_counter_lock = counter_lock
 
 
-def process(cur_citations_file: str, conversion_dict: Dict[str, str]) -> None:
+def process_in_worker(cur_citations_file: str) -> None:
+    process(cur_citations_file, worker_conversion_mapping, counter_lock=worker_counter_lock)
+
+
+def process(cur_citations_file: str, conversion_mapping: TmpToMetaMapping,
+            triplestore: Optional[Triplestore] = None, counter_lock: Optional[ContextManager] = None) -> None:
     """
     This function takes care of generating an OCDM compliant RDF file containing
     the Citation entities that describe the relations between citing Wikipedia pages
@@ -106,15 +219,24 @@ def process(cur_citations_file: str, conversion_dict: Dict[str, str]) -> None:
     otherwise the following scripts of the workflow (Enricher and Pusher) won't be able to import
     the intermediate RDF files produced by this script.
 
+    New Citation entities are minted using a block of 'ci' and 'id' numbers which is reserved
+    from the counters stored inside 'info_dir' (see 'reserve_counters'). When the local citations
+    index is used, the new citations are claimed inside the index within the same critical section:
+    this is what allows many citations files to be safely processed in parallel.
+
     :param cur_citations_file: The filename (without the path) of the CSV file to be converted
-    :param conversion_dict: The dictionary that maps 'tmp' identifiers onto their respective 'meta' identifiers
+    :param conversion_mapping: The mapping of 'tmp' identifiers onto their respective 'meta' identifiers
+    :param triplestore: The triplestore to be queried and updated (the one configured by 'triplestore_url' is
+                        opened when None). It's not used when a local citations index is configured via
+                        'citations_index_path'
+    :param counter_lock: The lock shared by the processes of the pool (None for a sequential execution)
     """
     filepath: str = os.path.join(citations_csv_dir, cur_citations_file)
-    df: pd.DataFrame = pd.read_csv(filepath, usecols=['citing', 'cited'], low_memory=False)
+    df: pd.DataFrame = pd.read_csv(filepath, usecols=['citing', 'cited'], dtype=str, low_memory=False)
 
     # 'tmp-to-meta' mapping is applied to each column of the DataFrame
-    tmp_to_meta_mapping(df['citing'], conversion_dict)
-    tmp_to_meta_mapping(df['cited'], conversion_dict)
+    df['citing'] = tmp_to_meta_mapping(df['citing'], conversion_mapping)
+    df['cited'] = tmp_to_meta_mapping(df['cited'], conversion_mapping)
 
     # Rows containing None values are dropped: we cannot generate valid Citation entities for them
     df = df.dropna(axis=0, how='any', subset=['citing', 'cited'])
@@ -129,14 +251,6 @@ def process(cur_citations_file: str, conversion_dict: Dict[str, str]) -> None:
     df['journal_sc'] = 'no'
     df['author_sc'] = 'no'
 
-    # A temporary GraphSet is used to instantiate BibliographicResource entities that are needed
-    # for the creation of Citation entities but that won't be kept in the output RDF file:
-    temp_gs: GraphSet = GraphSet(base_iri)
-
-    # The actual GraphSet that will contain the Citation entities to be stored in the output RDF file:
-    ci_gs: GraphSet = GraphSet(base_iri, info_dir=info_dir, supplier_prefix=supplier_prefix,
-                               wanted_label=False)
-
     # Here the DataFrame columns are converted into Numpy arrays
     # so that we can iterate way faster over their elements:
     citing_col = df['citing'].to_numpy(copy=False)
@@ -144,70 +258,80 @@ def process(cur_citations_file: str, conversion_dict: Dict[str, str]) -> None:
     id_col = df['id'].to_numpy(copy=False)
     oci_col = df['oci'].to_numpy(copy=False)
 
-    for i, (citing_meta_id, cited_meta_id) in enumerate(zip(citing_col, cited_col)):
-        citing_res: URIRef = URIRef(base_iri + citing_meta_id)
-        cited_res: URIRef = URIRef(base_iri + cited_meta_id)
-
-        # A query is performed to discover if the current citation has already been processed:
-        query_string: str = f'''
-        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-        PREFIX cito: <http://purl.org/spar/cito/>
-        PREFIX datacite: <http://purl.org/spar/datacite/>
-        PREFIX literal: <http://www.essepuntato.it/2010/06/literalreification/>
-
-        SELECT ?ci_res ?oci
-        FROM <https://w3id.org/oc/meta/ci/>
-        WHERE {{
-            ?ci_res rdf:type cito:Citation ;
-                    cito:hasCitingEntity <{citing_res}> ;
-                    cito:hasCitedEntity <{cited_res}> .
-            OPTIONAL {{
-                ?ci_res datacite:hasIdentifier ?id .
-                ?id	datacite:usesIdentifierScheme datacite:oci ;
-                    literal:hasLiteralValue ?oci .
-            }}
-        }}
-        LIMIT 1
-        '''
-        tp: SPARQLWrapper = SPARQLWrapper(triplestore_url)
-        tp.setTimeout(query_timeout)
-        tp.setMethod('GET')
-        tp.setQuery(query_string)
-        tp.setReturnFormat(JSON)
-        results = tp.queryAndConvert()
-        bindings = results["results"]["bindings"]
-
-        if len(bindings) >= 1:  # 'LIMIT 1' in the query string should guarantee a maximum of 1 returned binding
-            # This citation is already stored in the triplestore!
-            row: Dict = bindings[0]
-
-            # Update the output dataframe
-            ci_res: URIRef = URIRef(bindings[0]["ci_res"]["value"])
-            id_col[i] = str(ci_res)[len(base_iri):]
-
-            if "oci" in row:
-                oci_col[i] = row["oci"]["value"]
-        else:
-            # This citation is currently missing from the triplestore!
+    # Discover which citations have already been processed. When configured, the local citations
+    # index is used. Otherwise, the triplestore is queried with a few batched queries:
+    citations_index: Optional[CitationIndex] = None
+    close_triplestore: bool = False
+    if citations_index_path:
+        citations_index = CitationIndex(citations_index_path, base_iri)
+        existing_citations = citations_index.find(zip(citing_col, cited_col))
+    else:
+        if triplestore is None:
+            triplestore = get_triplestore(triplestore_url, timeout=query_timeout, latency=triplestore_latency)
+            close_triplestore = True
+        existing_citations = find_existing_citations(citing_col, cited_col, triplestore)
+
+    # Couples that need a new Citation entity ('dict.fromkeys' removes duplicated rows
+    # of the same file, which must not generate a second Citation entity):
+    missing_pairs: List[Tuple[str, str]] = [pair for pair in dict.fromkeys(zip(citing_col, cited_col))
+                                            if pair not in existing_citations]
+
+    filename_without_csv: str = cur_citations_file[:-4]
+    nt_filename: str = filename_without_csv + '.nt'
+    with counter_lock if counter_lock is not None else nullcontext():
+        if citations_index is not None and counter_lock is not None:
+            # Another process could have claimed some of these couples in the meanwhile:
+            existing_citations.update(citations_index.find(missing_pairs))
+            missing_pairs = [pair for pair in missing_pairs if pair not in existing_citations]
+
+        ci_start, id_start = reserve_counters(len(missing_pairs))
+
+        # The Citation entities will be minted in the same order, starting from the reserved numbers:
+        new_citations: List[Tuple[str, str, str, str]] = []
+        for offset, (citing_meta_id, cited_meta_id) in enumerate(missing_pairs, start=1):
+            oci_str: str = citing_meta_id[len('br/'):] + '-' + cited_meta_id[len('br/'):]
+            ci_meta_id: str = 'ci/' + supplier_prefix + str(ci_start + offset)
+            new_citations.append((citing_meta_id, cited_meta_id, ci_meta_id, oci_str))
+            existing_citations[(citing_meta_id, cited_meta_id)] = (ci_meta_id, oci_str)
+
+        # The couples are claimed before releasing the lock, whatever the output modality: otherwise
+        # a concurrent process could mint a second Citation entity for them
+        if citations_index is not None:
+            citations_index.claim(new_citations, nt_filename)
+
+    # A temporary GraphSet is used to instantiate BibliographicResource entities that are needed
+    # for the creation of Citation entities but that won't be kept in the output RDF file:
+    temp_gs: GraphSet = GraphSet(base_iri)
 
-            # Create BR entities in "append mode" by providing 'res' without 'preexisting_graph'
-            citing_br: BibliographicResource = temp_gs.add_br(resp_agent, res=citing_res, preexisting_graph=None)
-            cited_br: BibliographicResource = temp_gs.add_br(resp_agent, res=cited_res, preexisting_graph=None)
+    # The actual GraphSet that will contain the Citation entities to be stored in the output RDF file.
+    # Its counters live in memory and start from the numbers reserved above:
+    ci_gs: GraphSet = GraphSet(base_iri, supplier_prefix=supplier_prefix, wanted_label=False)
+    ci_gs.counter_handler.set_counter(ci_start, 'ci')
+    ci_gs.counter_handler.set_counter(id_start, 'id')
 
-            # Create OCI identifier
-            oci_str: str = str(citing_res)[len(base_iri + 'br/'):] + '-' + str(cited_res)[len(base_iri + 'br/'):]
-            oci: Identifier = ci_gs.add_id(resp_agent)
-            oci.create_oci(oci_str)
+    for citing_meta_id, cited_meta_id, ci_meta_id, oci_str in new_citations:
+        # Create BR entities in "append mode" by providing 'res' without 'preexisting_graph'
+        citing_br: BibliographicResource = temp_gs.add_br(resp_agent, res=URIRef(base_iri + citing_meta_id),
+                                                          preexisting_graph=None)
+        cited_br: BibliographicResource = temp_gs.add_br(resp_agent, res=URIRef(base_iri + cited_meta_id),
+                                                         preexisting_graph=None)
 
-            # Create citation
-            ci: Citation = ci_gs.add_ci(resp_agent)
-            ci.has_identifier(oci)
-            ci.has_citing_entity(citing_br)
-            ci.has_cited_entity(cited_br)
+        # Create OCI identifier
+        oci: Identifier = ci_gs.add_id(resp_agent)
+        oci.create_oci(oci_str)
 
-            # Update the output dataframe
-            id_col[i] = str(ci.res)[len(base_iri):]
-            oci_col[i] = oci_str
+        # Create citation
+        ci: Citation = ci_gs.add_ci(resp_agent)
+        ci.has_identifier(oci)
+        ci.has_citing_entity(citing_br)
+        ci.has_cited_entity(cited_br)
+
+        if str(ci.res) != base_iri + ci_meta_id:
+            raise RuntimeError(f'Unexpected Citation entity minted: {ci.res} (expected {base_iri + ci_meta_id})')
+
+    # Update the output dataframe
+    for i, pair in enumerate(zip(citing_col, cited_col)):
+        id_col[i], oci_col[i] = existing_citations[pair]
 
     # Store the dataframe as a CSV file that's compliant with OpenCitations tools:
     output_filepath: str = os.path.join(converter_citations_csv_output_dir, cur_citations_file)
@@ -216,9 +340,9 @@ def process(cur_citations_file: str, conversion_dict: Dict[str, str]) -> None:
                        'timespan', 'journal_sc', 'author_sc'])
 
     # Store new citations in an RDF file (together with the related provenance).
-    # They should also be uploaded to the triplestore so to update the current state
-    # of execution: by this way, they won't be created again since they will already
-    # be present inside the triplestore.
+    # When the local citations index is not used, they should also be uploaded to the
+    # triplestore so to update the current state of execution: by this way, they won't
+    # be created again since they will already be present inside the triplestore.
     ci_ps: ProvSet = ProvSet(ci_gs, base_iri)
     ci_ps.generate_provenance()
 
@@ -240,14 +364,17 @@ def process(cur_citations_file: str, conversion_dict: Dict[str, str]) -> None:
         # In the following steps of the workflow, every script assumes that data was produced in chunks:
         # this means that this modality should never be chosen and that 'rdf_output_in_chunks' must
         # be set to True.
-        filename_without_csv: str = cur_citations_file[:-4]
 
         # Data
-        f: str = os.path.join(converter_citations_rdf_output_dir, filename_without_csv + ".nt")
+        f: str = os.path.join(converter_citations_rdf_output_dir, nt_filename)
         if not os.path.exists(os.path.dirname(f)):
             os.makedirs(os.path.dirname(f))
         ci_storer.store_graphs_in_file(f, context_path)
-        ci_storer.upload_all(triplestore_url, converter_citations_rdf_output_dir, batch_size=100)
+        if citations_index is not None:
+            # The claimed citations become permanent only once they were actually stored:
+            citations_index.mark_indexed(nt_filename)
+        else:
+            triplestore.upload(ci_storer, converter_citations_rdf_output_dir, batch_size=100)
 
         # Provenance
         prov_dir: str = os.path.join(converter_citations_rdf_output_dir, 'prov')
@@ -262,12 +389,23 @@ def process(cur_citations_file: str, conversion_dict: Dict[str, str]) -> None:
         # In the following steps of the workflow, every script assumes that data was produced in chunks:
         # this means that this modality should never be chosen and that 'rdf_output_in_chunks' must
         # be set to True.
-        ci_storer.upload_and_store(
-            converter_citations_rdf_output_dir, triplestore_url, base_iri, context_path, batch_size=100)
+        if citations_index is not None:
+            ci_storer.store_all(
+                converter_citations_rdf_output_dir, base_iri, context_path)
+            # Here 'nt_filename' is just the name of the claim: no file has that name in this modality
+            citations_index.mark_indexed(nt_filename)
+        else:
+            triplestore.upload_and_store(ci_storer, converter_citations_rdf_output_dir, base_iri, context_path,
+                                         batch_size=100)
 
         ci_prov_storer.store_all(
             converter_citations_rdf_output_dir, base_iri, context_path)
 
+    if citations_index is not None:
+        citations_index.close()
+    if close_triplestore:
+        triplestore.close()
+
 
 """ Entry point of the run_process_citations.py script.
 This process is supposed to import data from the parquet dataset coming from the Extractor,
@@ -283,26 +421,50 @@ if __name__ == '__main__':
 
     start = time.time()
 
-    # Fix config value
-    if base_iri[-1] != '/':
-        base_iri += '/'
     if not os.path.exists(converter_citations_csv_output_dir):
         os.mkdir(converter_citations_csv_output_dir)
 
-    # The mapping dictionary is built here (from 'tmp:XXX' to 'meta:YYY' identifier):
-    tmp_to_meta_dict = {}
+    # The mapping is built here (from 'tmp:XXX' to 'meta:YYY' identifier) and stored
+    # on disk, so that it can be memory-mapped by the processes of the pool:
+    tmp_to_meta = TmpToMetaMapping()
     for csv_file in os.listdir(meta_csv_output_dir):
         if csv_file.endswith('.csv'):
-            tmp_to_meta_dict = update_tmp_to_meta(csv_file, tmp_to_meta_dict)
-
-    # The mapping dictionary is used to convert the citations CSV files.
-    # Please note: since we need to avoid duplicates amongst Citation entities
-    # and we achieve this by querying a triplestore that at each moment will contain
-    # the state of this script's execution, then we are forced to proceed
-    # sequentially with a simple for loop:
-    for citation_file in os.listdir(citations_csv_dir):
-        if citation_file.endswith('.csv'):
-            process(citation_file, tmp_to_meta_dict)
+            tmp_to_meta = update_tmp_to_meta(csv_file, tmp_to_meta)
+    tmp_to_meta.save(tmp_to_meta_dir)
+
+    # The local citations index (if configured) is warmed up with the
+    # Citation entities produced by previous executions of this script:
+    if citations_index_path:
+        with CitationIndex(citations_index_path, base_iri) as index:
+            index.discard_incomplete()
+            index.warm(converter_citations_rdf_output_dir)
+
+    citation_files = [f for f in sorted(os.listdir(citations_csv_dir)) if f.endswith('.csv')]
+
+    # Apply default value for 'process_pool_size':
+    if process_pool_size is None or process_pool_size <= 0:
+        process_pool_size = multiprocessing.cpu_count()
+
+    # The mapping is used to convert the citations CSV files.
+    # Please note: since we need to avoid duplicates amongst Citation entities, each file
+    # looks up an index that at each moment contains the state of this script's execution.
+    # The local citations index can be shared by many processes (new citations are claimed
+    # inside it while holding the counter lock), while the triplestore is updated only
+    # once a file is completely processed: in the latter case, we are forced to proceed
+    # sequentially with a simple for loop (sharing the same triplestore, so that
+    # connections to the triplestore are kept alive).
+    if citations_index_path and process_pool_size > 1 and len(citation_files) > 1:
+        ctx = multiprocessing.get_context('spawn')
+        lock = ctx.Lock()
+        with ctx.Pool(min(process_pool_size, len(citation_files)), initializer=init_worker,
+                      initargs=(lock,)) as pool:
+            pool.map(process_in_worker, citation_files, chunksize=1)
+    else:
+        # (the triplestore is not needed at all when the local citations index is used)
+        with nullcontext() if citations_index_path else \
+                get_triplestore(triplestore_url, timeout=query_timeout, latency=triplestore_latency) as triplestore:
+            for citation_file in citation_files:
+                process(citation_file, tmp_to_meta, triplestore)
 
     end = time.time()
     print("END %d seconds elapsed." % (end - start))
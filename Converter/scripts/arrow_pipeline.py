@@ -0,0 +1,340 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021, Simone Persiani <iosonopersia@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""
+This module is an alternative engine for the run_process.py script (see 'converter_engine' inside conf/conf.py).
+It produces CSV files with the same rows and values of the default (pandas) engine, but data is always kept
+inside pyarrow Tables: string cleaning, filtering and concatenation are performed by Arrow compute kernels, and
+the output CSV files are written straight from Arrow. Python objects are only created for the few values that
+need a real parser ('Authors', 'ID_list' and 'Pages'), one column at a time.
+
+Please note: the files are not byte-for-byte identical, since Arrow encloses every string value in
+double quotes while pandas only quotes the values that need it. Once parsed, their content is the same.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, Iterator, List, Optional
+
+import os
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from conf.conf import extracted_csv_dir, read_batch_size
+from scripts.reader import columns_to_be_imported, unicode_escaped_columns, build_filters, iter_partition_batches
+
+# Utils
+from utils.authors_utils import parse_authors_batch, stringify_authors
+from utils.id_list_utils import parse_id_list_batch, allowed_id_schemes
+from utils.invisible_chars import remove_invisible_chars_column
+from utils.utils import get_output_filepath, split_range_optional
+
+bibliographic_columns = ['id', 'title', 'author', 'pub_date', 'venue', 'volume', 'issue', 'page',
+                         'type', 'type_of_citation', 'publisher', 'editor']
+wiki_columns = ['id', 'title', 'author', 'pub_date', 'venue', 'volume', 'issue', 'page',
+                'type', 'publisher', 'editor']
+
+# Same mapping used by convert_bibliographic (meta recognizes 'pmcid' instead of 'pmc'):
+id_scheme_renaming = {'pmc': 'pmcid'}
+ocdm_types = {'journal article': 'journal article',
+              'conference paper': 'proceedings article',
+              'book': 'book',
+              'book part': 'book part',
+              'book chapter': 'book chapter'
+              }
+
+
+def read_partition_arrow(filepath: str) -> pa.Table:
+    """
+    This function is the Arrow counterpart of 'read_partition' (see scripts/reader.py): the same columns
+    are imported with the same filters, but the data is kept inside a pyarrow Table.
+
+    The unicode escape sequences are decoded by Python only for the values that actually contain a
+    backslash (or a non-ASCII byte): all the other values are simply reinterpreted as strings.
+
+    :param filepath: The path of the parquet partition file to be imported
+    """
+    table: pa.Table = pq.read_table(filepath, columns=columns_to_be_imported,
+                                    filters=build_filters(), use_threads=True)
+    return decode_unicode_escaped_columns_arrow(table)
+
+
+def iter_partition_arrow(filepath: str, batch_size: int = 0) -> Iterator[pa.Table]:
+    """
+    This function is the Arrow counterpart of 'iter_partition' (see scripts/reader.py): when 'batch_size'
+    is greater than 0, the partition is streamed in tables of at most 'batch_size' rows.
+
+    :param filepath: The path of the parquet partition file to be imported
+    :param batch_size: The maximum number of rows of each table (0 to import the whole partition at once)
+    :return: An iterator of pyarrow Tables
+    """
+    if batch_size is None or batch_size <= 0:
+        yield read_partition_arrow(filepath)
+    else:
+        for table in iter_partition_batches(filepath, batch_size):
+            yield decode_unicode_escaped_columns_arrow(table)
+
+
+def decode_unicode_escaped_columns_arrow(table: pa.Table) -> pa.Table:
+    for col in unicode_escaped_columns:
+        idx: int = table.schema.get_field_index(col)
+        table = table.set_column(idx, col, decode_unicode_escape(table.column(col)))
+    return table
+
+
+def decode_unicode_escape(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    """
+    It decodes the unicode escape sequences contained inside the given column of byte strings,
+    exactly as 'str.decode('unicode-escape')' would do, returning a column of strings.
+    """
+    if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+        column = pc.cast(column, pa.binary())
+    column: pa.Array = column.combine_chunks()
+
+    # Pure ASCII values without any backslash don't change when decoded: they're just reinterpreted as strings.
+    # Every other value is decoded by Python (non-ASCII bytes are mapped onto the first 256 code points).
+    as_string: pa.Array = pc.cast(column, options=pc.CastOptions(target_type=pa.string(), allow_invalid_utf8=True))
+    needs_decoding: pa.Array = pc.fill_null(pc.or_(pc.invert(pc.string_is_ascii(as_string)),
+                                                   pc.match_substring(as_string, '\\')), False)
+    if not pc.any(needs_decoding).as_py():
+        return pa.chunked_array([as_string])
+
+    raw_values: List[bytes] = pc.filter(column, needs_decoding).to_pylist()
+    decoded: pa.Array = pa.array([value.decode('unicode-escape', errors='strict') for value in raw_values],
+                                 type=pa.string())
+    return pa.chunked_array([pc.replace_with_mask(as_string, needs_decoding, decoded)])
+
+
+def remove_forbidden_chars_arrow(table: pa.Table) -> pa.Table:
+    """ Arrow counterpart of 'remove_forbidden_chars' (see utils/utils.py) """
+    for col in ['Chapter', 'Periodical', 'PublisherName', 'Title', 'page_title']:
+        idx: int = table.schema.get_field_index(col)
+        cleaned: pa.ChunkedArray = pc.replace_substring_regex(table.column(col), r'[\[\]]', '')
+        table = table.set_column(idx, col, cleaned)
+    return table
+
+
+def remove_id_forbidden_chars(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    # Same chars removed by 'stringify_id_list' (they are used as delimiters in the output format)
+    return pc.replace_substring_regex(column, '[:; ]', '')
+
+
+def convert_authors(column: pa.ChunkedArray) -> pa.Array:
+    # 'astype(str)' turns a missing value into the 'None' string, which is parsed as an empty list of authors
+    # Invisible chars are removed by an Arrow kernel: the parser would remove them anyway, one value at a time
+    authors_column: List[str] = [str(value) for value in remove_invisible_chars_column(column).to_pylist()]
+    return pa.array([stringify_authors(authors) for authors in parse_authors_batch(authors_column)],
+                    type=pa.string())
+
+
+def convert_id_list(column: pa.ChunkedArray) -> Dict[str, pa.Array]:
+    """
+    It parses the 'ID_list' column and it returns one Arrow array (with null values
+    for the missing identifiers) for each of the allowed identifier schemes.
+    """
+    values: Dict[str, List[Optional[str]]] = {scheme: [] for scheme in allowed_id_schemes}
+    id_list_column: List[str] = [str(value) for value in remove_invisible_chars_column(column).to_pylist()]
+    for id_info in parse_id_list_batch(id_list_column):
+        for scheme, scheme_values in values.items():
+            scheme_values.append(id_info.get(scheme))
+    return {scheme: pa.array(scheme_values, type=pa.string()) for scheme, scheme_values in values.items()}
+
+
+def classify_arrow(table: pa.Table) -> pa.ChunkedArray:
+    """
+    It returns the 'label' column computed by 'classifier' (see scripts/classifier.py) for the given table.
+
+    Please note: the rules of 'classifier' which depend on the 'type_of_citation' column are written there as
+    'mask & df['type_of_citation'] == value', which Python evaluates as '(mask & df['type_of_citation']) == value':
+    a boolean Series compared to a string, hence always False. Since this engine must produce the same output
+    of the default one, here only the rules that can actually assign a label are kept.
+    """
+    # These are the effective rules of 'classifier', hard-coded: any change to 'classifier' must be mirrored here
+    # (test/test_arrow_pipeline.py checks that both engines produce the same output)
+    existing_doi = pc.is_valid(table.column('doi'))
+    existing_isbn = pc.is_valid(table.column('isbn'))
+    existing_issn = pc.is_valid(table.column('issn'))
+    has_pubmed_identifier = pc.or_(pc.is_valid(table.column('pmid')), pc.is_valid(table.column('pmc')))
+    has_article_identifier = pc.or_(has_pubmed_identifier, existing_doi)
+
+    has_periodical_and_title = pc.and_(pc.is_valid(table.column('Periodical')), pc.is_valid(table.column('Title')))
+    classified_as_journal_article = pc.and_(existing_issn, pc.or_(has_article_identifier, has_periodical_and_title))
+    classified_as_book = pc.and_(existing_isbn, pc.invert(has_article_identifier))
+
+    # Later rules override the previous ones (as it happens in 'classifier'):
+    label = pc.if_else(classified_as_book, 'book', pc.if_else(classified_as_journal_article, 'journal article', '?'))
+    return label
+
+
+def convert_pages(pages: pa.ChunkedArray, articles_mask: pa.ChunkedArray) -> pa.Array:
+    # Only the pages of articles are kept (see 'convert_bibliographic')
+    result: List[Optional[str]] = []
+    for value, is_article in zip(pages.to_pylist(), articles_mask.to_pylist()):
+        page_range = split_range_optional(value) if is_article else None
+        result.append('-'.join(page_range) if page_range is not None else None)
+    return pa.array(result, type=pa.string())
+
+
+def build_tmp_ids(prefix: str, proc_index: int, num_rows: int, row_offset: int = 0) -> pa.Array:
+    row_numbers: pa.Array = pc.cast(pa.array(range(row_offset, row_offset + num_rows), type=pa.int64()), pa.string())
+    return pc.binary_join_element_wise(f"{prefix}_{proc_index}_", row_numbers, '')
+
+
+def join_ids(ids: Dict[str, pa.ChunkedArray]) -> pa.ChunkedArray:
+    """
+    Arrow counterpart of 'stringify_id_list' (see utils/id_list_utils.py): each
+    non-null identifier becomes 'scheme:value' and they are joined by spaces.
+    """
+    # Each identifier carries its own trailing separator, which is trimmed at the end
+    # (identifiers can't contain spaces, since they are removed as forbidden chars):
+    parts: List[pa.ChunkedArray] = [pc.fill_null(pc.binary_join_element_wise(f"{scheme}:",
+                                                                             remove_id_forbidden_chars(value),
+                                                                             ' ', ''), '')
+                                    for scheme, value in ids.items()]
+    return pc.utf8_rtrim(pc.binary_join_element_wise(*parts, ''), ' ')
+
+
+def map_labels(label: pa.ChunkedArray) -> pa.ChunkedArray:
+    # Same mapping used by convert_bibliographic (labels which are not mapped become null values)
+    result: pa.ChunkedArray = pa.chunked_array([pa.nulls(len(label), type=pa.string())])
+    for wikicode_label, ocdm_type in ocdm_types.items():
+        result = pc.if_else(pc.equal(label, wikicode_label), ocdm_type, result)
+    return result
+
+
+def null_column(num_rows: int) -> pa.Array:
+    return pa.nulls(num_rows, type=pa.string())
+
+
+def convert_bibliographic_arrow(table: pa.Table, proc_index: int, row_offset: int = 0) -> pa.Table:
+    """ Arrow counterpart of 'convert_bibliographic' (see scripts/process_bibliographic.py) """
+    num_rows: int = table.num_rows
+    label: pa.ChunkedArray = table.column('label')
+    articles_mask = pc.is_in(label, value_set=pa.array(['journal article', 'conference paper']))
+    book_chapters = pc.equal(label, 'book chapter')
+
+    # Swap Title and Chapter for book chapters, and fill the venue
+    venue = pc.if_else(book_chapters, table.column('Title'), pc.if_else(articles_mask, table.column('Periodical'),
+                                                                        null_column(num_rows)))
+    title = pc.if_else(book_chapters, table.column('Chapter'), table.column('Title'))
+
+    # Identifiers of venues (see 'stringify_venue_identifiers')
+    issn = table.column('issn')
+    isbn = table.column('isbn')
+    has_venue_ids = pc.and_(pc.is_in(label, value_set=pa.array(['journal article', 'book part', 'book chapter'])),
+                            pc.fill_null(pc.not_equal(pc.utf8_trim_whitespace(venue), ''), False))
+    moved_isbn = pc.and_(has_venue_ids, pc.not_equal(label, 'journal article'))
+    venue_ids = join_ids({'issn': pc.if_else(has_venue_ids, issn, None),
+                          'isbn': pc.if_else(moved_isbn, isbn, None)})
+    venue = pc.if_else(has_venue_ids, pc.binary_join_element_wise(venue, ' [', venue_ids, ']', ''), venue)
+
+    ids: Dict[str, pa.ChunkedArray] = {'tmp': build_tmp_ids('bib', proc_index, num_rows, row_offset)}
+    for scheme in sorted(allowed_id_schemes):
+        ids[id_scheme_renaming.get(scheme, scheme)] = table.column(scheme)
+    ids['issn'] = pc.if_else(has_venue_ids, None, issn)
+    ids['isbn'] = pc.if_else(moved_isbn, None, isbn)
+
+    return pa.table({
+        'id': join_ids(ids),
+        'title': title,
+        'author': convert_authors(table.column('Authors')),
+        'pub_date': table.column('Date'),
+        'venue': venue,
+        'volume': table.column('Volume'),
+        'issue': table.column('Issue'),
+        'page': convert_pages(table.column('Pages'), articles_mask),
+        'type': map_labels(label),
+        'type_of_citation': table.column('type_of_citation'),
+        'publisher': table.column('PublisherName'),
+        'editor': null_column(num_rows),
+        'tmp': ids['tmp']
+    })
+
+
+def stringify_wikipedia_ids(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    # The pandas engine uses 'astype(str)': floats must keep their Python representation (e.g. '123.0')
+    if pa.types.is_floating(column.type):
+        return pa.chunked_array([pa.array([str(value) for value in column.to_pylist()], type=pa.string())])
+    return pc.cast(column, pa.string())
+
+
+def convert_wiki_arrow(table: pa.Table, proc_index: int, row_offset: int = 0) -> pa.Table:
+    """ Arrow counterpart of 'convert_wiki' (see scripts/process_wiki.py) """
+    num_rows: int = table.num_rows
+    tmp: pa.Array = build_tmp_ids('wiki', proc_index, num_rows, row_offset)
+    columns: Dict[str, pa.Array] = {
+        'id': join_ids({'tmp': tmp, 'wikipedia': stringify_wikipedia_ids(table.column('id'))}),
+        'title': table.column('page_title')
+    }
+    for col in wiki_columns[2:]:
+        columns[col] = null_column(num_rows)
+    columns['tmp'] = tmp
+    return pa.table(columns)
+
+
+def write_csv_arrow(table: pa.Table, output_filepath: str, columns: List[str], append: bool = False) -> None:
+    # When appending, the header must not be repeated
+    with open(output_filepath, 'ab' if append else 'wb') as f:
+        pa_csv.write_csv(table.select(columns), f, pa_csv.WriteOptions(include_header=not append))
+
+
+def process_arrow(name_width: int, proc_index: int, input_file: str) -> None:
+    """
+    This function is the Arrow counterpart of the body of 'process' (see run_process.py): it takes care
+    of the entire processing of a single parquet partition file, writing output CSV files with the same content.
+    As it happens with the pandas engine, the partition is converted in batches when 'read_batch_size'
+    (see conf/conf.py) is greater than 0.
+
+    :param name_width: The required length of the output filenames
+    :param proc_index: An incremental integer index which differentiates every spawned process
+    :param input_file: The path of the input parquet partition file
+    """
+    citations_dir: str = os.path.join(extracted_csv_dir, 'citations')
+    if not os.path.exists(citations_dir):
+        os.makedirs(citations_dir)
+    subfolder_name: str = str(proc_index).rjust(name_width, '0')
+
+    row_offset: int = 0
+    for batch_index, table in enumerate(iter_partition_arrow(input_file, read_batch_size)):
+        table = remove_forbidden_chars_arrow(table)
+
+        # 'ID_list' is exploded into one column for each identifier scheme
+        for scheme, values in convert_id_list(table.column('ID_list')).items():
+            table = table.append_column(scheme, values)
+        table = table.drop(['ID_list'])
+
+        # Every unlabelled citation is dropped
+        table = table.append_column('label', classify_arrow(table))
+        table = table.filter(pc.not_equal(table.column('label'), '?'))
+
+        bibliographic_table: pa.Table = convert_bibliographic_arrow(table, proc_index, row_offset)
+        wiki_table: pa.Table = convert_wiki_arrow(table, proc_index, row_offset)
+        citations_table: pa.Table = pa.table({'citing': wiki_table.column('tmp'),
+                                              'cited': bibliographic_table.column('tmp')})
+
+        # The first batch creates the files, the other ones are appended
+        append: bool = batch_index > 0
+        write_csv_arrow(bibliographic_table, get_output_filepath(proc_index, name_width, 'bibliographic'),
+                        bibliographic_columns, append)
+        write_csv_arrow(wiki_table, get_output_filepath(proc_index, name_width, 'wiki'), wiki_columns, append)
+        write_csv_arrow(citations_table, citations_dir + os.sep + subfolder_name + '.csv', ['citing', 'cited'],
+                        append)
+
+        row_offset += table.num_rows
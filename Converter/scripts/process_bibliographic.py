@@ -26,7 +26,7 @@ from utils.id_list_utils import stringify_id_list, allowed_id_schemes
 from utils.utils import get_output_filepath, split_range_optional, collapse_id_list
 
 
-def convert_bibliographic(df: pd.DataFrame, proc_index: int = 0) -> pd.DataFrame:
+def convert_bibliographic(df: pd.DataFrame, proc_index: int = 0, row_offset: int = 0) -> pd.DataFrame:
     """
     This function is able to process a DataFrame of bibliographic resources, converting it
     to a format which is compliant with the 'meta' script.
@@ -37,6 +37,8 @@ def convert_bibliographic(df: pd.DataFrame, proc_index: int = 0) -> pd.DataFrame
     :param df: The Dataframe to be converted containing data about cited bibliographic resource
     :param proc_index: An integer number which identifies the process that is taking care of converting the
                         given DataFrame
+    :param row_offset: The number of rows of the same partition that were already converted (in previous
+                       batches): it's added to the row index of each 'tmp' identifier to keep them unique
     :return: The converted DataFrame
     """
     # Here we handle the 'Pages' column: its meaning can be
@@ -77,9 +79,10 @@ def convert_bibliographic(df: pd.DataFrame, proc_index: int = 0) -> pd.DataFrame
     # Stringify 'ID_list' column (enriched with 'tmp' identifiers)
     # and add identifiers to the 'venue' column where needed
     stringify_venue_identifiers(df)
-    df['tmp'] = f"bib_{proc_index}_" + df.index.astype(str)  # this adds a 'tmp' column
+    df['tmp'] = f"bib_{proc_index}_" + (df.index + row_offset).astype(str)  # this adds a 'tmp' column
     # The following line removes identifier columns and adds a 'ID_list' column
-    df = collapse_id_list(df, 'ID_list', ['tmp', *id_schemes], do_not_drop={'tmp'})
+    # (identifiers are sorted by scheme: the order of a set of strings changes from one run to another)
+    df = collapse_id_list(df, 'ID_list', ['tmp', *sorted(id_schemes)], do_not_drop={'tmp'})
     df['id'] = df['ID_list'].map(stringify_id_list)  # this adds an 'id'
 
     # Stringify 'Authors' column
@@ -103,7 +106,7 @@ def convert_bibliographic(df: pd.DataFrame, proc_index: int = 0) -> pd.DataFrame
     return df
 
 
-def store_bibliographic(index: int, name_width: int, df: pd.DataFrame) -> None:
+def store_bibliographic(index: int, name_width: int, df: pd.DataFrame, append: bool = False) -> None:
     """
     This function is able to store the given DataFrame as a CSV file. It's used
     to produce 'meta' compliant files inside a folder whose path is configurable
@@ -120,9 +123,10 @@ def store_bibliographic(index: int, name_width: int, df: pd.DataFrame) -> None:
                   a recognizable name to the file
     :param name_width: How many chars should be reserved for the numeric index at the beginning of the filename
     :param df: The DataFrame to be exported as a CSV file
+    :param append: Whether the rows should be appended to the CSV file (without repeating its header)
     """
     output_filepath: str = get_output_filepath(index, name_width, 'bibliographic')
-    df.to_csv(output_filepath, index=False, chunksize=100000,
+    df.to_csv(output_filepath, index=False, chunksize=100000, mode='a' if append else 'w', header=not append,
               columns=['id', 'title', 'author', 'pub_date', 'venue',
                        'volume', 'issue', 'page', 'type', 'type_of_citation', 'publisher',
                        'editor'])
@@ -41,7 +41,7 @@ def build_citations_dataframe(wiki_df: pd.DataFrame, bib_df: pd.DataFrame) -> pd
     return df
 
 
-def store_citations(index: int, name_width: int, df: pd.DataFrame) -> None:
+def store_citations(index: int, name_width: int, df: pd.DataFrame, append: bool = False) -> None:
     """
     This function is able to store the given DataFrame as a CSV file. It's used
     to produce a temporary file needed by the run_process_citations.py script.
@@ -59,6 +59,7 @@ def store_citations(index: int, name_width: int, df: pd.DataFrame) -> None:
                   a recognizable name to the file
     :param name_width: How many chars should be reserved for the numeric index at the beginning of the filename
     :param df: The DataFrame to be exported as a CSV file
+    :param append: Whether the rows should be appended to the CSV file (without repeating its header)
     """
     subfolder_name: str = str(index).rjust(name_width, '0')
     citations_dir: str = os.path.join(extracted_csv_dir, 'citations')
@@ -66,5 +67,5 @@ def store_citations(index: int, name_width: int, df: pd.DataFrame) -> None:
         os.mkdir(citations_dir)
 
     output_filepath: str = citations_dir + os.sep + subfolder_name + '.csv'
-    df.to_csv(output_filepath, index=False, chunksize=100000,
+    df.to_csv(output_filepath, index=False, chunksize=100000, mode='a' if append else 'w', header=not append,
               columns=['citing', 'cited'])
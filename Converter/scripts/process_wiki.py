@@ -23,7 +23,7 @@ from utils.id_list_utils import stringify_id_list
 from utils.utils import get_output_filepath, collapse_id_list
 
 
-def convert_wiki(df: pd.DataFrame, proc_index: int = 0) -> pd.DataFrame:
+def convert_wiki(df: pd.DataFrame, proc_index: int = 0, row_offset: int = 0) -> pd.DataFrame:
     """
     This function is able to process a DataFrame of Wikipedia pages, converting it
     to a format which is compliant with the 'meta' script.
@@ -34,10 +34,12 @@ def convert_wiki(df: pd.DataFrame, proc_index: int = 0) -> pd.DataFrame:
     :param df: The Dataframe to be converted containing data about citing Wikipedia pages
     :param proc_index: An integer number which identifies the process that is taking care of converting the
                         given DataFrame
+    :param row_offset: The number of rows of the same partition that were already converted (in previous
+                       batches): it's added to the row index of each 'tmp' identifier to keep them unique
     :return: The converted DataFrame
     """
     # Convert column 'id' and add the 'tmp' ID:
-    df['tmp'] = f"wiki_{proc_index}_" + df.index.astype(str)  # this adds a 'tmp'
+    df['tmp'] = f"wiki_{proc_index}_" + (df.index + row_offset).astype(str)  # this adds a 'tmp'
 
     df = df.rename({'id': 'wikipedia'}, axis=1)
     # In our case, no NaN values can be found inside this column: this means that we can safely convert
@@ -65,7 +67,7 @@ def convert_wiki(df: pd.DataFrame, proc_index: int = 0) -> pd.DataFrame:
     return df
 
 
-def store_wiki(index: int, name_width: int, df: pd.DataFrame) -> None:
+def store_wiki(index: int, name_width: int, df: pd.DataFrame, append: bool = False) -> None:
     """
     This function is able to store the given DataFrame as a CSV file. It's used
     to produce 'meta' compliant files inside a folder whose path is configurable
@@ -82,9 +84,10 @@ def store_wiki(index: int, name_width: int, df: pd.DataFrame) -> None:
                   a recognizable name to the file
     :param name_width: How many chars should be reserved for the numeric index at the beginning of the filename
     :param df: The DataFrame to be exported as a CSV file
+    :param append: Whether the rows should be appended to the CSV file (without repeating its header)
     """
     output_filepath: str = get_output_filepath(index, name_width, 'wiki')
-    df.to_csv(output_filepath, index=False, chunksize=100000,
+    df.to_csv(output_filepath, index=False, chunksize=100000, mode='a' if append else 'w', header=not append,
               columns=['id', 'title', 'author', 'pub_date', 'venue',
                        'volume', 'issue', 'page', 'type', 'publisher',
                        'editor'])
@@ -13,7 +13,16 @@
 # DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
 # ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
 # SOFTWARE.
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Iterator, List, Tuple
+
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
 from conf.conf import parquet_engine, allowed_citation_types
 
 """
@@ -33,6 +42,93 @@ unicode_escaped_columns = ['Authors', 'Chapter', 'Date', 'ID_list', 'Issue', 'Pa
                            'Periodical', 'PublisherName', 'Title', 'Volume']
 
 
+def build_filters() -> List[List[Tuple[str, str, str]]]:
+    """
+    This function builds the filters which are applied while reading a parquet partition file
+    (see 'read_partition'). They're expressed in DNF (Disjunction Normal Form), as required by
+    both the pyarrow and the fastparquet engines.
+    """
+    filters: List[List[Tuple[str, str, str]]] = []
+
+    # In case of non parseable citation templates, the Extractor outputs
+    # the 'Title' column value as 'Citation generic template not possible'
+    non_parseable_constraint = ('Title', '!=', 'Citation generic template not possible')
+
+    for cit_type in allowed_citation_types:
+        # Filtering constraints are expressed in DNF (Disjunction Normal Form)
+        filters.append([non_parseable_constraint, ('type_of_citation', '=', cit_type)])
+    return filters
+
+
+def build_filter_expression() -> ds.Expression:
+    """
+    This function converts the filters returned by 'build_filters' into an equivalent
+    pyarrow Expression, which can be used when scanning a parquet file batch by batch.
+    """
+    operators = {'=': lambda field, value: field == value,
+                 '!=': lambda field, value: field != value}
+    expression = None
+    for conjunction in build_filters():
+        conj_expression = None
+        for column, operator, value in conjunction:
+            predicate = operators[operator](ds.field(column), value)
+            conj_expression = predicate if conj_expression is None else conj_expression & predicate
+        expression = conj_expression if expression is None else expression | conj_expression
+    return expression
+
+
+def iter_partition_batches(filepath: str, batch_size: int) -> Iterator[pa.Table]:
+    """
+    This function reads a parquet partition file one record batch at a time (each of them containing
+    at most 'batch_size' rows), applying the same columns selection and filters of 'read_partition'.
+    In this way, only a bounded part of the partition is kept in memory at any given time.
+
+    At least one (possibly empty) table is always returned, so that the output files are always produced.
+
+    :param filepath: The path of the parquet partition file to be imported
+    :param batch_size: The maximum number of rows of each returned table
+    :return: An iterator of pyarrow Tables
+    """
+    dataset: ds.Dataset = ds.dataset(filepath, format='parquet')
+    scanned_rows: bool = False
+    for batch in dataset.to_batches(columns=columns_to_be_imported, filter=build_filter_expression(),
+                                    batch_size=batch_size):
+        if batch.num_rows > 0:
+            scanned_rows = True
+            yield pa.Table.from_batches([batch])
+    if not scanned_rows:
+        yield dataset.schema.empty_table().select(columns_to_be_imported)
+
+
+def iter_partition(filepath: str, batch_size: int = 0) -> Iterator[pd.DataFrame]:
+    """
+    This function imports a parquet partition file into one or more Pandas DataFrames.
+    When 'batch_size' is 0 (or less), the whole partition is imported at once (see 'read_partition'),
+    otherwise it's streamed in DataFrames of at most 'batch_size' rows (see 'iter_partition_batches').
+    Streaming always relies on the pyarrow engine.
+
+    Please note: the index of every DataFrame always starts from 0.
+
+    :param filepath: The path of the parquet partition file to be imported
+    :param batch_size: The maximum number of rows of each DataFrame
+    :return: An iterator of Pandas DataFrames
+    """
+    if batch_size is None or batch_size <= 0:
+        yield read_partition(filepath)
+    else:
+        for table in iter_partition_batches(filepath, batch_size):
+            df: pd.DataFrame = table.to_pandas()
+            decode_unicode_escaped_columns(df)
+            yield df
+
+
+def decode_unicode_escaped_columns(df: pd.DataFrame) -> None:
+    # String charsets are unified. Every string will be internally
+    # stored and handled as a unicode string.
+    for col in unicode_escaped_columns:
+        df[col] = df[col].str.decode('unicode-escape', errors='strict')
+
+
 def read_partition(filepath: str) -> pd.DataFrame:
     """
     This function is needed to import a parquet partition file into a Pandas DataFrame.
@@ -54,17 +150,9 @@ def read_partition(filepath: str) -> pd.DataFrame:
     :param filepath: The path of the parquet partition file to be imported
     """
     arguments = {'columns': columns_to_be_imported,
-                 'filters': []
+                 'filters': build_filters()
                  }
 
-    # In case of non parseable citation templates, the Extractor outputs
-    # the 'Title' column value as 'Citation generic template not possible'
-    non_parseable_constraint = ('Title', '!=', 'Citation generic template not possible')
-
-    for cit_type in allowed_citation_types:
-        # Filtering constraints are expressed in DNF (Disjunction Normal Form)
-        arguments['filters'].append([non_parseable_constraint, ('type_of_citation', '=', cit_type)])
-
     if parquet_engine is not None and parquet_engine != 'auto':
         if parquet_engine == 'pyarrow':
             arguments['use_threads'] = True
@@ -73,9 +161,5 @@ def read_partition(filepath: str) -> pd.DataFrame:
     else:
         df = pd.read_parquet(filepath, engine='auto', **arguments)
 
-    # String charsets are unified. Every string will be internally
-    # stored and handled as a unicode string.
-    for col in unicode_escaped_columns:
-        df[col] = df[col].str.decode('unicode-escape', errors='strict')
-
+    decode_unicode_escaped_columns(df)
     return df
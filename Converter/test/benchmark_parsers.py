@@ -0,0 +1,85 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021, Simone Persiani <iosonopersia@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""
+Micro-benchmark of the parsers of the 'Authors' and 'ID_list' columns (see utils/authors_utils.py and
+utils/id_list_utils.py). It isn't run by 'unittest discover': it must be launched explicitly as follows:
+
+    cd <path>/Converter
+    python -m test.benchmark_parsers
+
+For each column, synthetic values (shaped like the ones serialized by the Extractor) are parsed both
+row by row and through the batch API. The authors parser is also timed over lists of growing length,
+so that its scaling can be checked (the time per author should stay roughly constant).
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Callable, List
+
+import random
+import timeit
+
+from utils.authors_utils import parse_authors, parse_authors_batch
+from utils.id_list_utils import parse_id_list, parse_id_list_batch
+
+
+def build_authors(rng: random.Random, num_authors: int) -> str:
+    authors: List[str] = []
+    for i in range(num_authors):
+        authors.append(rng.choice([f"{{first=Name{i}, last=Surname{i}, Jr.}}",
+                                   f"{{last=Surname{i}}}",
+                                   f"{{link=Surname{i}, Name{i}}}",
+                                   f"{{first==Name{i},  last= =Surname{i}}}"]))
+    return '[' + ', '.join(authors) + ']'
+
+
+def build_id_list(rng: random.Random) -> str:
+    ids: List[str] = [f"DOI=10.{rng.randint(1000, 9999)}/abc.{rng.randint(0, 10 ** 6)}"]
+    if rng.random() < 0.5:
+        ids.append(f"ISSN={rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}")
+    if rng.random() < 0.3:
+        ids.append(f"ISBN=978-{rng.randint(10 ** 8, 10 ** 9)}")
+    if rng.random() < 0.2:
+        ids.append(f"PMID={rng.randint(1, 10 ** 7)}")
+    return '{' + ', '.join(ids) + '}'
+
+
+def report(label: str, func: Callable[[], object], num_values: int, repeat: int = 3) -> None:
+    best: float = min(timeit.repeat(func, number=1, repeat=repeat))
+    print(f"{label:<40} {best:8.3f}s  ({best / num_values * 1e6:8.2f} us per value)")
+
+
+def run(num_rows: int = 100000, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    authors_column: List[str] = [build_authors(rng, rng.randint(0, 8)) for _ in range(num_rows)]
+    id_list_column: List[str] = [build_id_list(rng) for _ in range(num_rows)]
+
+    print(f"Column of {num_rows} values:")
+    report('parse_authors (row by row)', lambda: [parse_authors(v) for v in authors_column], num_rows)
+    report('parse_authors_batch', lambda: parse_authors_batch(authors_column), num_rows)
+    report('parse_id_list (row by row)', lambda: [parse_id_list(v) for v in id_list_column], num_rows)
+    report('parse_id_list_batch', lambda: parse_id_list_batch(id_list_column), num_rows)
+
+    print("Scaling of parse_authors (time per author):")
+    for num_authors in [10, 100, 1000, 10000]:
+        value: str = build_authors(rng, num_authors)
+        report(f"{num_authors} authors", lambda: parse_authors(value), num_authors)
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,133 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021, Simone Persiani <iosonopersia@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+import csv
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from run_process import process_pandas
+from scripts.arrow_pipeline import decode_unicode_escape, join_ids, classify_arrow, stringify_wikipedia_ids, \
+    process_arrow
+
+
+class TestArrowPipeline(unittest.TestCase):
+
+    def test_decode_unicode_escape(self):
+        with self.subTest('Values that need no decoding'):
+            column = pa.chunked_array([pa.array([b'Nature', None, b''], type=pa.binary())])
+            result = decode_unicode_escape(column)
+            self.assertEqual(result.type, pa.string())
+            self.assertListEqual(result.to_pylist(), ['Nature', None, ''])
+        with self.subTest('Values with escape sequences or non-ASCII bytes'):
+            values = [b'Caf\\u00e9', b'plain', b'\xc3\x85', None]
+            column = pa.chunked_array([pa.array(values, type=pa.binary())])
+            result = decode_unicode_escape(column)
+            expected = [v.decode('unicode-escape') if v is not None else None for v in values]
+            self.assertListEqual(result.to_pylist(), expected)
+
+    def test_join_ids(self):
+        ids = {'tmp': pa.chunked_array([['bib_0_0', 'bib_0_1', None]]),
+               'doi': pa.chunked_array([['10.1/a b', None, None]]),
+               'issn': pa.chunked_array([[None, '1234-5678', None]])}
+        result = join_ids(ids)
+        self.assertListEqual(result.to_pylist(), ['tmp:bib_0_0 doi:10.1/ab', 'tmp:bib_0_1 issn:1234-5678', ''])
+
+    def test_classify_arrow(self):
+        def column(*values):
+            return pa.array(values, type=pa.string())
+
+        table = pa.table({'doi': column('10.1/a', None, None, '10.1/b'),
+                          'isbn': column(None, '978', None, '978'),
+                          'issn': column('1234-5678', None, '1234-5678', None),
+                          'pmid': column(None, None, None, None),
+                          'pmc': column(None, None, None, None),
+                          'Periodical': column(None, None, 'Nature', None),
+                          'Title': column(None, None, 'A title', None)})
+        result = classify_arrow(table)
+        self.assertListEqual(result.to_pylist(), ['journal article', 'book', 'journal article', '?'])
+
+    def test_stringify_wikipedia_ids(self):
+        with self.subTest('Float identifiers'):
+            result = stringify_wikipedia_ids(pa.chunked_array([pa.array([123.0, 4.0])]))
+            self.assertListEqual(result.to_pylist(), ['123.0', '4.0'])
+        with self.subTest('Integer identifiers'):
+            result = stringify_wikipedia_ids(pa.chunked_array([pa.array([123, 4])]))
+            self.assertListEqual(result.to_pylist(), ['123', '4'])
+
+
+class TestEngineEquivalence(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.tmp_dir.name, 'part-0.parquet')
+
+        # Journal articles (with their venue identifiers), books, an escaped value, a comma and a
+        # citation that can't be classified (hence dropped)
+        rows = [
+            (b'[{first=John, last=Doe}, {first=Jane, last=Roe}]', None, b'2001',
+             b'{doi=10.1/a, issn=1234-5678, pmid=1}', b'2', b'10-20', b'Nature', b'Publisher', b'Title, with a comma',
+             b'3', 1.0, 'Page 1', 'cite journal'),
+            (b'[{first=Caf\\u00e9, last=Doe}]', None, b'2002', b'{isbn=9780521560245}', None, b'1-9', None,
+             b'Publisher', b'A book', None, 2.0, 'Page 2', 'cite book'),
+            (None, None, None, b'{doi=10.1/b, isbn=9780521560245, pmc=PMC1, issn=1234-5678}', None, b'vii', b'Cell',
+             None, b'Caf\\u00e9', None, 3.0, 'Page "3"', 'cite journal'),
+            (None, None, None, b'{}', None, None, None, None, b'Nothing', None, 4.0, 'Page 4', 'cite web'),
+            (None, None, b'2005', b'{pmid=5}', None, None, b'Journal', None, b'No identifier', None, 5.0, 'Page 5',
+             'citation'),
+        ]
+        binary_columns = ['Authors', 'Chapter', 'Date', 'ID_list', 'Issue', 'Pages', 'Periodical', 'PublisherName',
+                          'Title', 'Volume']
+        columns = binary_columns + ['id', 'page_title', 'type_of_citation']
+        data = {col: pa.array([row[i] for row in rows], type=pa.binary() if col in binary_columns else None)
+                for i, col in enumerate(columns)}
+        pq.write_table(pa.table(data), self.filepath)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def convert(self, process_function, name):
+        output_dir = os.path.join(self.tmp_dir.name, name)
+        with mock.patch('utils.utils.extracted_csv_dir', output_dir), \
+                mock.patch('scripts.process_citations.extracted_csv_dir', output_dir), \
+                mock.patch('scripts.arrow_pipeline.extracted_csv_dir', output_dir):
+            process_function(1, 0, self.filepath)
+
+        result = {}
+        for cur_dir, _, files in os.walk(output_dir):
+            for filename in files:
+                filepath = os.path.join(cur_dir, filename)
+                with open(filepath, newline='', encoding='utf-8') as f:
+                    result[os.path.relpath(filepath, output_dir)] = list(csv.reader(f))
+        return result
+
+    def test_same_content(self):
+        for batch_size in (0, 2):
+            with self.subTest(read_batch_size=batch_size), mock.patch('run_process.read_batch_size', batch_size), \
+                    mock.patch('scripts.arrow_pipeline.read_batch_size', batch_size):
+                pandas_output = self.convert(process_pandas, f'pandas_{batch_size}')
+                arrow_output = self.convert(process_arrow, f'arrow_{batch_size}')
+                self.assertEqual(sorted(pandas_output), ['0_bibliographic.csv', '0_wiki.csv',
+                                                         os.path.join('citations', '0.csv')])
+                self.assertEqual(len(pandas_output['0_bibliographic.csv']), 4)
+                self.assertDictEqual(arrow_output, pandas_output)
+
+
+if __name__ == '__main__':
+    unittest.main()
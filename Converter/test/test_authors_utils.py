@@ -15,7 +15,7 @@
 # SOFTWARE.
 import unittest
 from utils.authors_utils import extract_author_name, invalid_brackets, unify_duplicated_equal_signs,\
-                                clean_author_string, get_author_dict, parse_authors
+                                clean_author_string, get_author_dict, parse_authors, parse_authors_batch
 
 
 class TestAuthorsUtils(unittest.TestCase):
@@ -91,6 +91,23 @@ class TestAuthorsUtils(unittest.TestCase):
                                                ' {first=Albert, last=Einstein}]', True), [])
             self.assertListEqual(parse_authors('[]', True), [])
 
+        with self.subTest('Content outside of the square brackets is ignored'):
+            result = parse_authors('[{first=Clark}] } {first=Albert}')
+            self.assertListEqual(result, [{'first': 'Clark'}])
+
+    def test_parse_authors_batch(self):
+        column = ['[{first=Clark, last===Kent}, {first=Albert, last=Einstein}]', None, 'None', '[{}]',
+                  '[{link=Rossi, Mario}]']
+        result = parse_authors_batch(column)
+        self.assertListEqual(result, [[{'first': 'Clark', 'last': 'Kent'}, {'first': 'Albert', 'last': 'Einstein'}],
+                                      [], [], [], [{'link': 'Rossi, Mario'}]])
+        self.assertListEqual(result, [parse_authors(value) for value in column])
+
+        # Repeated values are parsed only once
+        result = parse_authors_batch(column + column)
+        self.assertListEqual(result, [parse_authors(value) for value in column + column])
+        self.assertIs(result[0], result[len(column)])
+
 
 if __name__ == '__main__':
     unittest.main()
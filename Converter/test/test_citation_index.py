@@ -0,0 +1,94 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021, Simone Persiani <iosonopersia@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+import os
+import tempfile
+import unittest
+from utils.citation_index import CitationIndex
+
+base_iri = 'https://w3id.org/oc/meta/'
+nt_content = (
+    '<https://w3id.org/oc/meta/ci/0601> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> '
+    '<http://purl.org/spar/cito/Citation> .\n'
+    '<https://w3id.org/oc/meta/ci/0601> <http://purl.org/spar/cito/hasCitingEntity> '
+    '<https://w3id.org/oc/meta/br/061> .\n'
+    '<https://w3id.org/oc/meta/ci/0601> <http://purl.org/spar/cito/hasCitedEntity> '
+    '<https://w3id.org/oc/meta/br/062> .\n'
+    '<https://w3id.org/oc/meta/ci/0601> <http://purl.org/spar/datacite/hasIdentifier> '
+    '<https://w3id.org/oc/meta/id/0605> .\n'
+    '<https://w3id.org/oc/meta/id/0605> <http://purl.org/spar/datacite/usesIdentifierScheme> '
+    '<http://purl.org/spar/datacite/oci> .\n'
+    '<https://w3id.org/oc/meta/id/0605> <http://www.essepuntato.it/2010/06/literalreification/hasLiteralValue> '
+    '"061-062"^^<http://www.w3.org/2001/XMLSchema#string> .\n'
+    '<https://w3id.org/oc/meta/ci/0602> <http://purl.org/spar/cito/hasCitingEntity> '
+    '<https://w3id.org/oc/meta/br/061> .\n'
+    '<https://w3id.org/oc/meta/ci/0602> <http://purl.org/spar/cito/hasCitedEntity> '
+    '<https://w3id.org/oc/meta/br/063> .\n'
+)
+
+
+class TestCitationIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.rdf_dir = os.path.join(self.tmp_dir.name, 'rdf_output')
+        os.makedirs(os.path.join(self.rdf_dir, 'prov'))
+        with open(os.path.join(self.rdf_dir, '0.nt'), 'w', encoding='utf-8') as f:
+            f.write(nt_content)
+        self.db_path = os.path.join(self.tmp_dir.name, 'citations_index.db')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_extract_citations(self):
+        with CitationIndex(self.db_path, base_iri) as index:
+            result = index.extract_citations(os.path.join(self.rdf_dir, '0.nt'))
+            self.assertCountEqual(result, [('br/061', 'br/062', 'ci/0601', '061-062'),
+                                           ('br/061', 'br/063', 'ci/0602', None)])
+
+    def test_warm(self):
+        with CitationIndex(self.db_path, base_iri) as index:
+            self.assertEqual(index.warm(self.rdf_dir), 1)
+            self.assertEqual(index.warm(self.rdf_dir), 0)  # already indexed
+            self.assertTrue(index.is_indexed('0.nt'))
+
+        # The index must be persistent
+        with CitationIndex(self.db_path, base_iri) as index:
+            result = index.find([('br/061', 'br/062'), ('br/061', 'br/063'), ('br/062', 'br/061')])
+            self.assertDictEqual(result, {('br/061', 'br/062'): ('ci/0601', '061-062'),
+                                          ('br/061', 'br/063'): ('ci/0602', None)})
+
+    def test_add(self):
+        with CitationIndex(self.db_path, base_iri) as index:
+            index.add([('br/1', 'br/2', 'ci/1', '1-2')], '1.nt')
+            index.add([('br/1', 'br/2', 'ci/9', '1-2')])  # already indexed couples are left untouched
+            self.assertTrue(index.is_indexed('1.nt'))
+            self.assertDictEqual(index.find([('br/1', 'br/2')]), {('br/1', 'br/2'): ('ci/1', '1-2')})
+
+    def test_claim(self):
+        with CitationIndex(self.db_path, base_iri) as index:
+            index.claim([('br/1', 'br/2', 'ci/1', '1-2')], '1.nt')
+            index.claim([('br/3', 'br/4', 'ci/2', '3-4')], '2.nt')
+            index.add([('br/5', 'br/6', 'ci/3', '5-6')])
+            self.assertEqual(len(index.find([('br/1', 'br/2'), ('br/3', 'br/4')])), 2)
+
+            index.mark_indexed('1.nt')
+            self.assertEqual(index.discard_incomplete(), 1)  # '2.nt' was never stored
+            self.assertDictEqual(index.find([('br/1', 'br/2'), ('br/3', 'br/4'), ('br/5', 'br/6')]),
+                                 {('br/1', 'br/2'): ('ci/1', '1-2'), ('br/5', 'br/6'): ('ci/3', '5-6')})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -15,7 +15,7 @@
 # SOFTWARE.
 import unittest
 from utils.id_list_utils import invalid_brackets, clean_id_list_string,\
-                                parse_id_list, parse_id_list_repeated_schemes
+                                parse_id_list, parse_id_list_repeated_schemes, parse_id_list_batch
 
 class TestIdUtils(unittest.TestCase):
 
@@ -43,12 +43,23 @@ class TestIdUtils(unittest.TestCase):
             self.assertRaises(ValueError, parse_id_list, 'doi=xyz,} isbn=abc, doi=PQR{', False)
             self.assertRaises(ValueError, parse_id_list, '{doi=xy=z, isbn=abc, doi=PQR}', False)
             self.assertRaises(ValueError, parse_id_list, '{asgr=xxx, poiaf=yyy}', False)
+            self.assertRaises(ValueError, parse_id_list, '{doi=a=b=c}', False)
 
         with self.subTest('Invalid strings (ignore_errors=True)'):
             self.assertDictEqual(parse_id_list('doi=xyz,{ isbn=abc, doi=PQR{', True), {})
             self.assertDictEqual(parse_id_list('{doi=xy=z, isbn=abc, doi=PQR}', True), {})
             self.assertDictEqual(parse_id_list('{asgr=xxx, poiaf=yyy}', True), {})
 
+    def test_parse_id_list_batch(self):
+        column = ['{doi=xyz, isbn=abc}', None, 'nan', '{doi=xy=z, isbn=abc}', '{PMID=123}']
+        result = parse_id_list_batch(column)
+        self.assertListEqual(result, [{'doi': 'xyz', 'isbn': 'abc'}, {}, {}, {}, {'pmid': '123'}])
+
+        # Repeated values are parsed only once
+        result = parse_id_list_batch(column + column)
+        self.assertListEqual(result, [parse_id_list(value) for value in column + column])
+        self.assertIs(result[0], result[len(column)])
+
     def test_parse_id_list_repeated_schemes(self):
         with self.subTest('Valid string'):
             result = parse_id_list_repeated_schemes('tmp:xyz tmp:abc meta:PQR')
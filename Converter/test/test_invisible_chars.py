@@ -13,8 +13,18 @@
 # DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
 # ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
 # SOFTWARE.
+import os
+import tempfile
 import unittest
-from utils.invisible_chars import remove_invisible_chars
+import unicodedata
+from unittest import mock
+
+import pandas as pd
+import pyarrow as pa
+
+import utils.invisible_chars as invisible_chars
+from utils.invisible_chars import remove_invisible_chars, remove_invisible_chars_column, \
+    compute_control_char_ranges, load_control_char_ranges
 
 
 class TestInvisibleChars(unittest.TestCase):
@@ -26,6 +36,32 @@ class TestInvisibleChars(unittest.TestCase):
 
         self.assertEqual(result, 'abc def ghi lmn ')
 
+    def test_control_char_ranges(self):
+        # The precomputed ranges must be equal to the ones of the running Python
+        self.assertListEqual(load_control_char_ranges(), compute_control_char_ranges())
+
+        with self.subTest('Different version of the Unicode database'):
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                with mock.patch.object(invisible_chars, 'precomputed_unidata_version', 'unknown'), \
+                        mock.patch.object(tempfile, 'gettempdir', return_value=tmp_dir):
+                    result = load_control_char_ranges()
+                    self.assertListEqual(result, compute_control_char_ranges())
+
+                    cache_file = f'wcw_control_chars_{unicodedata.unidata_version}.json'
+                    self.assertListEqual(os.listdir(tmp_dir), [cache_file])
+                    # The second time, ranges are read from the cache file
+                    self.assertListEqual(load_control_char_ranges(), result)
+
+    def test_remove_invisible_chars_column(self):
+        values = ['abc\r def\u200b', None, 'ghi', '\u0001\U000e0020']
+        expected = ['abc def', None, 'ghi', '']
+        with self.subTest('Pandas Series'):
+            result = remove_invisible_chars_column(pd.Series(values))
+            self.assertListEqual(result.tolist(), expected)
+        with self.subTest('pyarrow Array'):
+            result = remove_invisible_chars_column(pa.array(values))
+            self.assertListEqual(result.to_pylist(), expected)
+
 
 if __name__ == '__main__':
     unittest.main()
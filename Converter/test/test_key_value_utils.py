@@ -0,0 +1,41 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021, Simone Persiani <iosonopersia@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+import unittest
+from utils.key_value_utils import split_key_value_pairs
+
+class TestKeyValueUtils(unittest.TestCase):
+
+    def test_split_key_value_pairs(self):
+        with self.subTest('Valid strings'):
+            self.assertListEqual(split_key_value_pairs('first=John, last=Doe, Jr.'),
+                                 [('first', 'John'), (' last', 'Doe, Jr.')])
+            self.assertListEqual(split_key_value_pairs('link=Rossi, Mario, first=Mario,'),
+                                 [('link', 'Rossi, Mario'), (' first', 'Mario,')])
+            self.assertListEqual(split_key_value_pairs('doi=, isbn=abc'), [('doi', ''), (' isbn', 'abc')])
+
+        with self.subTest('Strings without couples'):
+            self.assertListEqual(split_key_value_pairs(''), [])
+            self.assertListEqual(split_key_value_pairs('John Doe, Jr.'), [])
+
+        with self.subTest('Invalid strings'):
+            self.assertIsNone(split_key_value_pairs('doi=xy=z'))
+            self.assertIsNone(split_key_value_pairs('doi=xyz, isbn=a=b, pmid=123'))
+            # The second '=' char is not preceded by any ',' char: a key cannot be told apart from the value
+            self.assertIsNone(split_key_value_pairs('first=John last=Doe'))
+
+
+if __name__ == '__main__':
+    unittest.main()
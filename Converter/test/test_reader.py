@@ -0,0 +1,72 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021, Simone Persiani <iosonopersia@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+import os
+import tempfile
+import unittest
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from scripts.reader import columns_to_be_imported, iter_partition, iter_partition_batches
+
+
+class TestReader(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.tmp_dir.name, 'part-0.parquet')
+
+        data = {col: pa.array([f'{col}_{i}'.encode() for i in range(10)], type=pa.binary())
+                for col in columns_to_be_imported}
+        data['id'] = pa.array([float(i) for i in range(10)])
+        data['page_title'] = pa.array([f'Page {i}' for i in range(10)])
+        data['type_of_citation'] = pa.array(['cite journal', 'cite web'] * 5)
+        titles = [f'Title_{i}'.encode() for i in range(10)]
+        titles[2] = b'Citation generic template not possible'
+        data['Title'] = pa.array(titles, type=pa.binary())
+        pq.write_table(pa.table(data), self.filepath, row_group_size=4)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_iter_partition_batches(self):
+        with self.subTest('Rows are filtered and split in batches'):
+            tables = list(iter_partition_batches(self.filepath, 2))
+            self.assertTrue(all(table.num_rows <= 2 for table in tables))
+            self.assertListEqual(columns_to_be_imported, tables[0].column_names)
+
+            ids = [value for table in tables for value in table.column('id').to_pylist()]
+            self.assertListEqual(ids, [0.0, 4.0, 6.0, 8.0])
+        with self.subTest('An empty table is returned when every row is filtered out'):
+            pq.write_table(pq.read_table(self.filepath).slice(0, 0), self.filepath)
+            tables = list(iter_partition_batches(self.filepath, 2))
+            self.assertEqual(len(tables), 1)
+            self.assertEqual(tables[0].num_rows, 0)
+
+    def test_iter_partition(self):
+        whole = list(iter_partition(self.filepath, 0))
+        self.assertEqual(len(whole), 1)
+
+        batches = list(iter_partition(self.filepath, 1))
+        self.assertEqual(len(batches), 4)
+        for df in batches:
+            self.assertListEqual(list(df.index), [0])
+        titles = [title for df in batches for title in df['Title']]
+        self.assertListEqual(titles, list(whole[0]['Title']))
+
+
+if __name__ == '__main__':
+    unittest.main()
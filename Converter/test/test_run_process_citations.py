@@ -0,0 +1,146 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021, Simone Persiani <iosonopersia@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+import csv
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import pandas as pd
+from oc_ocdm.counter_handler.filesystem_counter_handler import FilesystemCounterHandler
+
+import run_process_citations
+from run_process_citations import process, reserve_counters
+from utils.citation_index import CitationIndex
+from utils.tmp_to_meta import TmpToMetaMapping
+
+# Both files cite 'bib_0_2' and 'bib_0_3' from 'wiki_0_1' (the first one twice)
+citations = {
+    '0.csv': [('wiki_0_1', 'bib_0_2'), ('wiki_0_1', 'bib_0_3'), ('wiki_0_1', 'bib_0_2'), ('wiki_0_4', 'bib_0_5')],
+    '1.csv': [('wiki_0_1', 'bib_0_3'), ('wiki_0_6', 'bib_0_7'), ('wiki_0_1', 'bib_0_2'), ('wiki_0_6', 'bib_0_5')],
+}
+rdf_type = '<http://www.w3.org/1999/02/22-rdf-syntax-ns#type>'
+cito_citation = '<http://purl.org/spar/cito/Citation>'
+
+
+class BarrierLock(object):
+    # A lock that is acquired only once all the workers are about to acquire it: this way, none
+    # of them can see the citations claimed by the others before entering the critical section
+    def __init__(self, parties):
+        self.barrier = threading.Barrier(parties)
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        self.barrier.wait(timeout=60)
+        self.lock.acquire()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.lock.release()
+
+
+class TestRunProcessCitations(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.dirs = {name: os.path.join(self.tmp_dir.name, name) + os.sep
+                     for name in ('info_dir', 'citations', 'csv_output', 'rdf_output')}
+        for path in self.dirs.values():
+            os.makedirs(path)
+        for filename, rows in citations.items():
+            pd.DataFrame(rows, columns=['citing', 'cited']).to_csv(os.path.join(self.dirs['citations'], filename),
+                                                                   index=False)
+        self.db_path = os.path.join(self.tmp_dir.name, 'citations_index.db')
+
+        tmp_ids = sorted({tmp_id for rows in citations.values() for row in rows for tmp_id in row})
+        self.mapping = TmpToMetaMapping()
+        self.mapping.add(pd.Series(tmp_ids), pd.Series([f'br/060{n}' for n in range(1, len(tmp_ids) + 1)]))
+        self.mapping.finalize()
+
+        self.patches = [mock.patch('run_process_citations.info_dir', self.dirs['info_dir']),
+                        mock.patch('run_process_citations.citations_csv_dir', self.dirs['citations']),
+                        mock.patch('run_process_citations.converter_citations_csv_output_dir',
+                                   self.dirs['csv_output']),
+                        mock.patch('run_process_citations.converter_citations_rdf_output_dir',
+                                   self.dirs['rdf_output']),
+                        mock.patch('run_process_citations.citations_index_path', self.db_path),
+                        mock.patch('run_process_citations.supplier_prefix', '')]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        self.tmp_dir.cleanup()
+
+    def test_reserve_counters(self):
+        self.assertTupleEqual(reserve_counters(3), (0, 0))
+        self.assertTupleEqual(reserve_counters(2), (3, 3))
+        self.assertTupleEqual(reserve_counters(0), (5, 5))
+
+        counter_handler = FilesystemCounterHandler(self.dirs['info_dir'])
+        self.assertEqual(counter_handler.read_counter('ci'), 5)
+        self.assertEqual(counter_handler.read_counter('id'), 5)
+
+    def test_parallel_process(self):
+        # The two files are processed at the same time and they share some couples
+        lock = BarrierLock(len(citations))
+        errors = []
+
+        def run(filename):
+            try:
+                process(filename, self.mapping, counter_lock=lock)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run, args=(filename,)) for filename in citations]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertListEqual(errors, [])
+
+        # No Citation entity is minted twice
+        minted = []
+        for filename in citations:
+            with open(os.path.join(self.dirs['rdf_output'], filename[:-4] + '.nt'), encoding='utf-8') as f:
+                minted.extend(line.split(' ')[0] for line in f if f' {rdf_type} {cito_citation} ' in line)
+        distinct_pairs = {pair for rows in citations.values() for pair in rows}
+        self.assertEqual(len(minted), len(distinct_pairs))
+        self.assertEqual(len(set(minted)), len(minted))
+
+        # The counters end at the number of new citations
+        counter_handler = FilesystemCounterHandler(self.dirs['info_dir'])
+        self.assertEqual(counter_handler.read_counter('ci'), len(distinct_pairs))
+        self.assertEqual(counter_handler.read_counter('id'), len(distinct_pairs))
+
+        # Both output files refer to the same Citation entity for the couples they share
+        citation_ids = {}
+        for filename in citations:
+            with open(os.path.join(self.dirs['csv_output'], filename), newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    self.assertEqual(citation_ids.setdefault((row['citing'], row['cited']), row['id']), row['id'])
+        self.assertEqual(len(citation_ids), len(distinct_pairs))
+        self.assertEqual(len(set(citation_ids.values())), len(distinct_pairs))
+
+        with CitationIndex(self.db_path, run_process_citations.base_iri) as index:
+            self.assertEqual(len(index.find(citation_ids)), len(distinct_pairs))
+            for filename in citations:
+                self.assertTrue(index.is_indexed(filename[:-4] + '.nt'))
+
+
+if __name__ == '__main__':
+    unittest.main()
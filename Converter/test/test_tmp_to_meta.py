@@ -0,0 +1,81 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021, Simone Persiani <iosonopersia@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from utils.tmp_to_meta import encode_tmp_ids, TmpToMetaMapping
+
+
+class TestTmpToMeta(unittest.TestCase):
+
+    def test_encode_tmp_ids(self):
+        keys, valid = encode_tmp_ids(pd.Series(['bib_0_12', 'wiki_3_0', None, 'bib_x_1', 'bib_0_12']))
+        self.assertListEqual(valid.tolist(), [True, True, False, False, True])
+        self.assertEqual(keys[0], 12)
+        self.assertEqual(keys[1], (1 << 62) | (3 << 40))
+        self.assertEqual(keys[0], keys[4])
+
+    def test_lookup(self):
+        mapping = TmpToMetaMapping()
+        mapping.add(pd.Series(['bib_0_1', 'bib_0_2', 'wiki_0_1']), pd.Series(['br/1', 'br/2', 'br/3']))
+        mapping.add(pd.Series(['bib_0_2']), pd.Series(['br/0602']))  # the last mapping wins
+        mapping.finalize()
+
+        self.assertEqual(len(mapping), 3)
+        result = mapping.lookup(pd.Series(['wiki_0_1', 'bib_0_2', None, 'bib_9_9', 'bib_0_1', 'abc']))
+        self.assertListEqual(result.tolist(), ['br/3', 'br/0602', None, None, 'br/1', None])
+
+    def test_map_series(self):
+        mapping = TmpToMetaMapping()
+        mapping.add(pd.Series(['bib_0_1', 'wiki_0_1']), pd.Series(['br/1', 'br/3']))
+        mapping.finalize()
+
+        series = pd.Series(['wiki_0_1', 'bib_0_1', None, 'wiki_0_1', float('nan'), 'bib_7_7'],
+                           index=[10, 11, 12, 13, 14, 15], name='citing')
+        result = mapping.map_series(series)
+        self.assertListEqual(result.tolist(), ['br/3', 'br/1', None, 'br/3', None, None])
+        self.assertListEqual(result.index.tolist(), [10, 11, 12, 13, 14, 15])
+        self.assertEqual(result.name, 'citing')
+        self.assertEqual(series[10], 'wiki_0_1')  # the given Series is left untouched
+
+        # None values are recognized by 'dropna'
+        df = pd.DataFrame({'citing': result, 'cited': result})
+        self.assertEqual(len(df.dropna(axis=0, how='any', subset=['citing', 'cited'])), 3)
+
+    def test_add_meta_csv(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            csv_path = os.path.join(tmp_dir, 'meta.csv')
+            with open(csv_path, 'w', encoding='utf-8') as f:
+                f.write('"id","title"\n'
+                        '"tmp:bib_0_12 isbn:978-1-876268-79-4 meta:br/06013","A"\n'
+                        '"tmp:bib_0_13 tmp:bib_1_4 meta:br/06014","B"\n'
+                        '"tmp:wiki_0_0","C"\n'
+                        ',"D"\n')
+            mapping = TmpToMetaMapping()
+            mapping.add_meta_csv(csv_path, chunksize=2)
+            mapping.save(os.path.join(tmp_dir, 'mapping'))
+
+            loaded = TmpToMetaMapping.load(os.path.join(tmp_dir, 'mapping'))
+            result = loaded.lookup(pd.Series(['bib_0_12', 'bib_0_13', 'bib_1_4', 'wiki_0_0']))
+            self.assertListEqual(result.tolist(), ['br/06013', 'br/06014', 'br/06014', None])
+            del loaded  # the memory-mapped files must be released before the folder is deleted
+
+
+if __name__ == '__main__':
+    unittest.main()
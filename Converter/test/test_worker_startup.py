@@ -0,0 +1,52 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021, Simone Persiani <iosonopersia@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+import multiprocessing
+import unittest
+
+from utils.worker_startup import get_process_context, profile_imports
+
+
+class TestWorkerStartup(unittest.TestCase):
+
+    def test_get_process_context(self):
+        with self.subTest('Default start method'):
+            self.assertEqual(get_process_context(None).get_start_method(), 'spawn')
+            self.assertEqual(get_process_context('spawn').get_start_method(), 'spawn')
+        with self.subTest('Forkserver start method'):
+            ctx = get_process_context('forkserver')
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                self.assertEqual(ctx.get_start_method(), 'forkserver')
+            else:
+                self.assertEqual(ctx.get_start_method(), 'spawn')
+        with self.subTest('Unsupported start method'):
+            self.assertRaises(ValueError, get_process_context, 'fork')
+
+    def test_profile_imports(self):
+        profile = profile_imports('json')
+        self.assertIn('json', profile.self_times)
+        self.assertIn('json.decoder', profile.cumulative_times)
+        self.assertGreaterEqual(profile.cumulative_times['json'], profile.self_times['json'])
+        self.assertIn('json', profile.top_packages())
+        self.assertGreater(profile.wall_time, 0.0)
+
+        report = profile.report()
+        self.assertTrue(report.startswith("Startup budget of a worker importing 'json'"))
+
+        self.assertRaises(RuntimeError, profile_imports, 'this_module_does_not_exist')
+
+
+if __name__ == '__main__':
+    unittest.main()
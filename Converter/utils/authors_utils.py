@@ -18,9 +18,12 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from typing import List, Dict, Optional, Set
+    from typing import Iterable, List, Dict, Optional, Set
+
+import re
 
 from utils.invisible_chars import remove_invisible_chars
+from utils.key_value_utils import split_key_value_pairs
 
 
 def stringify_authors(authors_list: List[Dict[str, str]]) -> str:
@@ -72,24 +75,18 @@ def invalid_brackets(first: int, last: int) -> bool:
     return first < 0 or last < 0 or first >= last
 
 
+# An equal sign followed by any sequence of equal signs and/or whitespace chars:
+duplicated_equal_signs_regex = re.compile(r'=[=\s]*')
+known_keys = {'link', 'first', 'last'}
+
+
 def unify_duplicated_equal_signs(s: str) -> str:
     """ 
     Removes repeated equal signs only if they are one after the other
     or if they are separated by spaces.
     Example: 'abc===def, mno= =pqr, stv==q==  =' --> 'abc=def, mno=pqr, stv=q='
     """
-    sequence_started = False
-    new_string = []
-    for char in s:
-        if not sequence_started:
-            new_string.append(char)
-            if char == '=':
-                sequence_started = True
-        else:
-            if char != '=' and not char.isspace():
-                sequence_started = False
-                new_string.append(char)
-    return ''.join(new_string)
+    return duplicated_equal_signs_regex.sub('=', s)
 
 
 def clean_author_string(s: str) -> str:
@@ -102,38 +99,51 @@ def clean_author_string(s: str) -> str:
 
 
 def get_author_dict(author: str) -> Dict[str, str]:
-    author = clean_author_string(author)
-    tokens = author.split('=')
-    if len(tokens) <= 1:
-        return {}
-    
-    all_tokens = [tokens[0]]  # insert first token
-    for i in range(1, len(tokens) - 1):
-        # It's fundamentally important that the string
-        # is split by the last ',' char: value tokens
-        # can contain one or more ','!
-        sub_tokens = tokens[i].rsplit(',', maxsplit=1)
-        all_tokens.extend(sub_tokens)
-    all_tokens.append(tokens[-1])  # insert last token
-    
-    # I don't try to parse tokens if I cannot safely distinguish
-    # between keys and values. In case of values containing '=' chars,
-    # I would risk to accept only a part of them, possibly changing their meaning.
-    if len(all_tokens) % 2 != 0:
+    return split_author_fields(clean_author_string(author))
+
+
+def split_author_fields(author: str) -> Dict[str, str]:
+    """
+    It extracts the 'key=value' couples from the content of an (already cleaned) 'author' structure.
+    Example: 'first=John, last=Doe, Jr.' --> {'first': 'John', 'last': 'Doe, Jr.'}
+    """
+    pairs = split_key_value_pairs(author)
+    if pairs is None:
         return {}
     
     author_dict = {}
-    known_keys = ['link', 'first', 'last']
-    for i in range(0, len(all_tokens), 2):
-        key = all_tokens[i].lower().strip()
-        value = all_tokens[i+1].strip()
+    for key, value in pairs:
+        key = key.lower().strip()
+        value = value.strip()
         if key in known_keys and value != '':
             author_dict[key] = value
     
     return author_dict
 
 
+def clean_authors_content(s: str) -> str:
+    """
+    It cleans at once the content of the whole list of 'author' structures: this is the same as
+    cleaning each of them by means of 'clean_author_string', since the removed chars can neither
+    be curly brackets nor be part of a sequence of equal signs that spans over two structures.
+    """
+    return clean_author_string(s)
+
+
+# An 'author' structure, preceded by the chars which separate it from the previous one (they can't be curly
+# brackets, otherwise the structure is not properly enclosed): its content cannot contain '}'
+author_structure_regex = re.compile(r'[^{}]*\{([^}]*)\}')
+
+
 def parse_authors(authors: str, ignore_errors: bool = True) -> List[Dict[str, str]]:
+    """
+    It parses a list of 'author' structures serialized by the Extractor.
+    Example: "[{first=John, last=Doe}, {link=Mario Rossi, Jr.}]" -->
+             [{'first': 'John', 'last': 'Doe'}, {'link': 'Mario Rossi, Jr.'}]
+
+    The string is scanned only once: each 'author' structure is matched starting from the end
+    of the previous one, and the scanning stops as soon as a structure is not properly enclosed.
+    """
     # I don't want to lose a reference to the initial 'authors' value
     s = authors
     
@@ -153,16 +163,14 @@ def parse_authors(authors: str, ignore_errors: bool = True) -> List[Dict[str, st
         else:
             raise ValueError(f'Malformed string (misplaced square brackets): {authors}')
     
-    s = s[opening_bracket + 1: closing_bracket]
+    s = clean_authors_content(s[opening_bracket + 1: closing_bracket])
     
     authors_list = []
     
-    # Find first 'author' structure
-    opening_obj = s.find('{')
-    closing_obj = s.find('}')
-    while not invalid_brackets(opening_obj, closing_obj):  # foreach 'author' structure
-        author = s[opening_obj + 1: closing_obj]  # by construction, it cannot contain '{' or '}'
-        author_dict = get_author_dict(author)
+    match = author_structure_regex.match
+    m = match(s)
+    while m is not None:  # foreach 'author' structure
+        author_dict = split_author_fields(m.group(1))
         if len(author_dict) > 0:
             authors_list.append(author_dict)
         else:
@@ -171,10 +179,8 @@ def parse_authors(authors: str, ignore_errors: bool = True) -> List[Dict[str, st
             else:
                 raise ValueError(f'Malformed string (at least one of the author structures is invalid): {authors}')
         
-        # Find next 'author' structure
-        s = s[closing_obj + 1:]  # 'closing_obj' is the index of '}'
-        opening_obj = s.find('{')
-        closing_obj = s.find('}')
+        # Match next 'author' structure
+        m = match(s, m.end())
     
     if len(authors_list) == 0:
         if ignore_errors:
@@ -182,3 +188,24 @@ def parse_authors(authors: str, ignore_errors: bool = True) -> List[Dict[str, st
         else:
             raise ValueError(f'Malformed string (no author info was extracted): {authors}')
     return authors_list
+
+
+def parse_authors_batch(column: Iterable[Optional[str]]) -> List[List[Dict[str, str]]]:
+    """
+    It parses a whole column of lists of 'author' structures at once (see 'parse_authors').
+    Errors are always ignored and missing values are parsed as empty lists.
+
+    The same work is usually cited by many Wikipedia pages: each distinct value is parsed only once,
+    and the rows holding the same value share the same list (which must not be modified).
+
+    :param column: An iterable of strings (or None values), e.g. a Pandas Series or a list
+    :return: A list containing the parsed lists of authors, in the same order
+    """
+    parsed: Dict[Optional[str], List[Dict[str, str]]] = {}
+    result: List[List[Dict[str, str]]] = []
+    for value in column:
+        authors_list = parsed.get(value)
+        if authors_list is None:
+            authors_list = parsed[value] = parse_authors(value)
+        result.append(authors_list)
+    return result
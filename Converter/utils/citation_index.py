@@ -0,0 +1,223 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021, Simone Persiani <iosonopersia@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, Iterable, List, Optional, Tuple
+
+import os
+import re
+import sqlite3
+
+cito_has_citing_entity = 'http://purl.org/spar/cito/hasCitingEntity'
+cito_has_cited_entity = 'http://purl.org/spar/cito/hasCitedEntity'
+datacite_has_identifier = 'http://purl.org/spar/datacite/hasIdentifier'
+datacite_uses_identifier_scheme = 'http://purl.org/spar/datacite/usesIdentifierScheme'
+datacite_oci = 'http://purl.org/spar/datacite/oci'
+literal_has_literal_value = 'http://www.essepuntato.it/2010/06/literalreification/hasLiteralValue'
+
+ntriples_line_regex = re.compile(r'^<([^>]*)>\s+<([^>]*)>\s+(?:<([^>]*)>|"((?:[^"\\]|\\.)*)"\S*)\s*\.\s*$')
+#                                  (subject)      (predicate)     (IRI object) ("literal object")[^^datatype|@lang]
+
+
+def unescape_ntriples_literal(s: str) -> str:
+    if '\\' not in s:
+        return s
+    return s.encode('latin-1', 'backslashreplace').decode('unicode-escape')
+
+
+class CitationIndex(object):
+    """
+    This class is a persistent (sqlite-backed) index which maps each (citing, cited) couple
+    of 'meta' identifiers onto the 'meta' identifier of the Citation entity describing it
+    and onto its OCI. It's used by the run_process_citations.py script to avoid duplicates
+    amongst Citation entities without querying the triplestore.
+
+    The index can be warmed up from the '.nt' files that were produced by previous runs of the
+    script: each file is imported only once, since its name is remembered inside the index itself.
+
+    Citations can also be 'claimed' on behalf of a file before it is actually stored: in this way,
+    concurrent processes cannot mint a second Citation entity for the same couple. Claims become
+    permanent once their file is marked as indexed, otherwise 'discard_incomplete' removes them.
+    """
+
+    def __init__(self, db_path: str, base_iri: str, timeout: float = 60.0) -> None:
+        self.base_iri: str = base_iri
+        db_dir: str = os.path.dirname(db_path)
+        if db_dir != '' and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+
+        # The WAL journal lets many processes read the index while another one is writing it
+        self.connection: sqlite3.Connection = sqlite3.connect(db_path, timeout=timeout)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        with self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS citations ('
+                                    'citing TEXT NOT NULL, cited TEXT NOT NULL, '
+                                    'ci TEXT NOT NULL, oci TEXT, source TEXT, '
+                                    'PRIMARY KEY (citing, cited)) WITHOUT ROWID')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS indexed_files ('
+                                    'filename TEXT PRIMARY KEY) WITHOUT ROWID')
+
+    def __enter__(self) -> CitationIndex:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def find(self, pairs: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Tuple[str, Optional[str]]]:
+        """
+        It returns a dictionary that maps each of the given (citing, cited) couples which is
+        already stored in the index onto a tuple containing the 'meta' identifier of the
+        corresponding Citation entity and its OCI (or None, when missing).
+
+        :param pairs: The (citing, cited) couples of 'meta' identifiers (e.g. ('br/0601', 'br/0602'))
+        """
+        cursor: sqlite3.Cursor = self.connection.cursor()
+        existing_citations: Dict[Tuple[str, str], Tuple[str, Optional[str]]] = {}
+        for pair in pairs:
+            if pair not in existing_citations:
+                row = cursor.execute('SELECT ci, oci FROM citations WHERE citing = ? AND cited = ?', pair).fetchone()
+                if row is not None:
+                    existing_citations[pair] = (row[0], row[1])
+        return existing_citations
+
+    def add(self, citations: Iterable[Tuple[str, str, str, Optional[str]]], filename: Optional[str] = None) -> None:
+        """
+        It stores the given citations inside the index. Couples that are already indexed are left untouched.
+        When a filename is given, it's marked as already indexed inside the same transaction (so that it
+        won't be imported again by 'warm').
+
+        :param citations: (citing, cited, ci, oci) tuples of 'meta' identifiers (the OCI can be None)
+        :param filename: The name of the '.nt' file in which the given citations were stored
+        """
+        with self.connection:
+            self._insert(citations, filename)
+            if filename is not None:
+                self._mark(filename)
+
+    def claim(self, citations: Iterable[Tuple[str, str, str, Optional[str]]], filename: str) -> None:
+        """
+        It stores the given citations inside the index on behalf of a '.nt' file that is yet to be
+        stored. They will be discarded by 'discard_incomplete' unless 'mark_indexed' is called for that file.
+
+        :param citations: (citing, cited, ci, oci) tuples of 'meta' identifiers (the OCI can be None)
+        :param filename: The name of the '.nt' file in which the given citations will be stored
+        """
+        with self.connection:
+            self._insert(citations, filename)
+
+    def mark_indexed(self, filename: str) -> None:
+        with self.connection:
+            self._mark(filename)
+
+    def discard_incomplete(self) -> int:
+        """
+        It removes the citations claimed on behalf of files that were never marked as indexed
+        (e.g. because the process that was storing them crashed).
+
+        :return: The number of removed citations
+        """
+        with self.connection:
+            cursor: sqlite3.Cursor = self.connection.execute(
+                'DELETE FROM citations WHERE source IS NOT NULL AND '
+                'source NOT IN (SELECT filename FROM indexed_files)')
+            return cursor.rowcount
+
+    def _insert(self, citations: Iterable[Tuple[str, str, str, Optional[str]]], source: Optional[str]) -> None:
+        self.connection.executemany('INSERT OR IGNORE INTO citations (citing, cited, ci, oci, source) '
+                                    'VALUES (?, ?, ?, ?, ?)',
+                                    ((citing, cited, ci, oci, source) for citing, cited, ci, oci in citations))
+
+    def _mark(self, filename: str) -> None:
+        self.connection.execute('INSERT OR IGNORE INTO indexed_files (filename) VALUES (?)', (filename,))
+
+    def is_indexed(self, filename: str) -> bool:
+        cursor: sqlite3.Cursor = self.connection.execute('SELECT 1 FROM indexed_files WHERE filename = ?',
+                                                         (filename,))
+        return cursor.fetchone() is not None
+
+    def warm(self, rdf_dir: str) -> int:
+        """
+        It imports into the index all the Citation entities that are described inside the '.nt' files
+        contained in the given folder (and in its sub-folders, except for the 'prov' ones). Files that
+        were already imported are skipped.
+
+        :param rdf_dir: The folder containing the '.nt' files produced by previous runs
+        :return: The number of files that were imported
+        """
+        imported_files: int = 0
+        if not os.path.isdir(rdf_dir):
+            return imported_files
+
+        for cur_dir, cur_subdirs, cur_files in os.walk(rdf_dir):
+            # Provenance files don't contain any Citation entity:
+            cur_subdirs[:] = [d for d in cur_subdirs if d != 'prov']
+            for cur_file in sorted(cur_files):
+                if cur_file.endswith('.nt'):
+                    filepath: str = os.path.join(cur_dir, cur_file)
+                    filename: str = os.path.relpath(filepath, rdf_dir)
+                    if not self.is_indexed(filename):
+                        self.add(self.extract_citations(filepath), filename)
+                        imported_files += 1
+        return imported_files
+
+    def extract_citations(self, filepath: str) -> List[Tuple[str, str, str, Optional[str]]]:
+        """
+        It extracts the Citation entities described inside the given N-Triples file.
+
+        :param filepath: The path of the '.nt' file to be parsed
+        :return: A list of (citing, cited, ci, oci) tuples of 'meta' identifiers (the OCI can be None)
+        """
+        citing: Dict[str, str] = {}
+        cited: Dict[str, str] = {}
+        identifiers: Dict[str, List[str]] = {}
+        oci_ids: Dict[str, bool] = {}
+        literals: Dict[str, str] = {}
+
+        with open(filepath, 'r', encoding='utf-8') as f:
+            for line in f:
+                match = ntriples_line_regex.match(line)
+                if match is None:
+                    continue
+                subj, pred, obj_iri, obj_literal = match.groups()
+                if pred == cito_has_citing_entity:
+                    citing[subj] = obj_iri
+                elif pred == cito_has_cited_entity:
+                    cited[subj] = obj_iri
+                elif pred == datacite_has_identifier:
+                    identifiers.setdefault(subj, []).append(obj_iri)
+                elif pred == datacite_uses_identifier_scheme:
+                    oci_ids[subj] = obj_iri == datacite_oci
+                elif pred == literal_has_literal_value and obj_literal is not None:
+                    literals[subj] = unescape_ntriples_literal(obj_literal)
+
+        base_len: int = len(self.base_iri)
+        citations: List[Tuple[str, str, str, Optional[str]]] = []
+        for ci_res, citing_res in citing.items():
+            if ci_res in cited:
+                oci: Optional[str] = None
+                for id_res in identifiers.get(ci_res, []):
+                    if oci_ids.get(id_res, False) and id_res in literals:
+                        oci = literals[id_res]
+                        break
+                citations.append((citing_res[base_len:], cited[ci_res][base_len:], ci_res[base_len:], oci))
+        return citations
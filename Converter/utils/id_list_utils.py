@@ -18,9 +18,10 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from typing import Dict, Set, List
+    from typing import Dict, Iterable, List, Optional, Set
 
 from utils.invisible_chars import remove_invisible_chars
+from utils.key_value_utils import split_key_value_pairs
 
 
 allowed_id_schemes = {'doi', 'isbn', 'issn', 'pmc', 'pmid'}
@@ -77,33 +78,19 @@ def parse_id_list(id_list: str, ignore_errors: bool = True) -> Dict[str, str]:
     
     s = s[opening_bracket + 1: closing_bracket]
     
-    s = clean_id_list_string(s)
-    tokens = s.split('=')
-    if len(tokens) <= 1:
-        return {}
-    
-    all_tokens = [tokens[0]]  # insert first token
-    for i in range(1, len(tokens) - 1):
-        # It's fundamentally important that the string
-        # is split by the last ',' char: value tokens
-        # can contain one or more ','!
-        sub_tokens = tokens[i].rsplit(',', maxsplit=1)
-        all_tokens.extend(sub_tokens)
-    all_tokens.append(tokens[-1])  # insert last token
-    
-    # I don't try to parse tokens if I cannot safely distinguish
-    # between keys and values. In case of values containing '=' chars,
-    # I would risk to accept only a part of them, possibly changing their meaning.
-    if len(all_tokens) % 2 != 0:
+    pairs = split_key_value_pairs(clean_id_list_string(s))
+    if pairs is None:
         if ignore_errors:
             return {}
         else:
             raise ValueError(f'Malformed string (at least one of the ID structures is invalid): {id_list}')
+    if len(pairs) == 0:
+        return {}
     
     id_info = {}
-    for i in range(0, len(all_tokens), 2):
-        key = all_tokens[i].lower().strip()
-        value = all_tokens[i+1].strip()
+    for key, value in pairs:
+        key = key.lower().strip()
+        value = value.strip()
         if key != '' and value != '' and key in allowed_id_schemes:
             # In case of two or more 'scheme:id' couples with the same 'scheme',
             # only the last 'id' value is kept for that particular 'scheme'.
@@ -118,6 +105,27 @@ def parse_id_list(id_list: str, ignore_errors: bool = True) -> Dict[str, str]:
     return id_info
 
 
+def parse_id_list_batch(column: Iterable[Optional[str]]) -> List[Dict[str, str]]:
+    """
+    It parses a whole column of 'ID_list' structures at once (see 'parse_id_list').
+    Errors are always ignored and missing values are parsed as empty dictionaries.
+
+    The same work is usually cited by many Wikipedia pages: each distinct value is parsed only once,
+    and the rows holding the same value share the same dictionary (which must not be modified).
+
+    :param column: An iterable of strings (or None values), e.g. a Pandas Series or a list
+    :return: A list containing the parsed dictionaries of identifiers, in the same order
+    """
+    parsed: Dict[Optional[str], Dict[str, str]] = {}
+    result: List[Dict[str, str]] = []
+    for value in column:
+        id_info = parsed.get(value)
+        if id_info is None:
+            id_info = parsed[value] = parse_id_list(value)
+        result.append(id_info)
+    return result
+
+
 def parse_id_list_repeated_schemes(id_list: str, ignore_errors: bool = True) -> Dict[str, List[str]]:
     """
     This function is esclusively used by the run_process_citations.py script to
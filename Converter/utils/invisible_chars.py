@@ -13,21 +13,102 @@
 # DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
 # ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
 # SOFTWARE.
-import unicodedata
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, List, Optional, Tuple
+
+import json
+import os
 import re
 import sys
+import tempfile
+import unicodedata
 
 # Control categories of Unicode (there are also Cs (surrogate), Co (private-use) and Cn (unassigned))
 categories = {'Cc', 'Cf'}
-control_chars = []
-for i in range(sys.maxunicode):
-    c = chr(i)
-    if unicodedata.category(c) in categories:
-        control_chars.append(c)
-control_chars = ''.join(control_chars)
+
+# Ranges (bounds included) of the code points belonging to the previous categories, according to the
+# following version of the Unicode database. They spare each (spawned) process the scan of the whole
+# Unicode range: should the running Python ship a different version of the database, the ranges are
+# computed once and then cached inside the temporary folder of the system (see 'load_control_char_ranges').
+precomputed_unidata_version = '14.0.0'
+precomputed_control_char_ranges = ((0x0000, 0x001F), (0x007F, 0x009F), (0x00AD, 0x00AD), (0x0600, 0x0605),
+                                   (0x061C, 0x061C), (0x06DD, 0x06DD), (0x070F, 0x070F), (0x0890, 0x0891),
+                                   (0x08E2, 0x08E2), (0x180E, 0x180E), (0x200B, 0x200F), (0x202A, 0x202E),
+                                   (0x2060, 0x2064), (0x2066, 0x206F), (0xFEFF, 0xFEFF), (0xFFF9, 0xFFFB),
+                                   (0x110BD, 0x110BD), (0x110CD, 0x110CD), (0x13430, 0x13438),
+                                   (0x1BCA0, 0x1BCA3), (0x1D173, 0x1D17A), (0xE0001, 0xE0001),
+                                   (0xE0020, 0xE007F))
+
+
+def compute_control_char_ranges() -> List[Tuple[int, int]]:
+    ranges: List[List[int]] = []
+    for i in range(sys.maxunicode):
+        if unicodedata.category(chr(i)) in categories:
+            if len(ranges) > 0 and ranges[-1][1] == i - 1:
+                ranges[-1][1] = i
+            else:
+                ranges.append([i, i])
+    return [(start, end) for start, end in ranges]
+
+
+def load_control_char_ranges() -> List[Tuple[int, int]]:
+    if unicodedata.unidata_version == precomputed_unidata_version:
+        return list(precomputed_control_char_ranges)
+
+    cache_path: str = os.path.join(tempfile.gettempdir(), f'wcw_control_chars_{unicodedata.unidata_version}.json')
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return [(start, end) for start, end in json.load(f)]
+    except (OSError, ValueError):
+        pass
+
+    ranges: List[Tuple[int, int]] = compute_control_char_ranges()
+    try:
+        tmp_path: str = f'{cache_path}.{os.getpid()}'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(ranges, f)
+        os.replace(tmp_path, cache_path)  # atomic: concurrent processes never read a partial file
+    except OSError:
+        pass
+    return ranges
+
+
+control_char_ranges: List[Tuple[int, int]] = load_control_char_ranges()
+control_chars: str = ''.join(chr(i) for start, end in control_char_ranges for i in range(start, end + 1))
 control_char_re = re.compile('[%s]' % re.escape(control_chars))
 
+# Translation table for 'str.translate': each invisible char is mapped onto None (i.e. it's deleted)
+control_char_table: Dict[int, Optional[str]] = dict.fromkeys(map(ord, control_chars))
+
+# Same char class of 'control_char_re', written with the syntax of RE2 (the regex engine used by pyarrow)
+control_char_re2_pattern: str = '[' + ''.join(f'\\x{{{start:X}}}-\\x{{{end:X}}}'
+                                              for start, end in control_char_ranges) + ']'
+
 
 def remove_invisible_chars(s):
     # This also removes ASCII characters that are invisible like \n, \t and \r !
-    return control_char_re.sub('', s)
+    # Printable strings cannot contain any of them: most values are returned as they are.
+    if s.isprintable():
+        return s
+    return s.translate(control_char_table)
+
+
+def remove_invisible_chars_column(column):
+    """
+    It removes the invisible chars (see 'remove_invisible_chars') from a whole column of strings at once.
+    Missing values are kept as they are.
+
+    :param column: A Pandas Series of strings or a pyarrow Array/ChunkedArray of strings
+    :return: A new column of the same kind of the given one
+    """
+    if hasattr(column, 'str'):
+        # Pandas Series
+        return column.str.translate(control_char_table)
+    else:
+        # pyarrow is imported here, so that it's not imported by each process that only needs 'remove_invisible_chars'
+        import pyarrow.compute as pc
+        return pc.replace_substring_regex(column, control_char_re2_pattern, '')
@@ -0,0 +1,54 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021, Simone Persiani <iosonopersia@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import List, Optional, Tuple
+
+import re
+
+# A 'key=value' couple of the structures serialized by the Extractor, followed by the ',' char that
+# separates it from the next couple (or by the end of the string). Values can contain one or more ','
+# chars: it's fundamentally important that a value ends at the LAST ',' char before the following '='.
+key_value_regex = re.compile(r'([^=]*)=([^=,]*(?:,(?![^=,]*=)[^=,]*)*)(?:,|\Z)')
+
+
+def split_key_value_pairs(s: str) -> Optional[List[Tuple[str, str]]]:
+    """
+    It splits the content of an 'author' or 'ID_list' structure into its 'key=value' couples, scanning
+    the string only once. Keys and values are returned as they are (they still need to be stripped).
+    Example: 'first=John, last=Doe, Jr.' --> [('first', 'John'), (' last', 'Doe, Jr.')]
+
+    I don't try to parse the couples if I cannot safely distinguish between keys and values (e.g. 'a=b=c'):
+    in case of values containing '=' chars, I would risk to accept only a part of them, possibly changing
+    their meaning. None is returned in that case, while a string without any '=' char has no couples at all.
+
+    :param s: The content of the structure (without the enclosing brackets)
+    :return: The list of (key, value) couples, in the same order, or None if the string is malformed
+    """
+    if s.find('=') < 0:
+        return []
+
+    pairs: List[Tuple[str, str]] = key_value_regex.findall(s)
+    # The couples must cover the whole string: each of them is followed by a ',' char, except the last one
+    length: int = len(pairs) - 1
+    for key, value in pairs:
+        length += len(key) + len(value) + 1
+    if length != len(s):
+        return None
+    return pairs
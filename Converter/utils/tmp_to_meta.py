@@ -0,0 +1,197 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021, Simone Persiani <iosonopersia@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import List, Tuple
+
+import os
+import numpy as np
+import pandas as pd
+
+# 'tmp' identifiers are generated by the run_process.py script as 'bib_<proc_index>_<row>'
+# (see convert_bibliographic) or as 'wiki_<proc_index>_<row>' (see convert_wiki):
+tmp_id_regex = r'^(bib|wiki)_(\d+)_(\d+)$'
+tmp_kinds = {'bib': 0, 'wiki': 1}
+
+# Bit layout of the integer keys: | kind (1 bit) | proc_index (22 bits) | row (40 bits) |
+kind_shift = 62
+proc_shift = 40
+max_proc_index = (1 << (kind_shift - proc_shift)) - 1
+max_row = (1 << proc_shift) - 1
+
+
+def encode_tmp_ids(series: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    This function encodes a Pandas Series of 'tmp' identifiers as 64-bit integers, so that they can be
+    stored and compared way more efficiently than strings.
+    Examples:
+        'bib_0_12' -> 12
+        'wiki_3_0' -> (1 << 62) | (3 << 40)
+
+    :param series: A Pandas Series of 'tmp' identifiers (it can contain None values)
+    :return: A tuple containing the Numpy array of the encoded keys and a boolean mask which tells
+             which elements could actually be encoded (the keys of the other ones are meaningless)
+    """
+    parts: pd.DataFrame = series.astype(str).str.extract(tmp_id_regex)
+    proc: np.ndarray = pd.to_numeric(parts[1], errors='coerce').fillna(-1).to_numpy(dtype=np.int64)
+    row: np.ndarray = pd.to_numeric(parts[2], errors='coerce').fillna(-1).to_numpy(dtype=np.int64)
+    kind: np.ndarray = parts[0].map(tmp_kinds).fillna(0).to_numpy(dtype=np.int64)
+
+    valid: np.ndarray = parts[0].notna().to_numpy() & (proc >= 0) & (proc <= max_proc_index) & \
+        (row >= 0) & (row <= max_row)
+    keys: np.ndarray = (kind << kind_shift) | (proc << proc_shift) | row
+    keys[~valid] = -1
+    return keys, valid
+
+
+class TmpToMetaMapping(object):
+    """
+    This class stores the mapping between 'tmp' identifiers and 'meta' identifiers in a compact form:
+    keys are integer-encoded (see 'encode_tmp_ids') and kept sorted inside a Numpy array, while values are
+    kept inside a parallel array of fixed-width byte strings. Lookups are performed over a whole column
+    at once by means of a binary search.
+
+    The mapping is built incrementally (see 'add' and 'add_meta_csv') and then made searchable by calling
+    'finalize'. It can be stored on disk ('save') and memory-mapped by many processes at once ('load').
+    """
+
+    keys_filename = 'tmp_keys.npy'
+    values_filename = 'meta_values.npy'
+
+    def __init__(self, keys: np.ndarray = None, values: np.ndarray = None) -> None:
+        self._pending_keys: List[np.ndarray] = []
+        self._pending_values: List[np.ndarray] = []
+        self.keys: np.ndarray = keys if keys is not None else np.empty(0, dtype=np.int64)
+        self.values: np.ndarray = values if values is not None else np.empty(0, dtype='S1')
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, tmp_ids: pd.Series, meta_ids: pd.Series) -> None:
+        """
+        It adds new mappings. In case of 'tmp' identifiers that were already added,
+        the last mapping wins (as it happens when updating a dictionary).
+
+        :param tmp_ids: A Pandas Series of 'tmp' identifiers
+        :param meta_ids: A Pandas Series of 'meta' identifiers, aligned with the previous one
+        """
+        keys, valid = encode_tmp_ids(tmp_ids)
+        values: np.ndarray = meta_ids.str.encode('utf-8').to_numpy()[valid].astype(np.bytes_)
+        self._pending_keys.append(keys[valid])
+        self._pending_values.append(values)
+
+    def add_meta_csv(self, filepath: str, chunksize: int = 100000) -> None:
+        """
+        It parses a CSV file which was produced by 'meta' in chunks of rows, so that memory usage is bounded.
+        Every 'tmp' identifier of a row is mapped onto the 'meta' identifier of the same row.
+        Example:
+            "tmp:bib_0_12 tmp:bib_0_346 isbn:978-1-876268-79-4 meta:br/06013" -> bib_0_12 --> br/06013
+                                                                                bib_0_346 --> br/06013
+
+        :param filepath: The path of the CSV file from which to extract mappings
+        :param chunksize: How many rows should be parsed at once
+        """
+        for chunk in pd.read_csv(filepath, usecols=['id'], dtype=str, chunksize=chunksize):
+            id_col: pd.Series = chunk['id'].dropna()
+            meta_col: pd.Series = id_col.str.extract(r'(?:^|\s)meta:(\S+)', expand=False)
+            tmp_col: pd.Series = id_col.str.extractall(r'(?:^|\s)tmp:(\S+)')[0]
+            if len(tmp_col) == 0:
+                continue
+
+            # Each 'tmp' identifier is aligned with the 'meta' identifier of its row:
+            row_meta: pd.Series = pd.Series(meta_col.reindex(tmp_col.index.get_level_values(0)).to_numpy())
+            tmp_col = tmp_col.reset_index(drop=True)
+            has_meta: pd.Series = row_meta.notna()
+            self.add(tmp_col[has_meta], row_meta[has_meta])
+
+    def finalize(self) -> TmpToMetaMapping:
+        """
+        It merges all the added mappings (if any) into the sorted arrays used for lookups.
+
+        :return: The mapping itself
+        """
+        if len(self._pending_keys) > 0:
+            keys: np.ndarray = np.concatenate([self.keys, *self._pending_keys])
+            values: np.ndarray = np.concatenate([self.values, *self._pending_values])
+            self._pending_keys = []
+            self._pending_values = []
+
+            # Looking for the first occurrence inside the reversed arrays means
+            # keeping the last added value for each key:
+            self.keys, first_idx = np.unique(keys[::-1], return_index=True)
+            self.values = values[::-1][first_idx]
+        return self
+
+    def lookup(self, series: pd.Series) -> np.ndarray:
+        """
+        It maps a whole Pandas Series of 'tmp' identifiers onto their respective 'meta' identifiers.
+
+        :param series: A Pandas Series of 'tmp' identifiers (it can contain None values)
+        :return: A Numpy array of 'meta' identifiers, with None values in place of the 'tmp'
+                 identifiers that could not be mapped
+        """
+        keys, valid = encode_tmp_ids(series)
+        result: np.ndarray = np.full(len(keys), None, dtype=object)
+        if len(self.keys) == 0:
+            return result
+
+        positions: np.ndarray = np.searchsorted(self.keys, keys)
+        positions[positions >= len(self.keys)] = 0
+        found: np.ndarray = valid & (self.keys[positions] == keys)
+        result[found] = np.char.decode(self.values[positions[found]], 'utf-8').astype(object)
+        return result
+
+    def map_series(self, series: pd.Series) -> pd.Series:
+        """
+        It maps a Pandas Series of 'tmp' identifiers onto a new Pandas Series (with the same index)
+        of 'meta' identifiers. The Series is factorized first, so that each distinct 'tmp' identifier
+        is looked up only once (the same Wikipedia page is usually the 'citing' entity of many rows).
+        Missing values and 'tmp' identifiers that could not be mapped become None values.
+
+        :param series: A Pandas Series of 'tmp' identifiers (it can contain None/NaN values)
+        :return: A new Pandas Series of 'meta' identifiers (or None values)
+        """
+        codes, uniques = pd.factorize(series)
+        mapped_uniques: np.ndarray = self.lookup(pd.Series(uniques, dtype=object))
+
+        result: np.ndarray = np.full(len(codes), None, dtype=object)
+        not_missing: np.ndarray = codes >= 0
+        result[not_missing] = mapped_uniques[codes[not_missing]]
+        return pd.Series(result, index=series.index, name=series.name, dtype=object)
+
+    def save(self, dir_path: str) -> None:
+        if not os.path.exists(dir_path):
+            os.makedirs(dir_path)
+        self.finalize()
+        np.save(os.path.join(dir_path, self.keys_filename), self.keys)
+        np.save(os.path.join(dir_path, self.values_filename), self.values)
+
+    @classmethod
+    def load(cls, dir_path: str, mmap: bool = True) -> TmpToMetaMapping:
+        """
+        It loads a mapping previously stored by 'save'. By default, arrays are memory-mapped:
+        this means that many processes can share the same mapping without copying it.
+
+        :param dir_path: The folder in which the mapping was stored
+        :param mmap: Whether the arrays should be memory-mapped instead of being read into memory
+        """
+        mmap_mode = 'r' if mmap else None
+        keys: np.ndarray = np.load(os.path.join(dir_path, cls.keys_filename), mmap_mode=mmap_mode)
+        values: np.ndarray = np.load(os.path.join(dir_path, cls.values_filename), mmap_mode=mmap_mode)
+        return cls(keys, values)
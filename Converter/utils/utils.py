@@ -74,8 +74,15 @@ def split_range_optional(s: str) -> Optional[Tuple[str, str]]:
         return start, end
 
 
-def explode_id_list(df: pd.DataFrame, column_name: str) -> pd.DataFrame:
-    df = df.join(pd.DataFrame(df.pop(column_name).to_list()))
+def explode_id_list(df: pd.DataFrame, column_name: str, expected_columns: Set[str] = None) -> pd.DataFrame:
+    df = df.join(pd.DataFrame(df.pop(column_name).to_list(), index=df.index))
+
+    # A small DataFrame could miss some of the columns: they're added anyway
+    # (filled with None values) so that every DataFrame has the same shape.
+    if expected_columns is not None:
+        for column in sorted(expected_columns):
+            if column not in df.columns:
+                df[column] = None
     return df
 
 
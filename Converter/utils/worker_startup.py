@@ -0,0 +1,149 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021, Simone Persiani <iosonopersia@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""
+This module helps reducing (and measuring) the time spent by each worker process of a multiprocessing Pool
+before it can actually start working.
+
+With the 'spawn' start method, every worker starts a brand new interpreter and imports again the main module
+of the script (together with pandas, pyarrow and all the utils modules). With the 'forkserver' start method,
+a server process imports the main module only once: workers are forked from it, with every module already
+imported. Workers can still be recycled after each task (i.e. 'maxtasksperchild=1'), as usual.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, List, Optional
+    from multiprocessing.context import BaseContext
+
+import multiprocessing
+import os
+import re
+import subprocess
+import sys
+import time
+
+supported_start_methods = ['spawn', 'forkserver']
+
+import_time_regex = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)\s*$')
+#                                                (self [us])  (cumulative)  (module)
+
+
+def get_process_context(start_method: Optional[str] = 'spawn') -> BaseContext:
+    """
+    It returns the multiprocessing context to be used for creating the Pool of a script.
+
+    When the 'forkserver' start method is chosen (and it's supported by the system), the main module of
+    the script is preloaded by the fork server: in this way, it's imported only once instead of once
+    per worker. Otherwise, the 'spawn' start method is used.
+
+    :param start_method: The name of the start method ('spawn' or 'forkserver')
+    :return: The multiprocessing context
+    """
+    if start_method is None:
+        start_method = 'spawn'
+    if start_method not in supported_start_methods:
+        raise ValueError(f"Unsupported start method '{start_method}': it must be one of {supported_start_methods}")
+
+    if start_method == 'forkserver' and 'forkserver' not in multiprocessing.get_all_start_methods():
+        print("The 'forkserver' start method is not supported by this system: 'spawn' will be used instead")
+        start_method = 'spawn'
+
+    ctx: BaseContext = multiprocessing.get_context(start_method)
+    if start_method == 'forkserver':
+        # '__main__' is imported by the fork server as '__mp_main__': workers won't import it again
+        ctx.set_forkserver_preload(['__main__'])
+    return ctx
+
+
+class ImportProfile(object):
+    """
+    This class contains the outcome of 'profile_imports': the time (in seconds) needed for a new interpreter
+    to start and to import a module, together with the time spent importing each of the (sub)modules.
+    """
+
+    def __init__(self, module_name: str, wall_time: float, baseline_time: float) -> None:
+        self.module_name: str = module_name
+        self.wall_time: float = wall_time
+        self.baseline_time: float = baseline_time
+        self.self_times: Dict[str, float] = {}
+        self.cumulative_times: Dict[str, float] = {}
+
+    def add(self, module: str, self_time: float, cumulative_time: float) -> None:
+        self.self_times[module] = self_time
+        self.cumulative_times[module] = cumulative_time
+
+    def top_packages(self) -> Dict[str, float]:
+        """
+        It groups the time spent importing each module by top-level package (e.g. 'pandas.core.frame' is
+        accounted to 'pandas'), sorting them from the most expensive one.
+        """
+        packages: Dict[str, float] = {}
+        for module, self_time in self.self_times.items():
+            package: str = module.split('.')[0]
+            packages[package] = packages.get(package, 0.0) + self_time
+        return dict(sorted(packages.items(), key=lambda item: item[1], reverse=True))
+
+    def report(self, limit: int = 15) -> str:
+        lines: List[str] = [f"Startup budget of a worker importing '{self.module_name}':",
+                            f"  interpreter startup: ~{round(self.baseline_time, 3)}s",
+                            f"  interpreter startup + imports: ~{round(self.wall_time, 3)}s",
+                            f"  most expensive packages (self time of all their modules):"]
+        for package, seconds in list(self.top_packages().items())[:limit]:
+            lines.append(f"    {package:<30} {round(seconds, 3):>8}s")
+        lines.append(f"  most expensive modules (self time):")
+        most_expensive = sorted(self.self_times.items(), key=lambda item: item[1], reverse=True)[:limit]
+        for module, seconds in most_expensive:
+            lines.append(f"    {module:<50} {round(seconds, 3):>8}s")
+        return '\n'.join(lines)
+
+
+def run_interpreter(args: List[str], cwd: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], cwd=cwd, stdout=subprocess.DEVNULL,
+                          stderr=subprocess.PIPE, universal_newlines=True)
+
+
+def profile_imports(module_name: str, cwd: Optional[str] = None) -> ImportProfile:
+    """
+    It measures the "startup budget" of a worker process created with the 'spawn' start method, i.e. the
+    time needed by a brand new interpreter to import the given module. The import time of each (sub)module
+    is measured by the interpreter itself (see the '-X importtime' option of Python).
+
+    :param module_name: The name of the module imported by each worker (usually, the main module of the script)
+    :param cwd: The working directory from which the module can be imported (by default, the current one)
+    :return: An ImportProfile object
+    """
+    if cwd is None:
+        cwd = os.getcwd()
+
+    start: float = time.time()
+    run_interpreter(['-c', 'pass'], cwd)
+    baseline_time: float = time.time() - start
+
+    start = time.time()
+    completed: subprocess.CompletedProcess = run_interpreter(['-X', 'importtime', '-c', f'import {module_name}'], cwd)
+    wall_time: float = time.time() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"Unable to import '{module_name}':\n{completed.stderr}")
+
+    profile: ImportProfile = ImportProfile(module_name, wall_time, baseline_time)
+    for line in completed.stderr.splitlines():
+        match = import_time_regex.match(line)
+        if match is not None:
+            self_us, cumulative_us, module = match.groups()
+            profile.add(module, int(self_us) / 1e6, int(cumulative_us) / 1e6)
+    return profile